@@ -0,0 +1,340 @@
+"""Runs nif conversions over a pool of background Blender worker processes, and writes a per-file report.
+
+This script only uses the standard library, so it runs with any Python 3, outside of Blender:
+
+    python io_scene_niftools/batch/runner.py --blender /path/to/blender --workers 8 --output out/ meshes/
+
+The source is either a directory, which is searched recursively for nif files, or a manifest, a text file with one
+input path per line, optionally followed by a tab and the output path. Each worker is a
+"blender --background --factory-startup" process running worker.py, that keeps converting files until the runner
+closes it.
+"""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2026, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above
+#      copyright notice, this list of conditions and the following
+#      disclaimer in the documentation and/or other materials provided
+#      with the distribution.
+#
+#    * Neither the name of the NIF File Format Library and Tools
+#      project nor the names of its contributors may be used to endorse
+#      or promote products derived from this software without specific
+#      prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import argparse
+import json
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+
+# prefix of the lines through which a worker reports to the runner, all other output is logged
+RESULT_MARKER = "NIFTOOLS_BATCH:"
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "worker.py")
+# the folder that contains the io_scene_niftools package
+ADDON_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def collect_jobs(source, output_dir=None, extensions=(".nif",), mode="roundtrip"):
+    """Returns the jobs for all files in a directory or manifest.
+
+    :param source: A directory to search recursively, or a manifest file.
+    :type source: str
+    :param output_dir: The folder for the exported files, mirroring the directory structure of source.
+    :type output_dir: str
+    :param extensions: The file extensions to convert when source is a directory.
+    :param mode: "roundtrip" to import and export each file, "import" to only import it.
+    :return: List of jobs, as dicts with an input and output path.
+    """
+    jobs = []
+    if os.path.isdir(source):
+        for directory, dirnames, filenames in os.walk(source):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                if os.path.splitext(filename)[1].lower() in extensions:
+                    input_path = os.path.join(directory, filename)
+                    jobs.append({"input": input_path, "relpath": os.path.relpath(input_path, source)})
+    else:
+        base = os.path.dirname(os.path.abspath(source))
+        with open(source, encoding="utf-8") as manifest:
+            for line in manifest:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                input_path, _, output_path = line.partition("\t")
+                job = {"input": os.path.join(base, input_path), "relpath": os.path.basename(input_path)}
+                if output_path:
+                    job["output"] = os.path.join(base, output_path)
+                jobs.append(job)
+
+    for job in jobs:
+        relpath = job.pop("relpath")
+        job["mode"] = mode
+        if mode == "roundtrip" and "output" not in job:
+            if not output_dir:
+                raise ValueError(f"No output path for '{job['input']}', specify an output directory")
+            job["output"] = os.path.join(output_dir, relpath)
+        job["input"] = os.path.abspath(job["input"])
+        if job.get("output"):
+            job["output"] = os.path.abspath(job["output"])
+    return jobs
+
+
+def parse_options(pairs):
+    """Turns a list of key=value strings into operator keyword arguments. Values are read as JSON where possible, so
+    numbers and booleans keep their type, and are strings otherwise."""
+    options = {}
+    for pair in pairs or ():
+        key, _, value = pair.partition("=")
+        try:
+            options[key] = json.loads(value)
+        except ValueError:
+            options[key] = value
+    return options
+
+
+class Worker:
+    """A background Blender process that runs the jobs it is sent, one at a time."""
+
+    def __init__(self, index, blender, log_dir=None, startup_timeout=300.0):
+        self.index = index
+        self.blender = blender
+        self.log_dir = log_dir
+        self.startup_timeout = startup_timeout
+        self.process = None
+        self.messages = None
+        self.jobs_done = 0
+
+    def start(self):
+        """Starts the Blender process and waits until it reports that the addon is enabled."""
+        log = None
+        if self.log_dir:
+            os.makedirs(self.log_dir, exist_ok=True)
+            log = open(os.path.join(self.log_dir, f"worker_{self.index}.log"), "a", encoding="utf-8")
+        self.messages = queue.Queue()
+        try:
+            self.process = subprocess.Popen(
+                [self.blender, "--background", "--factory-startup", "--python", WORKER_SCRIPT, "--", ADDON_ROOT],
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                universal_newlines=True, encoding="utf-8", errors="replace", bufsize=1)
+        except OSError as e:
+            # missing or non-executable Blender
+            if log:
+                log.close()
+            self.stop()
+            raise RuntimeError(f"Worker {self.index} failed to start: {e}") from e
+        # the log belongs to the reader, as the output may still be draining after the process was stopped
+        threading.Thread(target=self._read_output, args=(self.process, self.messages, log), daemon=True).start()
+        self.jobs_done = 0
+        message = self._receive(self.startup_timeout)
+        if not message or not message.get("ready"):
+            self.stop(kill=True)
+            if not message:
+                error = "worker exited during startup"
+            elif message.get("timeout"):
+                error = f"timed out after {self.startup_timeout}s"
+            else:
+                error = message.get("error")
+            raise RuntimeError(f"Worker {self.index} failed to start: {error}")
+
+    @staticmethod
+    def _read_output(process, messages, log=None):
+        """Passes the results of the process on to messages and writes all other output to log, which is closed
+        once the output ends."""
+        try:
+            for line in process.stdout:
+                if line.startswith(RESULT_MARKER):
+                    messages.put(json.loads(line[len(RESULT_MARKER):]))
+                elif log:
+                    log.write(line)
+        finally:
+            if log:
+                log.close()
+            # signal that the process has exited
+            messages.put(None)
+
+    def _receive(self, timeout):
+        try:
+            return self.messages.get(timeout=timeout)
+        except queue.Empty:
+            return {"timeout": True}
+
+    def run(self, job, timeout=None):
+        """Sends a job to the worker and returns its result. Restarts the worker if it crashed or timed out."""
+        if self.process is None:
+            self.start()
+        start = time.perf_counter()
+        try:
+            self.process.stdin.write(json.dumps(job) + "\n")
+            self.process.stdin.flush()
+            result = self._receive(timeout)
+        except OSError:
+            result = None
+        if result is None or result.get("timeout"):
+            status = "TIMEOUT" if result else "CRASHED"
+            self.stop(kill=True)
+            result = dict(job, status=status, errors=[f"Worker {self.index} {status.lower()} on this file"],
+                          total_time=time.perf_counter() - start)
+        else:
+            self.jobs_done += 1
+        result["worker"] = self.index
+        return result
+
+    def stop(self, kill=False):
+        """Closes the Blender process."""
+        if self.process is not None:
+            try:
+                if kill:
+                    self.process.kill()
+                else:
+                    self.process.stdin.close()
+                self.process.wait(timeout=60)
+            except (OSError, subprocess.TimeoutExpired):
+                self.process.kill()
+            self.process = None
+
+
+def run_batch(jobs, blender="blender", workers=None, timeout=None, max_jobs_per_worker=None, log_dir=None,
+              import_options=None, export_options=None, progress=None):
+    """Runs the jobs on a pool of Blender workers.
+
+    :param jobs: The jobs, as returned by collect_jobs.
+    :param blender: Path of the Blender executable.
+    :param workers: Number of Blender processes, defaults to the number of CPUs.
+    :param timeout: Maximum time in seconds for a single job, after which its worker is restarted.
+    :param max_jobs_per_worker: Restart a worker after this many jobs, to bound its memory use.
+    :param log_dir: Folder for the output of each worker.
+    :param import_options: Keyword arguments for the nif import operator.
+    :param export_options: Keyword arguments for the nif export operator.
+    :param progress: Called with each result as it comes in.
+    :return: The results, in the order of the jobs.
+    """
+    workers = max(1, min(workers or os.cpu_count() or 1, len(jobs)))
+    pending = queue.Queue()
+    for index, job in enumerate(jobs):
+        pending.put((index, dict(job, import_options=import_options or {}, export_options=export_options or {})))
+    results = [None] * len(jobs)
+    lock = threading.Lock()
+
+    def serve(worker):
+        try:
+            while True:
+                try:
+                    index, job = pending.get_nowait()
+                except queue.Empty:
+                    break
+                if max_jobs_per_worker and worker.jobs_done >= max_jobs_per_worker:
+                    worker.stop()
+                try:
+                    result = worker.run(job, timeout)
+                except RuntimeError as e:
+                    result = dict(job, status="ERROR", errors=[str(e)], worker=worker.index)
+                with lock:
+                    results[index] = result
+                    if progress:
+                        progress(result)
+        finally:
+            worker.stop()
+
+    threads = [threading.Thread(target=serve, args=(Worker(i, blender, log_dir),)) for i in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # jobs that were left over if all workers stopped unexpectedly
+    for index, result in enumerate(results):
+        if result is None:
+            results[index] = dict(jobs[index], status="ERROR", errors=["Job was not run"])
+    return results
+
+
+def get_status(result):
+    """Returns the status of a result, ERROR for a job without result."""
+    return result["status"] if result else "ERROR"
+
+
+def write_report(results, report_path, total_time):
+    """Writes the results and a summary as a json file."""
+    statuses = {}
+    for result in results:
+        status = get_status(result)
+        statuses[status] = statuses.get(status, 0) + 1
+    report = {
+        "summary": {"files": len(results), "statuses": statuses, "total_time": total_time},
+        "results": [{key: value for key, value in (result or {"status": "ERROR"}).items()
+                     if key not in ("import_options", "export_options")}
+                    for result in results],
+    }
+    with open(report_path, "w", encoding="utf-8") as report_file:
+        json.dump(report, report_file, indent=2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("source", help="directory to search for nif files, or manifest file")
+    parser.add_argument("--output", help="directory for the exported files")
+    parser.add_argument("--mode", choices=("roundtrip", "import"), default="roundtrip",
+                        help="import and export each file, or only import it")
+    parser.add_argument("--blender", default=os.environ.get("BLENDER", "blender"), help="Blender executable")
+    parser.add_argument("--workers", type=int, help="number of Blender processes (default: number of CPUs)")
+    parser.add_argument("--timeout", type=float, help="maximum time in seconds per file")
+    parser.add_argument("--max-jobs-per-worker", type=int, help="restart a worker after this many files")
+    parser.add_argument("--extensions", default=".nif", help="comma separated extensions to search for")
+    parser.add_argument("--import-option", action="append", metavar="KEY=VALUE",
+                        help="property of the nif import operator, can be repeated")
+    parser.add_argument("--export-option", action="append", metavar="KEY=VALUE",
+                        help="property of the nif export operator, can be repeated")
+    parser.add_argument("--report", default="batch_report.json", help="path of the json report")
+    parser.add_argument("--log-dir", help="directory for the Blender output of each worker")
+    args = parser.parse_args(argv)
+
+    extensions = tuple(extension.strip().lower() for extension in args.extensions.split(","))
+    jobs = collect_jobs(args.source, args.output, extensions, args.mode)
+    if not jobs:
+        print("No files to convert.")
+        return 0
+
+    def progress(result):
+        print(f"[{result['status']}] {result['input']} ({result.get('total_time', 0.0):.2f}s)", flush=True)
+
+    start = time.perf_counter()
+    results = run_batch(jobs, args.blender, args.workers, args.timeout, args.max_jobs_per_worker, args.log_dir,
+                        parse_options(args.import_option), parse_options(args.export_option), progress)
+    total_time = time.perf_counter() - start
+    write_report(results, args.report, total_time)
+    failed = sum(get_status(result) != "FINISHED" for result in results)
+    print(f"Converted {len(results) - failed} of {len(results)} files in {total_time:.1f}s, report in {args.report}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+"""Blender side of the batch runner: converts the nif files it receives on stdin, one job per line.
+
+Started by runner.py as "blender --background --factory-startup --python worker.py -- <addon root>". The scene is
+cleared between jobs, so a single Blender process can convert many files.
+"""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2026, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above
+#      copyright notice, this list of conditions and the following
+#      disclaimer in the documentation and/or other materials provided
+#      with the distribution.
+#
+#    * Neither the name of the NIF File Format Library and Tools
+#      project nor the names of its contributors may be used to endorse
+#      or promote products derived from this software without specific
+#      prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import importlib.util
+import json
+import logging
+import os
+import sys
+import time
+import traceback
+
+import addon_utils
+import bpy
+
+# the runner only uses the standard library, so it can be loaded before the addon is enabled
+_spec = importlib.util.spec_from_file_location(
+    "niftools_batch_runner", os.path.join(os.path.dirname(os.path.abspath(__file__)), "runner.py"))
+runner = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(runner)
+
+
+def send(message):
+    """Reports a message to the runner."""
+    sys.stdout.write(runner.RESULT_MARKER + json.dumps(message) + "\n")
+    sys.stdout.flush()
+
+
+def clear_scene():
+    """Removes all data that a previous job may have created."""
+    if bpy.context.mode != 'OBJECT':
+        bpy.ops.object.mode_set(mode='OBJECT', toggle=False)
+    for collection in ("objects", "meshes", "armatures", "materials", "textures", "images", "actions",
+                       "shape_keys", "cameras", "lights", "node_groups", "collections"):
+        b_collection = getattr(bpy.data, collection, None)
+        if b_collection is None:
+            continue
+        for b_data in b_collection[:]:
+            # shape keys are removed with their meshes
+            if hasattr(b_collection, "remove"):
+                b_collection.remove(b_data)
+
+
+class ErrorCollector(logging.Handler):
+    """Keeps the errors logged by the addon during a job."""
+
+    def __init__(self):
+        logging.Handler.__init__(self, logging.ERROR)
+        self.errors = []
+
+    def emit(self, record):
+        self.errors.append(record.getMessage())
+
+
+def run_job(job):
+    """Imports, and for a round trip exports, the file of a job and returns the result with timings."""
+    from io_scene_niftools.utils.consts import LOGGER_PLUGIN
+
+    result = dict(job, status="FINISHED")
+    collector = ErrorCollector()
+    logger = logging.getLogger(LOGGER_PLUGIN)
+    logger.addHandler(collector)
+    start = time.perf_counter()
+    try:
+        clear_scene()
+        import_start = time.perf_counter()
+        status = bpy.ops.import_scene.nif(filepath=job["input"], **job.get("import_options", {}))
+        result["import_time"] = time.perf_counter() - import_start
+        if 'FINISHED' not in status:
+            result["status"] = "CANCELLED"
+        elif job.get("mode") == "roundtrip":
+            os.makedirs(os.path.dirname(job["output"]), exist_ok=True)
+            # export everything that was imported
+            for b_obj in bpy.context.view_layer.objects:
+                b_obj.select_set(False)
+            export_start = time.perf_counter()
+            status = bpy.ops.export_scene.nif(filepath=job["output"], **job.get("export_options", {}))
+            result["export_time"] = time.perf_counter() - export_start
+            if 'FINISHED' not in status:
+                result["status"] = "CANCELLED"
+    except Exception as e:
+        result["status"] = "ERROR"
+        collector.errors.append(str(e) or traceback.format_exc())
+    finally:
+        logger.removeHandler(collector)
+    result["total_time"] = time.perf_counter() - start
+    result["errors"] = collector.errors
+    # errors are logged, but not always raised
+    if result["status"] == "FINISHED" and collector.errors:
+        result["status"] = "CANCELLED"
+    return result
+
+
+def main():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    try:
+        if argv and argv[0] not in sys.path:
+            sys.path.insert(0, argv[0])
+        addon_utils.enable("io_scene_niftools", default_set=True, persistent=True)
+        import io_scene_niftools
+    except Exception:
+        send({"ready": False, "error": traceback.format_exc()})
+        return
+    send({"ready": True, "version": ".".join(str(i) for i in io_scene_niftools.bl_info["version"])})
+    for line in sys.stdin:
+        if line.strip():
+            send(run_job(json.loads(line)))
+
+
+main()
@@ -0,0 +1,499 @@
+"""Reads Bethesda BSA and BA2 archives, and extracts single entries on demand into a size bounded cache."""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2026, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above
+#      copyright notice, this list of conditions and the following
+#      disclaimer in the documentation and/or other materials provided
+#      with the distribution.
+#
+#    * Neither the name of the NIF File Format Library and Tools
+#      project nor the names of its contributors may be used to endorse
+#      or promote products derived from this software without specific
+#      prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import hashlib
+import json
+import os
+import struct
+import sys
+import tempfile
+import zlib
+from collections import OrderedDict
+
+from io_scene_niftools.utils.logging import NifLog, NifError
+
+try:
+    import lz4.block
+    import lz4.frame
+except ImportError:
+    # only needed for Skyrim Special Edition and Starfield archives
+    lz4 = None
+
+# bump when the stored entry layout changes, to rescan all archives
+INDEX_VERSION = 1
+
+ARCHIVE_EXTENSIONS = (".bsa", ".ba2")
+
+# how archive entries are compressed
+CODEC_ZLIB = "zlib"
+CODEC_LZ4_FRAME = "lz4_frame"
+CODEC_LZ4_BLOCK = "lz4_block"
+
+# bsa archive flags
+BSA_DIRECTORY_NAMES = 0x1
+BSA_FILE_NAMES = 0x2
+BSA_COMPRESSED = 0x4
+BSA_EMBEDDED_NAMES = 0x100
+# set in the size of a bsa file record if its compression differs from the archive default
+BSA_COMPRESSION_TOGGLE = 0x40000000
+BSA_SIZE_MASK = 0x3FFFFFFF
+
+# dxgi format -> (four cc of the legacy dds header, or None for the dx10 header, bytes per 4x4 block)
+DXGI_BLOCK_FORMATS = {
+    71: (b"DXT1", 8), 72: (b"DXT1", 8),
+    74: (b"DXT3", 16), 75: (b"DXT3", 16),
+    77: (b"DXT5", 16), 78: (b"DXT5", 16),
+    80: (b"ATI1", 8), 81: (None, 8),
+    83: (b"ATI2", 16), 84: (None, 16),
+    95: (None, 16), 96: (None, 16),
+    98: (None, 16), 99: (None, 16),
+}
+# dxgi format -> (bits per pixel, red, green, blue and alpha masks of the legacy dds header)
+DXGI_PIXEL_FORMATS = {
+    28: (32, 0x000000FF, 0x0000FF00, 0x00FF0000, 0xFF000000),
+    29: (32, 0x000000FF, 0x0000FF00, 0x00FF0000, 0xFF000000),
+    61: (8, 0x000000FF, 0, 0, 0),
+    87: (32, 0x00FF0000, 0x0000FF00, 0x000000FF, 0xFF000000),
+    88: (32, 0x00FF0000, 0x0000FF00, 0x000000FF, 0),
+    91: (32, 0x00FF0000, 0x0000FF00, 0x000000FF, 0xFF000000),
+}
+
+
+def get_default_cache_dir():
+    """Returns the directory for the archive index and extracted files, in the cache location of the platform."""
+    if sys.platform == "win32":
+        cache_root = os.environ.get("LOCALAPPDATA") or tempfile.gettempdir()
+    elif sys.platform == "darwin":
+        cache_root = os.path.expanduser(os.path.join("~", "Library", "Caches"))
+    else:
+        cache_root = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser(os.path.join("~", ".cache"))
+    return os.path.join(cache_root, "blender_niftools", "archives")
+
+
+def normalize_name(name):
+    """Returns the name under which a file is stored in the archive index: lower case, with backslashes."""
+    return name.replace("/", "\\").strip("\\").lower()
+
+
+def _unpack(fmt, stream):
+    size = struct.calcsize(fmt)
+    data = stream.read(size)
+    if len(data) != size:
+        raise NifError("Unexpected end of file in archive header.")
+    return struct.unpack(fmt, data)
+
+
+def _iter_unpack(fmt, stream, count):
+    size = struct.calcsize(fmt) * count
+    data = stream.read(size)
+    if len(data) != size:
+        raise NifError("Unexpected end of file in archive header.")
+    return struct.iter_unpack(fmt, data)
+
+
+def _decode(name):
+    return normalize_name(name.rstrip(b"\x00").decode("latin-1"))
+
+
+def _read_tes3_bsa(stream):
+    """Reads the entries of a Morrowind bsa as name -> [offset, size]."""
+    _version, hash_offset, num_files = _unpack("<3I", stream)
+    records = list(_iter_unpack("<2I", stream, num_files))
+    name_offsets = [offset for offset, in _iter_unpack("<I", stream, num_files)]
+    names = stream.read(hash_offset - 12 * num_files)
+    # file offsets are relative to the data, which follows the name hashes
+    data_offset = 12 + hash_offset + 8 * num_files
+    entries = {}
+    for (size, offset), name_offset in zip(records, name_offsets):
+        name = _decode(names[name_offset:names.find(b"\x00", name_offset)])
+        entries[name] = [data_offset + offset, size]
+    return {"format": "tes3", "entries": entries}
+
+
+def _read_bsa(stream):
+    """Reads the entries of an Oblivion, Fallout 3 or Skyrim bsa as name -> [offset, size, compressed]."""
+    (_magic, version, folder_offset, archive_flags, num_folders, num_files,
+     _folder_names_length, file_names_length, _file_flags) = _unpack("<4s7IH2x", stream)
+    if version not in (103, 104, 105):
+        raise NifError(f"Unsupported bsa version {version}.")
+    if not archive_flags & BSA_DIRECTORY_NAMES or not archive_flags & BSA_FILE_NAMES:
+        raise NifError("Archive without file names, which cannot be searched by name.")
+    folder_format = "<QIIQ" if version == 105 else "<QII"
+    folder_counts = [record[1] for record in _iter_unpack(folder_format, stream, num_folders)]
+
+    # each folder name is followed by the records of its files, the file names follow all of them
+    stream.seek(folder_offset + struct.calcsize(folder_format) * num_folders)
+    records = []
+    for count in folder_counts:
+        folder = _decode(stream.read(_unpack("<B", stream)[0]))
+        records.extend((folder, size, offset) for _hash, size, offset in _iter_unpack("<QII", stream, count))
+    file_names = stream.read(file_names_length).split(b"\x00")
+    if len(records) != num_files or len(file_names) < num_files:
+        raise NifError("Inconsistent file records in archive header.")
+
+    default_compressed = bool(archive_flags & BSA_COMPRESSED)
+    entries = {}
+    for (folder, size, offset), file_name in zip(records, file_names):
+        compressed = default_compressed != bool(size & BSA_COMPRESSION_TOGGLE)
+        entries[f"{folder}\\{_decode(file_name)}"] = [offset, size & BSA_SIZE_MASK, int(compressed)]
+    return {
+        "format": "bsa",
+        "codec": CODEC_LZ4_FRAME if version == 105 else CODEC_ZLIB,
+        # the full path of every file is stored before its data
+        "embedded_names": version >= 104 and bool(archive_flags & BSA_EMBEDDED_NAMES),
+        "entries": entries,
+    }
+
+
+def _read_ba2(stream):
+    """Reads the entries of a Fallout 4 or Starfield ba2, general entries as name -> [[offset, packed size, size]] and
+    texture entries as name -> [[offset, packed size, size], ...], [width, height, mipmaps, dxgi format, cube map]."""
+    _magic, version, archive_type, num_files, name_table_offset = _unpack("<4sI4sIQ", stream)
+    codec = CODEC_ZLIB
+    if version in (2, 3):
+        stream.read(8)
+    if version == 3 and _unpack("<I", stream)[0] == 3:
+        codec = CODEC_LZ4_BLOCK
+
+    if archive_type == b"GNRL":
+        records = _iter_unpack("<I4sIIQIII", stream, num_files)
+        entry_list = [[[[offset, packed_size, size]]]
+                      for _name_hash, _ext, _dir_hash, _flags, offset, packed_size, size, _align in records]
+    elif archive_type == b"DX10":
+        entry_list = []
+        for _ in range(num_files):
+            (_name_hash, _ext, _dir_hash, _unknown, num_chunks, _chunk_header_size, height, width, num_mipmaps,
+             dxgi_format, cube_map, _tile_mode) = _unpack("<I4sIBBHHHBBBB", stream)
+            chunks = [[offset, packed_size, size] for offset, packed_size, size, _start_mip, _end_mip, _align
+                      in _iter_unpack("<QIIHHI", stream, num_chunks)]
+            entry_list.append([chunks, [width, height, num_mipmaps, dxgi_format, cube_map]])
+    else:
+        raise NifError(f"Unsupported ba2 type {archive_type}.")
+
+    stream.seek(name_table_offset)
+    entries = {}
+    for entry in entry_list:
+        entries[_decode(stream.read(_unpack("<H", stream)[0]))] = entry
+    return {"format": "ba2", "codec": codec, "entries": entries}
+
+
+def read_archive(archive_path):
+    """Reads the table of contents of an archive, without reading any of its files.
+
+    :param archive_path: The path of the bsa or ba2 file.
+    :type archive_path: str
+    :return: Dict with the format, how its files are compressed, and its entries by normalized name.
+    """
+    with open(archive_path, "rb") as stream:
+        magic = stream.read(4)
+        stream.seek(0)
+        if magic == b"\x00\x01\x00\x00":
+            return _read_tes3_bsa(stream)
+        elif magic == b"BSA\x00":
+            return _read_bsa(stream)
+        elif magic == b"BTDX":
+            return _read_ba2(stream)
+    raise NifError("Not a bsa or ba2 archive.")
+
+
+def _decompress(codec, data, size):
+    if codec == CODEC_ZLIB:
+        return zlib.decompress(data)
+    if lz4 is None:
+        raise NifError("The file is LZ4 compressed, which needs the lz4 module.")
+    if codec == CODEC_LZ4_FRAME:
+        return lz4.frame.decompress(data)
+    return lz4.block.decompress(data, uncompressed_size=size)
+
+
+def _dds_header(width, height, num_mipmaps, dxgi_format, cube_map):
+    """Returns the dds header for the texture data of a ba2 texture entry, a legacy header where one exists for its
+    format, so that older image loaders can read it."""
+    # header flags: caps, height, width, pixel format and mipmap count
+    flags = 0x1 | 0x2 | 0x4 | 0x1000 | 0x20000
+    # caps: texture, and complex and mipmap for mipmaps and cube maps
+    caps = 0x1000 | (0x400008 if num_mipmaps > 1 else 0) | (0x8 if cube_map else 0)
+    caps2 = 0xFE00 if cube_map else 0
+    dx10_header = b""
+    if dxgi_format in DXGI_BLOCK_FORMATS:
+        four_cc, block_size = DXGI_BLOCK_FORMATS[dxgi_format]
+        legacy = four_cc is not None
+        flags |= 0x80000
+        pitch = max(1, (width + 3) // 4) * max(1, (height + 3) // 4) * block_size
+        pixel_format = struct.pack("<2I4s5I", 32, 0x4, four_cc or b"DX10", 0, 0, 0, 0, 0)
+    elif dxgi_format in DXGI_PIXEL_FORMATS:
+        legacy = True
+        bits, red, green, blue, alpha = DXGI_PIXEL_FORMATS[dxgi_format]
+        flags |= 0x8
+        pitch = (width * bits + 7) // 8
+        # rgb or luminance, with alpha pixels where there is an alpha mask
+        pixel_flags = (0x40 if green else 0x20000) | (0x1 if alpha else 0)
+        pixel_format = struct.pack("<2I4s5I", 32, pixel_flags, b"\x00" * 4, bits, red, green, blue, alpha)
+    else:
+        legacy = False
+        pitch = 0
+        pixel_format = struct.pack("<2I4s5I", 32, 0x4, b"DX10", 0, 0, 0, 0, 0)
+    if not legacy:
+        # texture 2d resource, with the cube map flag
+        dx10_header = struct.pack("<5I", dxgi_format, 3, 0x4 if cube_map else 0, 1, 0)
+    header = struct.pack("<7I44x", 124, flags, height, width, pitch, 0, num_mipmaps)
+    return b"DDS " + header + pixel_format + struct.pack("<4I4x", caps, caps2, 0, 0) + dx10_header
+
+
+class Archive:
+    """The table of contents of a single archive, from which files are read on demand."""
+
+    def __init__(self, archive_path, record, extract_dir):
+        self.archive_path = archive_path
+        self.record = record
+        self.entries = record["entries"]
+        # where files are extracted to
+        self.extract_dir = extract_dir
+
+    def read(self, name):
+        """Returns the contents of a file in the archive.
+
+        :param name: The normalized name of the file.
+        :type name: str
+        :rtype: bytes
+        """
+        entry = self.entries[name]
+        archive_format = self.record["format"]
+        with open(self.archive_path, "rb") as stream:
+            if archive_format == "tes3":
+                offset, size = entry
+                stream.seek(offset)
+                return stream.read(size)
+            elif archive_format == "bsa":
+                offset, size, compressed = entry
+                stream.seek(offset)
+                data = stream.read(size)
+                if self.record["embedded_names"]:
+                    data = data[1 + data[0]:]
+                if compressed:
+                    data = _decompress(self.record["codec"], data[4:], struct.unpack("<I", data[:4])[0])
+                return data
+            # ba2 files are stored as chunks, only textures have more than one
+            chunks = []
+            for offset, packed_size, size in entry[0]:
+                stream.seek(offset)
+                if packed_size:
+                    chunks.append(_decompress(self.record["codec"], stream.read(packed_size), size))
+                else:
+                    chunks.append(stream.read(size))
+            if len(entry) > 1:
+                chunks.insert(0, _dds_header(*entry[1]))
+            return b"".join(chunks)
+
+
+class ArchiveLibrary:
+    """Finds files in a set of archives, and extracts them on demand into a cache directory.
+
+    The table of contents of every archive is read once, and kept in an on-disk index in the cache directory, keyed by
+    the archive's path, modification time and size. Extracted files are kept until the cache outgrows its size limit,
+    when the least recently used ones are removed. Files extracted or used in this session are never removed, as
+    Blender loads images lazily from their files.
+    """
+
+    def __init__(self):
+        self.cache_dir = None
+        self.max_cache_size = 0
+        # archives in load order, later archives override the files of earlier ones
+        self.archives = []
+        # normalized name -> archive
+        self.lookup = {}
+        # archive path -> (modification time, size, archive), kept across configurations
+        self._loaded = {}
+        # extracted file path -> size, least recently used first, listed on first use
+        self._cache_files = None
+        self._cache_size = 0
+        # extracted files handed out in this session
+        self._session_files = set()
+
+    def configure(self, archive_paths, cache_dir, max_cache_size):
+        """Sets the archives to search, and the cache directory to extract them to.
+
+        Unchanged archives are not read again, neither here nor in later sessions.
+
+        :param archive_paths: Archives or directories, whose archives are added in alphabetical order.
+        :type archive_paths: list(str)
+        :param cache_dir: The directory for the index and the extracted files.
+        :type cache_dir: str
+        :param max_cache_size: The size limit of the extracted files, in bytes.
+        :type max_cache_size: int
+        """
+        if cache_dir != self.cache_dir:
+            self._cache_files = None
+        self.cache_dir = cache_dir
+        self.max_cache_size = max_cache_size
+        self.archives = []
+        for archive_path in self._find_archives(archive_paths):
+            try:
+                self.archives.append(self._load_archive(archive_path))
+            except (NifError, OSError, ValueError, KeyError, struct.error) as e:
+                NifLog.warn(f"Skipping archive '{archive_path}': {e}")
+        self.lookup = {}
+        for archive in self.archives:
+            self.lookup.update(dict.fromkeys(archive.entries, archive))
+
+    @staticmethod
+    def _find_archives(archive_paths):
+        found = []
+        for path in archive_paths:
+            if os.path.isdir(path):
+                found.extend(os.path.join(path, file_name) for file_name in sorted(os.listdir(path), key=str.lower)
+                             if os.path.splitext(file_name)[1].lower() in ARCHIVE_EXTENSIONS)
+            elif os.path.isfile(path):
+                found.append(path)
+        return [os.path.abspath(path) for path in found]
+
+    @staticmethod
+    def _archive_key(*parts):
+        return hashlib.sha1("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()[:16]
+
+    def _load_archive(self, archive_path):
+        stat = os.stat(archive_path)
+        loaded = self._loaded.get(archive_path)
+        if loaded and loaded[:2] == (stat.st_mtime_ns, stat.st_size):
+            return loaded[2]
+
+        index_path = os.path.join(self.cache_dir, "index", self._archive_key(archive_path) + ".json")
+        record = None
+        if os.path.exists(index_path):
+            with open(index_path, encoding="utf-8") as index_file:
+                data = json.load(index_file)
+            if (data.get("index_version") == INDEX_VERSION and data.get("path") == archive_path
+                    and data.get("mtime") == stat.st_mtime_ns and data.get("size") == stat.st_size):
+                record = data["archive"]
+        if record is None:
+            NifLog.info(f"Indexing archive '{archive_path}'")
+            record = read_archive(archive_path)
+            os.makedirs(os.path.dirname(index_path), exist_ok=True)
+            temp_path = index_path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as index_file:
+                json.dump({"index_version": INDEX_VERSION, "path": archive_path, "mtime": stat.st_mtime_ns,
+                           "size": stat.st_size, "archive": record}, index_file, separators=(",", ":"))
+            os.replace(temp_path, index_path)
+
+        # extracted files of earlier versions of the archive are never used again, so they simply age out
+        extract_dir = os.path.join(self.cache_dir, "files",
+                                   self._archive_key(archive_path, stat.st_mtime_ns, stat.st_size))
+        archive = Archive(archive_path, record, extract_dir)
+        self._loaded[archive_path] = (stat.st_mtime_ns, stat.st_size, archive)
+        return archive
+
+    def find(self, name):
+        """Returns the archive which provides a file, or None if no archive has it."""
+        return self.lookup.get(normalize_name(name))
+
+    def extract(self, name):
+        """Returns the path of a file extracted from the archives, extracting it if it is not in the cache.
+
+        :param name: The path of the file relative to the data directory, such as textures\\sky\\stars.dds.
+        :type name: str
+        :return: The path of the extracted file, or None if no archive has it or it could not be read.
+        :rtype: str
+        """
+        name = normalize_name(name)
+        archive = self.lookup.get(name)
+        if archive is None:
+            return None
+        self._list_cache()
+        file_path = os.path.join(archive.extract_dir, *name.split("\\"))
+        if file_path in self._cache_files:
+            # most recently used, also for later sessions
+            self._cache_files.move_to_end(file_path)
+            try:
+                os.utime(file_path)
+                self._session_files.add(file_path)
+                return file_path
+            except OSError:
+                # removed behind our back
+                self._cache_size -= self._cache_files.pop(file_path)
+
+        try:
+            data = archive.read(name)
+        except (NifError, OSError, zlib.error, RuntimeError, struct.error) as e:
+            NifLog.warn(f"Could not extract '{name}' from '{archive.archive_path}': {e}")
+            return None
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        temp_path = file_path + ".tmp"
+        with open(temp_path, "wb") as extracted_file:
+            extracted_file.write(data)
+        os.replace(temp_path, file_path)
+        NifLog.debug(f"Extracted '{name}' from '{archive.archive_path}'")
+
+        self._cache_files[file_path] = len(data)
+        self._cache_size += len(data)
+        self._session_files.add(file_path)
+        self._evict()
+        return file_path
+
+    def _list_cache(self):
+        if self._cache_files is not None:
+            return
+        files = []
+        for directory, _dirnames, file_names in os.walk(os.path.join(self.cache_dir, "files")):
+            for file_name in file_names:
+                if file_name.endswith(".tmp"):
+                    # being extracted, or left over from an interrupted extraction
+                    continue
+                file_path = os.path.join(directory, file_name)
+                stat = os.stat(file_path)
+                files.append((stat.st_mtime_ns, file_path, stat.st_size))
+        files.sort()
+        self._cache_files = OrderedDict((file_path, size) for _mtime, file_path, size in files)
+        self._cache_size = sum(self._cache_files.values())
+
+    def _evict(self):
+        """Removes the least recently used files until the cache fits its size limit, except for those of this
+        session."""
+        for file_path in list(self._cache_files):
+            if self._cache_size <= self.max_cache_size:
+                break
+            if file_path in self._session_files:
+                continue
+            self._cache_size -= self._cache_files.pop(file_path)
+            try:
+                os.remove(file_path)
+            except OSError:
+                pass
+
+
+archive_library = ArchiveLibrary()
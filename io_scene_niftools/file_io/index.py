@@ -0,0 +1,243 @@
+"""This module contains a header-only scanner for nif files, and an on-disk index of the scanned headers."""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2026, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above
+#      copyright notice, this list of conditions and the following
+#      disclaimer in the documentation and/or other materials provided
+#      with the distribution.
+#
+#    * Neither the name of the NIF File Format Library and Tools
+#      project nor the names of its contributors may be used to endorse
+#      or promote products derived from this software without specific
+#      prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import json
+import os
+import struct
+
+import nifgen.formats.nif as NifFormat
+
+from io_scene_niftools.utils.logging import NifLog, NifError
+
+# bump when the stored header information changes, to rescan all files
+INDEX_VERSION = 1
+
+
+def _bs_stream_header(version, user_version):
+    """Whether a file of this version has a Bethesda stream header after the number of blocks."""
+    return (version == 0x0A000102
+            or ((version in (0x14020007, 0x14000005) or (0x0A010000 <= version <= 0x14000004 and user_version <= 11))
+                and user_version >= 3))
+
+
+class _HeaderReader:
+    """Reads the basic types of a nif header from a stream."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.endian = "<"
+
+    def read_array(self, fmt, count):
+        size = struct.calcsize(self.endian + fmt) * count
+        data = self.stream.read(size)
+        if len(data) != size:
+            raise NifError("Unexpected end of file in nif header.")
+        return list(struct.unpack(f"{self.endian}{count}{fmt}", data))
+
+    def read(self, fmt):
+        return self.read_array(fmt, 1)[0]
+
+    def read_string(self, length_fmt):
+        length = self.read(length_fmt)
+        data = self.stream.read(length)
+        if len(data) != length:
+            raise NifError("Unexpected end of file in nif header.")
+        return data.rstrip(b"\x00").decode("latin-1")
+
+
+def inspect_header(file_path):
+    """Reads the header of a nif file, without reading any of its blocks.
+
+    Roots are only listed for files with block sizes (20.2.0.5 and up), as they are stored after the blocks. Block
+    types are not stored in the header before 5.0.0.1, so they are None for such files.
+
+    :param file_path: The path of the nif file.
+    :type file_path: str
+    :return: Dict with the header string, version, user_version, bs_version, num_blocks, block_types (histogram of
+        block type names), strings and roots (list of block type and name of each root block).
+    """
+    with open(file_path, "rb") as nif_stream:
+        modification, (version, user_version, bs_version) = NifFormat.NifFile.inspect_version_only(nif_stream)
+        if version == -1:
+            raise NifError("Unsupported NIF version.")
+        elif version < 0:
+            raise NifError("Not a NIF file.")
+
+        nif_stream.seek(0)
+        reader = _HeaderReader(nif_stream)
+        header_string = nif_stream.readline(256).rstrip(b"\n").decode("latin-1")
+        num_blocks = 0
+        if version >= 0x03010001:
+            reader.read("I")
+        if version >= 0x14000003 and reader.read("B") == 0:
+            reader.endian = ">"
+        if version >= 0x0A000108:
+            reader.read("I")
+        if version >= 0x03010001:
+            num_blocks = reader.read("I")
+        if _bs_stream_header(version, user_version):
+            stream_bs_version = reader.read("I")
+            reader.read_string("B")
+            if stream_bs_version > 130:
+                reader.read("I")
+            if stream_bs_version < 131:
+                reader.read_string("B")
+            reader.read_string("B")
+            if stream_bs_version >= 103:
+                reader.read_string("B")
+
+        info = {
+            "header_string": header_string,
+            "version": version,
+            "user_version": user_version,
+            "bs_version": bs_version,
+            "num_blocks": num_blocks,
+            "block_types": None,
+            "strings": [],
+            "roots": None,
+        }
+        if version < 0x05000001:
+            return info
+
+        num_block_types = reader.read("H")
+        if version == 0x14030102:
+            block_type_names = [f"{block_hash:08x}" for block_hash in reader.read_array("I", num_block_types)]
+        else:
+            block_type_names = [reader.read_string("I") for _ in range(num_block_types)]
+        # the highest bit flags PhysX blocks
+        block_type_index = [index & 0x7FFF for index in reader.read_array("H", num_blocks)]
+        histogram = {}
+        for index in block_type_index:
+            block_type = block_type_names[index]
+            histogram[block_type] = histogram.get(block_type, 0) + 1
+        info["block_types"] = histogram
+
+        block_sizes = reader.read_array("I", num_blocks) if version >= 0x14020005 else None
+        if version >= 0x14010001:
+            num_strings = reader.read("I")
+            reader.read("I")
+            info["strings"] = [reader.read_string("I") for _ in range(num_strings)]
+        if version >= 0x05000006:
+            num_groups = reader.read("I")
+            reader.read_array("I", num_groups)
+
+        if block_sizes is not None:
+            # the footer lists the roots, right after the last block
+            block_offsets = [nif_stream.tell()]
+            for size in block_sizes:
+                block_offsets.append(block_offsets[-1] + size)
+            nif_stream.seek(block_offsets[-1])
+            roots = []
+            for root in reader.read_array("i", reader.read("I")):
+                if not 0 <= root < num_blocks:
+                    continue
+                # the name is the first field of every named block, as index in the string table
+                nif_stream.seek(block_offsets[root])
+                name_index = reader.read("i") if block_sizes[root] >= 4 else -1
+                name = info["strings"][name_index] if 0 <= name_index < len(info["strings"]) else None
+                roots.append({"type": block_type_names[block_type_index[root]], "name": name})
+            info["roots"] = roots
+    return info
+
+
+class NifIndex:
+    """An on-disk index of nif headers, keyed by path and modification time, so that rescanning a library only
+    inspects new and modified files."""
+
+    def __init__(self, index_path):
+        self.index_path = index_path
+        self.files = {}
+        if os.path.exists(index_path):
+            with open(index_path, encoding="utf-8") as index_file:
+                data = json.load(index_file)
+            if data.get("index_version") == INDEX_VERSION:
+                self.files = data["files"]
+
+    def save(self):
+        """Writes the index, replacing the previous file only once it is complete."""
+        temp_path = self.index_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as index_file:
+            json.dump({"index_version": INDEX_VERSION, "files": self.files}, index_file)
+        os.replace(temp_path, self.index_path)
+
+    def update(self, paths, extensions=(".nif", ".kf")):
+        """Inspects all new and modified files, and drops files that no longer exist.
+
+        :param paths: Files or directories, which are searched recursively.
+        :param extensions: The file extensions to index in directories.
+        :return: The number of inspected, unchanged and removed files.
+        """
+        found = {}
+        for path in paths:
+            if os.path.isdir(path):
+                for directory, dirnames, filenames in os.walk(path):
+                    for filename in filenames:
+                        if os.path.splitext(filename)[1].lower() in extensions:
+                            file_path = os.path.abspath(os.path.join(directory, filename))
+                            found[file_path] = os.stat(file_path)
+            else:
+                file_path = os.path.abspath(path)
+                found[file_path] = os.stat(file_path)
+
+        inspected = unchanged = 0
+        for file_path, stat in found.items():
+            entry = self.files.get(file_path)
+            if entry and entry["mtime"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+                unchanged += 1
+                continue
+            entry = {"mtime": stat.st_mtime_ns, "size": stat.st_size}
+            try:
+                entry["header"] = inspect_header(file_path)
+            except (NifError, OSError, UnicodeDecodeError, IndexError) as e:
+                entry["error"] = str(e)
+            self.files[file_path] = entry
+            inspected += 1
+
+        # only directories are fully known, so only drop files below them
+        roots = tuple(os.path.join(os.path.abspath(path), "") for path in paths if os.path.isdir(path))
+        removed = [file_path for file_path in self.files if file_path.startswith(roots) and file_path not in found]
+        for file_path in removed:
+            del self.files[file_path]
+        NifLog.info(f"Indexed {inspected} new or modified files, {unchanged} unchanged, {len(removed)} removed")
+        return inspected, unchanged, len(removed)
+
+    def get(self, file_path):
+        """Returns the header information of an indexed file, or None if it is not indexed or could not be read."""
+        entry = self.files.get(os.path.abspath(file_path))
+        return entry.get("header") if entry else None
@@ -0,0 +1,380 @@
+"""Reads the transform animations of kf files into plain arrays, optionally in a pool of worker processes."""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2026, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above
+#      copyright notice, this list of conditions and the following
+#      disclaimer in the documentation and/or other materials provided
+#      with the distribution.
+#
+#    * Neither the name of the NIF File Format Library and Tools
+#      project nor the names of its contributors may be used to endorse
+#      or promote products derived from this software without specific
+#      prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import spawn
+
+import numpy as np
+from nifgen.formats.nif import classes as NifClasses
+
+from io_scene_niftools.file_io.nif import NifFile
+from io_scene_niftools.utils.arrays import get_struct_array
+from io_scene_niftools.utils.consts import QUAT, EULER
+from io_scene_niftools.utils.logging import NifLog
+
+# the addon package needs Blender when it is imported, so worker processes register it as a plain package first, which
+# makes the Blender independent modules importable on their own
+_WORKER_INIT = """
+import sys, types
+package = types.ModuleType("io_scene_niftools")
+package.__path__ = [{package_dir!r}]
+sys.modules.setdefault("io_scene_niftools", package)
+"""
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def get_controller_data(ctrl):
+    """Return data for ctrl, look in interpolator (for newer games) or directly on ctrl"""
+    if hasattr(ctrl, 'interpolator') and ctrl.interpolator:
+        data = ctrl.interpolator.data
+    else:
+        data = ctrl.data
+    # these have their data set as a KeyGroup on data
+    if isinstance(data, (NifClasses.NiBoolData, NifClasses.NiFloatData, NifClasses.NiPosData)):
+        return data.data
+    return data
+
+
+def get_key_arrays(items, components=None):
+    """Returns arrays of the times and values of an array 'items' with key elements having 'time' and 'value'
+    attributes
+
+    :param items: The keys.
+    :param components: The attributes of the values if they are structs, None for plain values.
+    :type components: tuple(str)
+    :return: the times of shape (n,) and the values of shape (n,), or (n, len(components)) for struct values
+    :rtype: tuple(np.ndarray, np.ndarray)
+    """
+    times = get_struct_array(items, ('time',), float).reshape(-1)
+    if components is None:
+        values = get_struct_array(items, ('value',), float).reshape(-1)
+    else:
+        values = get_struct_array(items, tuple(f'value.{component}' for component in components), float)
+    return times, values
+
+
+def interpolate(x_out, x_in, y_in):
+    """
+    sample (x_in I y_in) at x coordinates x_out, extrapolating linearly from the first and last interval
+    """
+    x_out = np.asarray(x_out, dtype=float)
+    x_in = np.asarray(x_in, dtype=float)
+    y_in = np.asarray(y_in, dtype=float)
+    y_out = np.interp(x_out, x_in, y_in)
+    # if we had just one input, extrapolation is constant
+    if len(x_in) > 1:
+        before = x_out < x_in[0]
+        y_out[before] = y_in[0] + (y_in[1] - y_in[0]) / (x_in[1] - x_in[0]) * (x_out[before] - x_in[0])
+        after = x_out > x_in[-1]
+        y_out[after] = y_in[-1] + (y_in[-1] - y_in[-2]) / (x_in[-1] - x_in[-2]) * (x_out[after] - x_in[-1])
+    return y_out
+
+
+def get_key_times(roots):
+    """Returns the sorted, unique times of all transform, B-spline and UV keys below the roots."""
+    key_times = []
+    for root in roots:
+        for kfd in root.tree(block_type=NifClasses.NiKeyframeData):
+            key_times.extend(key.time for key in kfd.translations.keys)
+            key_times.extend(key.time for key in kfd.scales.keys)
+            key_times.extend(key.time for key in kfd.quaternion_keys)
+            for dimension in kfd.xyz_rotations:
+                key_times.extend(key.time for key in dimension.keys)
+
+        for kfi in root.tree(block_type=NifClasses.NiBSplineInterpolator):
+            if not kfi.basis_data:
+                # skip bsplines without basis data (eg bowidle.kf in Oblivion)
+                continue
+            key_times.extend(
+                point * (kfi.stop_time - kfi.start_time)
+                / (kfi.basis_data.num_control_points - 2)
+                for point in range(kfi.basis_data.num_control_points - 2))
+
+        for uv_data in root.tree(block_type=NifClasses.NiUVData):
+            for uv_group in uv_data.uv_groups:
+                key_times.extend(key.time for key in uv_group.keys)
+    return sorted(set(key_times))
+
+
+def get_text_keys(txk):
+    """Returns the text keys of a NiTextKeyExtraData as list of (time, text), or None if there is none."""
+    if txk:
+        return [(key.time, key.value) for key in txk.text_keys]
+    return None
+
+
+class KeyframeData:
+    """The keys of a transform controller or interpolator as arrays, which can be passed between processes.
+
+    The rotations, translations and scales are None, or a tuple of the key times of shape (n,), the keys of shape
+    (n, components) or (n,), and the nif interpolation type.
+    """
+
+    def __init__(self, kind):
+        # "keyframe", "bspline", or "unsupported" for controllers that are not imported
+        self.kind = kind
+        # the extrapolation flags of older controllers
+        self.flags = None
+        # QUAT or EULER
+        self.rotation_type = None
+        self.rotations = None
+        self.translations = None
+        self.scales = None
+
+
+def get_keyframe_data(n_kfc):
+    """Returns the keys of a keyframe controller or interpolator.
+
+    :param n_kfc: some nif struct that has keyframe data, somewhere
+    :rtype: KeyframeData
+    """
+    # B-spline curve import
+    if isinstance(n_kfc, NifClasses.NiBSplineInterpolator):
+        if isinstance(n_kfc, NifClasses.NiBSplineCompFloatInterpolator):
+            # used by WLP2 (tiger.kf), but only for non-LocRotScale data
+            # eg. bone stretching - see controlledblock.get_variable_1()
+            # do not support this for now, no good representation in Blender
+            # pyffi lacks support for this, but the following gets float keys
+            # keys = list(kfc._getCompKeys(kfc.offset, 1, kfc.bias, kfc.multiplier))
+            return KeyframeData("unsupported")
+        kf_data = KeyframeData("bspline")
+        # Bsplines are Bezier curves
+        times = np.array(list(n_kfc.get_times()), dtype=float)
+        kf_data.translations = (times, np.array(list(n_kfc.get_translations()), dtype=float), None)
+        kf_data.rotation_type = QUAT
+        kf_data.rotations = (times, np.array(list(n_kfc.get_rotations()), dtype=float), None)
+        kf_data.scales = (times, np.array(list(n_kfc.get_scales()), dtype=float), None)
+        return kf_data
+    elif isinstance(n_kfc, NifClasses.NiMultiTargetTransformController):
+        # not sure what this is used for
+        return KeyframeData("unsupported")
+    kf_data = KeyframeData("keyframe")
+    n_kfd = get_controller_data(n_kfc)
+    # ZT2 - get extrapolation for every kfc
+    if isinstance(n_kfc, NifClasses.NiKeyframeController):
+        kf_data.flags = int(n_kfc.flags)
+    if isinstance(n_kfd, NifClasses.NiKeyframeData):
+        if n_kfd.rotation_type == 4:
+            kf_data.rotation_type = EULER
+            # euler keys need not be sampled at the same time in KFs
+            # but we need complete key sets to do the space conversion
+            # so perform linear interpolation to import all keys properly
+
+            # get all the times and keys for each coordinate
+            times_keys = [get_key_arrays(euler.keys) for euler in n_kfd.xyz_rotations]
+            # the unique time stamps we have to sample all curves at
+            times_all = np.unique(np.concatenate([times for times, keys in times_keys]))
+            # todo - this assumes that all three channels are keyframed, but it seems like this need not be the case
+            # resample each coordinate for all times
+            keys_res = np.stack([interpolate(times_all, times, keys) for times, keys in times_keys], axis=1)
+            # for eulers, the actual interpolation type is apparently stored per channel
+            kf_data.rotations = (times_all, keys_res, n_kfd.xyz_rotations[0].interpolation)
+        else:
+            kf_data.rotation_type = QUAT
+            kf_data.rotations = (*get_key_arrays(n_kfd.quaternion_keys, ('w', 'x', 'y', 'z')), n_kfd.rotation_type)
+        kf_data.scales = (*get_key_arrays(n_kfd.scales.keys), n_kfd.scales.interpolation)
+        kf_data.translations = (*get_key_arrays(n_kfd.translations.keys, ('x', 'y', 'z')),
+                                n_kfd.translations.interpolation)
+    return kf_data
+
+
+class KfRootData:
+    """The animation of a kf root block, such as a NiControllerSequence, with the keys of each of its targets."""
+
+    def __init__(self, name, root_type):
+        self.name = name
+        self.root_type = root_type
+        # (node name, KeyframeData) of each controlled node, None if the root type is not supported
+        self.controllers = None
+        # (time, text) of each text key, or None
+        self.text_keys = None
+        # the global extrapolation mode of newer kf roots
+        self.cycle_type = None
+
+
+def get_kf_root_data(kf_root):
+    """Returns the animation of a kf root block.
+
+    :rtype: KfRootData
+    """
+    root_data = KfRootData(kf_root.name, type(kf_root).__name__)
+    if isinstance(kf_root, NifClasses.NiControllerSequence):
+        root_data.controllers = []
+        for controlledblock in kf_root.controlled_blocks:
+            # get bone name
+            # todo [pyffi] fixed get_node_name() is up, make release and clean up here
+            # ZT2 - old way is not supported by pyffi's get_node_name()
+            n_name = controlledblock.target_name
+            # fallout (node_name) & Loki (StringPalette)
+            if not n_name:
+                n_name = controlledblock.get_node_name()
+            # todo - temporarily disabled! should become a custom property on both object and pose bone, ideally
+            # import bone priority
+            # b_target.niftools.priority = controlledblock.priority
+            # fallout, Loki
+            kfc = controlledblock.interpolator
+            if not kfc:
+                # ZT2
+                kfc = controlledblock.controller
+            if kfc:
+                root_data.controllers.append((n_name, get_keyframe_data(kfc)))
+        root_data.text_keys = get_text_keys(kf_root.text_keys)
+        root_data.cycle_type = kf_root.cycle_type
+    elif isinstance(kf_root, NifClasses.NiSequenceStreamHelper):
+        root_data.controllers = []
+        # import parallel trees of extra datas and keyframe controllers
+        extra = kf_root.extra_data
+        controller = kf_root.controller
+        textkeys = None
+        while extra and controller:
+            # textkeys in the stack do not specify node names, import as markers
+            while isinstance(extra, NifClasses.NiTextKeyExtraData):
+                textkeys = extra
+                extra = extra.next_extra_data
+
+            # grabe the node name from string data
+            if isinstance(extra, NifClasses.NiStringExtraData):
+                root_data.controllers.append((extra.string_data, get_keyframe_data(controller)))
+            # grab next pair of extra and controller
+            extra = extra.next_extra_data
+            controller = controller.next_controller
+        root_data.text_keys = get_text_keys(textkeys)
+    elif isinstance(kf_root, NifClasses.NiSequenceData):
+        root_data.controllers = [(evaluator.node_name, get_keyframe_data(evaluator))
+                                 for evaluator in kf_root.evaluators]
+        root_data.text_keys = get_text_keys(kf_root.find(block_type=NifClasses.NiTextKeyExtraData))
+        root_data.cycle_type = kf_root.cycle_type
+    return root_data
+
+
+class KfData:
+    """The animation of a kf file, read and scaled."""
+
+    def __init__(self, file_path, key_times, roots):
+        self.file_path = file_path
+        # the sorted, unique key times, to estimate the frames per second
+        self.key_times = key_times
+        # KfRootData of each root
+        self.roots = roots
+
+
+def read_kf(file_path, scale_correction):
+    """Reads a kf file, scales it, and returns its animation.
+
+    :param file_path: The path of the kf file.
+    :type file_path: str
+    :param scale_correction: The scale to apply to the data.
+    :type scale_correction: float
+    :rtype: KfData
+    """
+    kfdata = NifFile.load_nif(file_path)
+    NifFile.apply_scale(kfdata, scale_correction)
+    return KfData(file_path, get_key_times(kfdata.roots), [get_kf_root_data(kf_root) for kf_root in kfdata.roots])
+
+
+def get_python_executable():
+    """Returns the Python interpreter to run worker processes with, or None if it cannot be found.
+
+    Blender before 2.91 reports its own binary as sys.executable, so then the interpreter is looked up in the Python
+    installation.
+    """
+    if os.path.basename(sys.executable).lower().startswith("python"):
+        return sys.executable
+    version = f"{sys.version_info.major}.{sys.version_info.minor}"
+    for name in (f"python{version}", f"python{sys.version_info.major}", "python.exe"):
+        executable = os.path.join(sys.prefix, "bin", name)
+        if os.path.isfile(executable):
+            return executable
+    return None
+
+
+def read_kf_files(file_paths, scale_correction, max_workers=0):
+    """Reads kf files, in a pool of worker processes if there are several, and yields their animations in order.
+
+    The files are read independently, so the results are the same as when reading them one after another.
+
+    :param file_paths: The paths of the kf files.
+    :type file_paths: list(str)
+    :param scale_correction: The scale to apply to the data.
+    :type scale_correction: float
+    :param max_workers: The maximum number of worker processes, 0 for one per CPU, 1 to read all files in this process.
+    :type max_workers: int
+    :rtype: iterator(KfData)
+    """
+    num_workers = min(len(file_paths), max_workers or os.cpu_count() or 1)
+    executable = get_python_executable() if num_workers > 1 else None
+    if executable is None:
+        for file_path in file_paths:
+            yield read_kf(file_path, scale_correction)
+        return
+
+    NifLog.info(f"Reading {len(file_paths)} files in {num_workers} processes")
+    # spawn rather than fork, as forking Blender with its threads is unsafe
+    context = multiprocessing.get_context("spawn")
+    # the executable is shared by all spawn contexts of the Blender process, so restore it for other add-ons
+    previous_executable = spawn.get_executable()
+    context.set_executable(executable)
+    try:
+        executor = ProcessPoolExecutor(num_workers, mp_context=context, initializer=exec,
+                                       initargs=(_WORKER_INIT.format(package_dir=PACKAGE_DIR), {}))
+        # spawned pools start their workers on submit, so all of them are running after this
+        futures = [executor.submit(read_kf, file_path, scale_correction) for file_path in file_paths]
+    finally:
+        context.set_executable(previous_executable)
+    try:
+        for index, future in enumerate(futures):
+            try:
+                kf_data = future.result()
+            except BrokenProcessPool:
+                # the workers could not be started in this environment
+                NifLog.warn("Reading kf files in parallel failed, reading them one after another")
+                for file_path in file_paths[index:]:
+                    yield read_kf(file_path, scale_correction)
+                return
+            yield kf_data
+    finally:
+        # also stop reading if the caller gives up early
+        for future in futures:
+            future.cancel()
+        executor.shutdown()
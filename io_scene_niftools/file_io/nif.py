@@ -40,6 +40,8 @@
 import os.path as path
 
 import nifgen.formats.nif as NifFormat
+from nifgen.spells.nif import NifToaster
+from nifgen.spells.nif.fix import SpellScale
 
 from io_scene_niftools.utils.logging import NifLog, NifError
 
@@ -69,3 +71,11 @@ class NifFile:
                 raise NifError("Not a NIF file.")
 
         return data
+
+    @staticmethod
+    def apply_scale(data, scale):
+        """Scales all blocks of the nif data in place"""
+        NifLog.info(f"Scale Correction set to {scale}")
+        toaster = NifToaster()
+        toaster.scale = scale
+        SpellScale(data=data, toaster=toaster).recurse()
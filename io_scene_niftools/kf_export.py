@@ -37,10 +37,14 @@
 #
 # ***** END LICENSE BLOCK *****
 
+import io
 import os
+from concurrent.futures import ThreadPoolExecutor
+
 import bpy
 
 from io_scene_niftools.modules.nif_export.animation.transform import TransformAnimation
+from io_scene_niftools.modules.nif_export.block_registry import block_store
 from io_scene_niftools.nif_common import NifCommon
 from io_scene_niftools.utils import math
 from io_scene_niftools.utils.singleton import NifOp, NifData
@@ -78,13 +82,61 @@ class KfExport(NifCommon):
         if b_armature:
             math.set_bone_orientation(b_armature.data.niftools.axis_forward, b_armature.data.niftools.axis_up)
 
-        NifLog.info("Creating keyframe tree")
-        kf_root = self.transform_anim.export_kf_root(b_armature)
+        if NifOp.props.batch_export:
+            self.export_actions(b_armature, data, directory, prefix)
+        else:
+            NifLog.info("Creating keyframe tree")
+            kf_root = self.transform_anim.export_kf_root(b_armature)
+
+            # write kf (and xkf if asked)
+            ext = ".kf"
+            NifLog.info(f"Writing {prefix}{ext} file")
+            self.prepare_kf(data, kf_root)
+
+            kffile = os.path.join(directory, prefix + filebase + ext)
+            with open(kffile, "wb") as stream:
+                data.write(stream)
 
-        # write kf (and xkf if asked)
-        ext = ".kf"
-        NifLog.info(f"Writing {prefix}{ext} file")
+        NifLog.info("Finished successfully")
+        return {'FINISHED'}
 
+    def export_actions(self, b_armature, data, directory, prefix):
+        """Exports each action of the armature that matches the action filter to its own kf file, named after the
+        action. The actions are exported without assigning them to the armature, and the files are written by a pool of
+        threads while the next action is exported."""
+        if not b_armature:
+            raise NifError("Exporting all actions requires an armature.")
+        b_actions = self.transform_anim.get_armature_actions(b_armature, NifOp.props.action_filter)
+        if not b_actions:
+            raise NifError(f"No actions matching '{NifOp.props.action_filter}' animate armature {b_armature.name}.")
+        NifLog.info(f"Exporting {len(b_actions)} actions")
+        # distinct action names may map to the same file name, also on case insensitive file systems
+        kf_files = {}
+        for b_action in b_actions:
+            kffile = os.path.join(directory, prefix + bpy.path.clean_name(b_action.name) + ".kf")
+            if kffile.lower() in kf_files:
+                raise NifError(f"Actions '{kf_files[kffile.lower()][1].name}' and '{b_action.name}' would both be "
+                               f"exported to {kffile}, please rename one of them.")
+            kf_files[kffile.lower()] = (kffile, b_action)
+
+        with ThreadPoolExecutor(NifOp.props.max_workers or os.cpu_count() or 1) as executor:
+            futures = []
+            for kffile, b_action in kf_files.values():
+                NifLog.info(f"Creating keyframe tree for {b_action.name}")
+                # every kf holds only its own blocks
+                block_store.block_to_obj = {}
+                kf_root = self.transform_anim.export_kf_root(b_armature, b_action)
+                self.prepare_kf(data, kf_root)
+                # the nif data is serialized here, only the file writes are left to the threads
+                stream = io.BytesIO()
+                data.write(stream)
+                NifLog.info(f"Writing {kffile}")
+                futures.append(executor.submit(self.write_file, kffile, stream.getvalue()))
+            for future in futures:
+                future.result()
+
+    def prepare_kf(self, data, kf_root):
+        """Sets the root of the kf data and scales it for writing"""
         data.roots = [kf_root]
         data.neosteam = (bpy.context.scene.niftools_scene.game == 'NEOSTEAM')
 
@@ -93,10 +145,7 @@ class KfExport(NifCommon):
 
         data.validate()
 
-        kffile = os.path.join(directory, prefix + filebase + ext)
-        with open(kffile, "wb") as stream:
-            data.write(stream)
-
-        NifLog.info("Finished successfully")
-        return {'FINISHED'}
-
+    @staticmethod
+    def write_file(file_path, file_bytes):
+        with open(file_path, "wb") as stream:
+            stream.write(file_bytes)
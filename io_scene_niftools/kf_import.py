@@ -39,7 +39,7 @@
 
 import os
 
-from io_scene_niftools.file_io.nif import NifFile as KFFile
+from io_scene_niftools.file_io.kf import read_kf_files
 from io_scene_niftools.modules.nif_import.animation.transform import TransformAnimation
 from io_scene_niftools.nif_common import NifCommon
 from io_scene_niftools.utils import math
@@ -68,15 +68,12 @@ class KfImport(NifCommon):
                 math.set_bone_orientation(b_armature.data.niftools.axis_forward, b_armature.data.niftools.axis_up)
                 # get nif space bind pose of armature here for all anims
                 self.transform_anim.get_bind_data(b_armature)
-            for kf_file in kf_files:
-                kfdata = KFFile.load_nif(kf_file)
-
-                self.apply_scale(kfdata, NifOp.props.scale_correction)
-
+            # files are read and scaled by worker processes, only the actions are created here
+            for kf_data in read_kf_files(kf_files, NifOp.props.scale_correction, NifOp.props.max_workers):
                 # calculate and set frames per second
-                self.transform_anim.set_frames_per_second(kfdata.roots)
-                for kf_root in kfdata.roots:
-                    self.transform_anim.import_kf_root(kf_root, b_armature)
+                self.transform_anim.set_frames_per_second_from_times(kf_data.key_times)
+                for root_data in kf_data.roots:
+                    self.transform_anim.import_kf_root_data(root_data, b_armature)
 
         except NifError:
             return {'CANCELLED'}
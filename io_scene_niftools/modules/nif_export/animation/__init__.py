@@ -39,6 +39,7 @@
 from abc import ABC
 
 import bpy
+import numpy as np
 from nifgen.formats.nif import classes as NifClasses
 
 from io_scene_niftools.modules.nif_export.block_registry import block_store
@@ -66,6 +67,26 @@ class Animation(ABC):
         kfc.start_time = start_frame / self.fps
         kfc.stop_time = stop_frame / self.fps
 
+    @staticmethod
+    def get_frame_keys(fcurves):
+        """
+        Returns the frames and keys of all fcurves as arrays.
+        Assumes the fcurves are sampled at the same time and all have the same amount of keys
+        Return the frames of shape (num_keys,), and the keys of shape (num_keys, len(fcurves))
+        """
+        if not fcurves:
+            return np.zeros(0), np.zeros((0, 0))
+        num_keys = min(len(fcu.keyframe_points) for fcu in fcurves)
+        keys = np.empty((num_keys, len(fcurves)))
+        for i, fcu in enumerate(fcurves):
+            co = np.empty(2 * len(fcu.keyframe_points), dtype=np.float32)
+            fcu.keyframe_points.foreach_get("co", co)
+            co = co.reshape((-1, 2))[:num_keys]
+            if i == 0:
+                frames = co[:, 0].astype(float)
+            keys[:, i] = co[:, 1]
+        return frames, keys
+
     @staticmethod
     def get_flags_from_fcurves(fcurves):
         # see if there are cyclic extrapolation modifiers on exp_fcurves
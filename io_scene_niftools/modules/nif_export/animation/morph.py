@@ -37,6 +37,7 @@
 #
 # ***** END LICENSE BLOCK *****
 
+import numpy as np
 from nifgen.formats.nif import classes as NifClasses
 from pyffi.formats.egm import EgmFormat
 
@@ -44,6 +45,7 @@ from io_scene_niftools.modules.nif_export.animation import Animation
 from io_scene_niftools.utils.singleton import EGMData
 
 from io_scene_niftools.modules.nif_export.block_registry import block_store
+from io_scene_niftools.utils.arrays import set_struct_array
 from io_scene_niftools.utils.singleton import NifOp
 from io_scene_niftools.utils.logging import NifLog
 
@@ -54,7 +56,7 @@ class MorphAnimation(Animation):
         super().__init__()
         EGMData.data = None
 
-    def export_morph(self, b_mesh, n_trishape, vertmap):
+    def export_morph(self, b_mesh, n_trishape, v_nif_to_blend):
         NifLog.debug(f"Checking {b_mesh.name} for shape keys")
         # shape keys are only present on non-evaluated meshes!
         b_key = b_mesh.shape_keys
@@ -66,11 +68,23 @@ class MorphAnimation(Animation):
                 # egm export!
                 self.export_egm(b_key.key_blocks)
             elif b_key.animation_data:
-                self.export_morph_animation(b_mesh, b_key, n_trishape, vertmap)
+                self.export_morph_animation(b_mesh, b_key, n_trishape, v_nif_to_blend)
+
+    @staticmethod
+    def get_key_block_vertices(key_blocks):
+        """Returns the vertex positions of all shape keys, as array of shape (num_keys, num_vertices, 3)."""
+        num_verts = len(key_blocks[0].data)
+        key_verts = np.empty((len(key_blocks), num_verts * 3), dtype=np.float32)
+        for key_block, key_block_verts in zip(key_blocks, key_verts):
+            key_block.data.foreach_get("co", key_block_verts)
+        return key_verts.reshape((len(key_blocks), num_verts, 3))
 
     def export_egm(self, key_blocks):
         EGMData.data = EgmFormat.Data(num_vertices=len(key_blocks[0].data))
-        for key_block in key_blocks:
+        # note: key_blocks[0] is base b_key
+        key_verts = self.get_key_block_vertices(key_blocks)
+        relative_vertices = key_verts - key_verts[0]
+        for key_block, key_block_relative_vertices in zip(key_blocks, relative_vertices):
             if key_block.name.startswith("EGM SYM"):
                 morph = EGMData.data.add_sym_morph()
             elif key_block.name.startswith("EGM ASYM"):
@@ -78,15 +92,10 @@ class MorphAnimation(Animation):
             else:
                 continue
             NifLog.info(f"Exporting morph {key_block.name} to egm")
-            relative_vertices = []
+            morph.set_relative_vertices(key_block_relative_vertices.tolist())
 
-            # note: key_blocks[0] is base b_key
-            for base_vert, key_vert in zip(key_blocks[0].data, key_block.data):
-                relative_vertices.append(key_vert.co - base_vert.co)
-            morph.set_relative_vertices(relative_vertices)
+    def export_morph_animation(self, b_mesh, b_key, n_trishape, v_nif_to_blend):
 
-    def export_morph_animation(self, b_mesh, b_key, n_trishape, vertmap):
-        
         # regular morph_data export
         b_shape_action = self.get_active_action(b_key)
         
@@ -113,6 +122,18 @@ class MorphAnimation(Animation):
         # TODO [morph] just guessing here, data seems to be zero always
         morph_ctrl.num_unknown_ints = len(b_key.key_blocks)
         morph_ctrl.reset_field("unknown_ints")
+
+        # make the consecutive keys relative to the base mesh
+        key_verts = self.get_key_block_vertices(b_key.key_blocks)
+        mesh_verts = np.empty(len(b_mesh.vertices) * 3, dtype=np.float32)
+        b_mesh.vertices.foreach_get("co", mesh_verts)
+        key_verts[1:] -= mesh_verts.reshape((-1, 3))
+        # fan out to the nif vertices of each blender vertex, those without a key vertex are left at zero
+        v_nif_to_blend = np.asarray(v_nif_to_blend, dtype=int)
+        mapped = v_nif_to_blend < key_verts.shape[1]
+        morph_vectors = np.zeros((len(key_verts), len(v_nif_to_blend), 3), dtype=np.float32)
+        morph_vectors[:, mapped] = key_verts[:, v_nif_to_blend[mapped]]
+
         for key_block_num, key_block in enumerate(b_key.key_blocks):
             # export morphed vertices
             n_morph = morph_data.morphs[key_block_num]
@@ -120,22 +141,7 @@ class MorphAnimation(Animation):
             NifLog.info(f"Exporting n_morph {key_block.name}: vertices")
             n_morph.arg = morph_data.num_vertices
             n_morph.reset_field("vectors")
-            for b_v_index, (n_v_indices, b_vert) in enumerate(list(zip(vertmap, key_block.data))):
-                # see if this b_vert is used in the nif
-                if not n_v_indices:
-                    continue
-                # copy blender shapekey vertex
-                mv = b_vert.co.copy()
-                # make the consecutive keys relative to base shapekey
-                if key_block_num > 0:
-                    mv.x -= b_mesh.vertices[b_v_index].co.x
-                    mv.y -= b_mesh.vertices[b_v_index].co.y
-                    mv.z -= b_mesh.vertices[b_v_index].co.z
-                # update nif morph vectors
-                for n_v_index in n_v_indices:
-                    n_morph.vectors[n_v_index].x = mv.x
-                    n_morph.vectors[n_v_index].y = mv.y
-                    n_morph.vectors[n_v_index].z = mv.z
+            set_struct_array(n_morph.vectors, morph_vectors[key_block_num], ('x', 'y', 'z'))
 
             # create interpolator for shape b_key (needs to be there even if there is no fcu)
             interpol = block_store.create_block("NiFloatInterpolator")
@@ -159,19 +165,12 @@ class MorphAnimation(Animation):
             NifLog.info(f"Exporting n_morph {key_block.name}: fcu")
             interpol.data = block_store.create_block("NiFloatData", fcu)
             n_floatdata = interpol.data.data
+            frames, values = self.get_frame_keys([fcu])
             # note: we set data on n_morph for older nifs and on floatdata for newer nifs
             # of course only one of these will be actually written to the file
             for n_data in (n_morph, n_floatdata):
+                # the keys take their type from the interpolation
                 n_data.interpolation = NifClasses.KeyType.LINEAR_KEY
-                n_data.num_keys = len(fcurves[0].keyframe_points)
+                n_data.num_keys = len(frames)
                 n_data.reset_field("keys")
-
-            for i, b_keyframe in enumerate(fcurves[0].keyframe_points):
-                frame, value = b_keyframe.co
-                t = frame / self.fps
-                for n_data in (n_morph, n_floatdata):
-                    n_data.keys[i].arg = n_morph.interpolation
-                    n_data.keys[i].time = t
-                    n_data.keys[i].value = value
-                    # n_data.keys[i].forwardTangent = 0.0 # ?
-                    # n_data.keys[i].backwardTangent = 0.0 # ?
+                set_struct_array(n_data.keys, np.column_stack((frames / self.fps, values)), ('time', 'value'))
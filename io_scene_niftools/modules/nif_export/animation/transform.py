@@ -37,14 +37,17 @@
 #
 # ***** END LICENSE BLOCK *****
 
+from fnmatch import fnmatchcase
+
 import bpy
-import mathutils
+import numpy as np
 
 from nifgen.formats.nif import classes as NifClasses
 
 from io_scene_niftools.modules.nif_export.animation import Animation
 from io_scene_niftools.modules.nif_export.block_registry import block_store
 from io_scene_niftools.utils import math, consts
+from io_scene_niftools.utils.arrays import set_struct_array
 from io_scene_niftools.utils.logging import NifError, NifLog
 from io_scene_niftools.utils.consts import QUAT, EULER, LOC, SCALE
 
@@ -53,21 +56,44 @@ class TransformAnimation(Animation):
 
     def __init__(self):
         super().__init__()
+        # decomposed bind pose per (armature name, bone name), computed once for all exported actions
+        self.bind_data = {}
 
-    @staticmethod
-    def iter_frame_key(fcurves, mathutilclass):
+    def get_bone_bind(self, b_armature, b_bone):
+        """Returns the scale, rotation and translation of the nif space bind pose of a bone, computing it only once per
+        armature and bone.
+
+        :param b_armature: The armature the bone belongs to.
+        :param b_bone: The bone.
+        :type b_bone: bpy.types.Bone
+        :rtype: tuple(float, mathutils.Matrix, mathutils.Vector)
         """
-        Iterator that yields a tuple of frame and key for all fcurves.
-        Assumes the fcurves are sampled at the same time and all have the same amount of keys
-        Return the key in the desired MathutilsClass
+        key = (b_armature.name, b_bone.name)
+        if key not in self.bind_data:
+            self.bind_data[key] = math.decompose_srt(math.get_object_bind(b_bone))
+        return self.bind_data[key]
+
+    @staticmethod
+    def get_armature_actions(b_armature, pattern="*"):
+        """Returns the actions that animate bones of an armature and whose name matches a pattern.
+
+        :param b_armature: The armature.
+        :param pattern: Shell style pattern for the action names, case insensitive.
+        :type pattern: str
+        :rtype: list(bpy.types.Action)
         """
-        for point in zip(*[fcu.keyframe_points for fcu in fcurves]):
-            frame = point[0].co[0]
-            key = [k.co[1] for k in point]
-            yield frame, mathutilclass(key)
+        bone_names = set(b_armature.data.bones.keys())
+        return [b_action for b_action in bpy.data.actions
+                if b_action.fcurves and fnmatchcase(b_action.name.lower(), pattern.lower())
+                and any(group.name in bone_names for group in b_action.groups)]
 
-    def export_kf_root(self, b_armature=None):
-        """Creates and returns a KF root block and exports controllers for objects and bones"""
+    def export_kf_root(self, b_armature=None, b_action=None):
+        """Creates and returns a KF root block and exports controllers for objects and bones
+
+        :param b_armature: The armature whose bones are animated, or None to export the active actions of all objects.
+        :param b_action: The action of the armature to export, by default its active action. It need not be assigned to
+            the armature.
+        """
         scene = bpy.context.scene
         nif_scene = scene.niftools_scene
         game = nif_scene.game
@@ -82,10 +108,13 @@ class TransformAnimation(Animation):
 
         anim_textextra = self.create_text_keys(kf_root)
         targetname = "Scene Root"
+        # an action that is exported on its own uses its own frame range rather than that of the scene
+        use_action_range = b_action is not None
 
         # per-node animation
         if b_armature:
-            b_action = self.get_active_action(b_armature)
+            if not b_action:
+                b_action = self.get_active_action(b_armature)
             for b_bone in b_armature.data.bones:
                 self.export_transforms(kf_root, b_armature, b_action, b_bone)
             if nif_scene.is_skyrim():
@@ -116,6 +145,10 @@ class TransformAnimation(Animation):
         if anim_textextra.num_text_keys > 0:
             kf_root.start_time = anim_textextra.text_keys[0].time
             kf_root.stop_time = anim_textextra.text_keys[anim_textextra.num_text_keys - 1].time
+        elif use_action_range:
+            start_frame, stop_frame = b_action.frame_range
+            kf_root.start_time = start_frame / self.fps
+            kf_root.stop_time = stop_frame / self.fps
         else:
             kf_root.start_time = scene.frame_start / self.fps
             kf_root.stop_time = scene.frame_end / self.fps
@@ -144,8 +177,8 @@ class TransformAnimation(Animation):
 
         # skeletal animation - with bone correction & coordinate corrections
         if bone and bone.name in b_action.groups:
-            # get bind matrix for bone
-            bind_matrix = math.get_object_bind(bone)
+            # get bind pose for bone
+            bind_scale, bind_rot, bind_trans = self.get_bone_bind(b_obj, bone)
             exp_fcurves = b_action.groups[bone.name].channels
             # just for more detailed error reporting later on
             bonestr = f" in bone {bone.name}"
@@ -168,7 +201,7 @@ class TransformAnimation(Animation):
             # objects may have an offset from their parent that is not apparent in the user input (ie. UI values and keyframes)
             # we want to export matrix_local, and the keyframes are in matrix_basis, so do:
             # matrix_local = matrix_parent_inverse * matrix_basis
-            bind_matrix = b_obj.matrix_parent_inverse
+            bind_scale, bind_rot, bind_trans = math.decompose_srt(b_obj.matrix_parent_inverse)
             exp_fcurves = [fcu for fcu in b_action.fcurves if
                            fcu.data_path in (QUAT, EULER, LOC, SCALE)]
 
@@ -176,8 +209,6 @@ class TransformAnimation(Animation):
             # bone isn't keyframed in this action, nothing to do here
             return
 
-        # decompose the bind matrix
-        bind_scale, bind_rot, bind_trans = math.decompose_srt(bind_matrix)
         n_kfc, n_kfi = self.create_controller(parent_block, target_name, priority)
 
         # fill in the non-trivial values
@@ -197,28 +228,29 @@ class TransformAnimation(Animation):
                     f"Incomplete key set {bonestr} for action {b_action.name}."
                     f"Ensure that if a bone is keyframed for a property, all channels are keyframed.")
 
-        # go over all fcurves collected above and transform and store all their keys
-        quat_curve = []
-        euler_curve = []
-        trans_curve = []
-        scale_curve = []
-        for frame, quat in self.iter_frame_key(quaternions, mathutils.Quaternion):
-            quat = math.export_keymat(bind_rot, quat.to_matrix().to_4x4(), bone).to_quaternion()
-            quat_curve.append((frame, quat))
-
-        for frame, euler in self.iter_frame_key(eulers, mathutils.Euler):
-            keymat = math.export_keymat(bind_rot, euler.to_matrix().to_4x4(), bone)
-            euler = keymat.to_euler("XYZ", euler)
-            euler_curve.append((frame, euler))
-
-        for frame, trans in self.iter_frame_key(translations, mathutils.Vector):
-            keymat = math.export_keymat(bind_rot, mathutils.Matrix.Translation(trans), bone)
-            trans = keymat.to_translation() + bind_trans
-            trans_curve.append((frame, trans))
-
-        for frame, scale in self.iter_frame_key(scales, mathutils.Vector):
+        # go over all fcurves collected above and transform and store all their keys, as arrays of keys per type
+        quat_frames, quats = self.get_frame_keys(quaternions)
+        if len(quat_frames):
+            key_matrices = np.tile(np.identity(4), (len(quats), 1, 1))
+            key_matrices[:, :3, :3] = math.quats_to_matrices(quats)
+            quats = math.matrices_to_quats(math.export_keymats(bind_rot, key_matrices, bone))
+
+        euler_frames, eulers = self.get_frame_keys(eulers)
+        if len(euler_frames):
+            key_matrices = np.tile(np.identity(4), (len(eulers), 1, 1))
+            key_matrices[:, :3, :3] = math.eulers_to_matrices(eulers)
+            eulers = math.matrices_to_eulers(math.export_keymats(bind_rot, key_matrices, bone), eulers)
+
+        trans_frames, translations = self.get_frame_keys(translations)
+        if len(trans_frames):
+            key_matrices = np.tile(np.identity(4), (len(translations), 1, 1))
+            key_matrices[:, :3, 3] = translations
+            translations = math.export_keymats(bind_rot, key_matrices, bone)[:, :3, 3] + np.array(bind_trans)
+
+        scale_frames, scales = self.get_frame_keys(scales)
+        if len(scale_frames):
             # just use the first scale curve and assume even scale over all curves
-            scale_curve.append((frame, scale[0]))
+            scales = scales[:, 0]
 
         if n_kfi:
             # set the default transforms of the interpolator as the bone's bind pose
@@ -226,7 +258,7 @@ class TransformAnimation(Animation):
             n_kfi.transform.rotation.w, n_kfi.transform.rotation.x, n_kfi.transform.rotation.y, n_kfi.transform.rotation.z = bind_rot.to_quaternion()
             n_kfi.transform.scale = bind_scale
 
-            if max(len(c) for c in (quat_curve, euler_curve, trans_curve, scale_curve)) > 0:
+            if max(len(frames) for frames in (quat_frames, euler_frames, trans_frames, scale_frames)) > 0:
                 # number of frames is > 0, so add transform data
                 n_kfd = block_store.create_block("NiTransformData", exp_fcurves)
                 n_kfi.data = n_kfd
@@ -243,41 +275,32 @@ class TransformAnimation(Animation):
         #                  probably requires additional data like tangents and stuff
 
         # finally we can export the data calculated above
-        if euler_curve:
+        if len(euler_frames):
             n_kfd.rotation_type = NifClasses.KeyType.XYZ_ROTATION_KEY
             n_kfd.num_rotation_keys = 1  # *NOT* len(frames) this crashes the engine!
             n_kfd.reset_field("xyz_rotations")
             for i, coord in enumerate(n_kfd.xyz_rotations):
-                coord.num_keys = len(euler_curve)
+                coord.num_keys = len(euler_frames)
                 coord.interpolation = NifClasses.KeyType.LINEAR_KEY
                 coord.reset_field("keys")
-                for key, (frame, euler) in zip(coord.keys, euler_curve):
-                    key.time = frame / self.fps
-                    key.value = euler[i]
-        elif quat_curve:
+                set_struct_array(coord.keys, np.stack((euler_frames / self.fps, eulers[:, i]), axis=1), ('time', 'value'))
+        elif len(quat_frames):
             n_kfd.rotation_type = NifClasses.KeyType.QUADRATIC_KEY
-            n_kfd.num_rotation_keys = len(quat_curve)
+            n_kfd.num_rotation_keys = len(quat_frames)
             n_kfd.reset_field("quaternion_keys")
-            for key, (frame, quat) in zip(n_kfd.quaternion_keys, quat_curve):
-                key.time = frame / self.fps
-                key.value.w = quat.w
-                key.value.x = quat.x
-                key.value.y = quat.y
-                key.value.z = quat.z
+            set_struct_array(n_kfd.quaternion_keys, np.column_stack((quat_frames / self.fps, quats)),
+                             ('time', 'value.w', 'value.x', 'value.y', 'value.z'))
 
         n_kfd.translations.interpolation = NifClasses.KeyType.LINEAR_KEY
-        n_kfd.translations.num_keys = len(trans_curve)
+        n_kfd.translations.num_keys = len(trans_frames)
         n_kfd.translations.reset_field("keys")
-        for key, (frame, trans) in zip(n_kfd.translations.keys, trans_curve):
-            key.time = frame / self.fps
-            key.value.x, key.value.y, key.value.z = trans
+        set_struct_array(n_kfd.translations.keys, np.column_stack((trans_frames / self.fps, translations)),
+                         ('time', 'value.x', 'value.y', 'value.z'))
 
         n_kfd.scales.interpolation = NifClasses.KeyType.LINEAR_KEY
-        n_kfd.scales.num_keys = len(scale_curve)
+        n_kfd.scales.num_keys = len(scale_frames)
         n_kfd.scales.reset_field("keys")
-        for key, (frame, scale) in zip(n_kfd.scales.keys, scale_curve):
-            key.time = frame / self.fps
-            key.value = scale
+        set_struct_array(n_kfd.scales.keys, np.column_stack((scale_frames / self.fps, scales)), ('time', 'value'))
 
     def create_text_keys(self, kf_root):
         """Create the text keys before filling in the data so that the extra data hierarchy is correct"""
@@ -306,9 +329,8 @@ class TransformAnimation(Animation):
 
     def add_dummy_controllers(self):
         NifLog.info("Adding controllers and interpolators for skeleton")
-        # note: block_store.block_to_obj changes during iteration, so need list copy
-        for n_block in list(block_store.block_to_obj.keys()):
-            if isinstance(n_block, NifClasses.NiNode) and n_block.name == "Bip01":
+        for n_block in block_store.get_blocks_by_type(NifClasses.NiNode):
+            if n_block.name == "Bip01":
                 for n_bone in n_block.tree(block_type=NifClasses.NiNode):
                     n_kfc, n_kfi = self.transform_anim.create_controller(n_bone, n_bone.name)
                     # todo [anim] use self.nif_export.animationhelper.set_flags_and_timing
@@ -37,6 +37,10 @@
 #
 # ***** END LICENSE BLOCK *****
 
+from bisect import bisect
+from itertools import chain
+
+import numpy as np
 import nifgen.formats.nif as NifFormat
 
 import io_scene_niftools.utils.logging
@@ -53,10 +57,25 @@ def replace_blender_name(name, original, replacement, open_replace, close_replac
     return name.replace(close_replace, CLOSE_BRACKET)
 
 
+def _freeze(value):
+    """Returns value with all nested lists and arrays converted to tuples, so it can be hashed."""
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    return value
+
+
 class ExportBlockRegistry:
 
     def __init__(self):
         self._block_to_obj = {}
+        self._obj_to_blocks = {}
+        self._name_to_blocks = {}
+        self._unnamed_blocks = []
+        self._type_to_blocks = {}
+        self._block_order = {}
+        self._key_to_block = {}
 
     @property
     def block_to_obj(self): 
@@ -64,7 +83,63 @@ class ExportBlockRegistry:
 
     @block_to_obj.setter
     def block_to_obj(self, value):
-        self._block_to_obj = value
+        self._block_to_obj = {}
+        self._obj_to_blocks = {}
+        self._name_to_blocks = {}
+        self._unnamed_blocks = []
+        self._type_to_blocks = {}
+        self._block_order = {}
+        self._key_to_block = {}
+        for block, b_obj in value.items():
+            self._add_block(block, b_obj)
+
+    def _add_block(self, block, b_obj):
+        """Adds block to the registry and its reverse indices. A block that is registered again is only associated
+        with the new Blender object."""
+        if block in self._block_to_obj:
+            old_obj = self._block_to_obj[block]
+            if old_obj is not None:
+                obj_blocks = self.get_blocks_for_obj(old_obj)
+                if block in obj_blocks:
+                    obj_blocks.remove(block)
+        else:
+            # names are usually set after creation, so only index them on lookup
+            self._unnamed_blocks.append(block)
+            self._block_order[block] = len(self._block_order)
+            self._type_to_blocks.setdefault(type(block), []).append(block)
+        self._block_to_obj[block] = b_obj
+        if b_obj is not None:
+            try:
+                self._obj_to_blocks.setdefault(b_obj, []).append(block)
+            except TypeError:
+                # unhashable, can only be found by scanning
+                pass
+
+    def replace_block(self, block, new_block):
+        """Replaces a registered block by another one, which takes over its Blender object and its place in the order
+        of creation.
+
+        :param block: The registered nif block.
+        :param new_block: The nif block to register in its place.
+        """
+        b_obj = self._block_to_obj.pop(block)
+        self._block_to_obj[new_block] = b_obj
+        if b_obj is not None:
+            obj_blocks = self.get_blocks_for_obj(b_obj)
+            if block in obj_blocks:
+                obj_blocks[obj_blocks.index(block)] = new_block
+        if block in self._unnamed_blocks:
+            self._unnamed_blocks.remove(block)
+        else:
+            name_blocks = self._name_to_blocks.get(getattr(block, "name", None), [])
+            if block in name_blocks:
+                name_blocks.remove(block)
+        self._unnamed_blocks.append(new_block)
+        self._type_to_blocks[type(block)].remove(block)
+        order = self._block_order.pop(block)
+        self._block_order[new_block] = order
+        type_blocks = self._type_to_blocks.setdefault(type(new_block), [])
+        type_blocks.insert(bisect([self._block_order[type_block] for type_block in type_blocks], order), new_block)
 
     def register_block(self, block, b_obj=None):
         """Helper function to register a newly created block in the list of
@@ -77,7 +152,7 @@ class ExportBlockRegistry:
             NifLog.info(f"Exporting {block.__class__.__name__} block")
         else:
             NifLog.info(f"Exporting {b_obj} as {block.__class__.__name__} block")
-        self._block_to_obj[block] = b_obj
+        self._add_block(block, b_obj)
         return block
 
     def create_block(self, block_type, b_obj=None):
@@ -94,6 +169,105 @@ class ExportBlockRegistry:
             raise io_scene_niftools.utils.logging.NifError(f"'{block_type}': Unknown block type (this is probably a bug).")
         return self.register_block(block, b_obj)
 
+    @staticmethod
+    def get_content_key(block, first_index=0):
+        """Returns a hashable key of the type and contents of a block, under which identical blocks can be shared.
+
+        :param block: The nif block.
+        :param first_index: The number of leading fields of the block's hash to ignore, such as 1 for its name.
+        :type first_index: :class:`int`
+        :rtype: :class:`tuple`
+        """
+        return type(block), first_index, _freeze(block.get_hash()[first_index:])
+
+    def get_shared_block(self, key):
+        """Returns the block that was shared under a key, or None if there is none.
+
+        :param key: The key, for instance from get_content_key.
+        """
+        return self._key_to_block.get(key)
+
+    def share_block(self, key, block):
+        """Shares a block under a key, so later identical blocks can be replaced by it. The block that was shared
+        first is kept.
+
+        :param key: The key, for instance from get_content_key.
+        :param block: The nif block.
+        """
+        self._key_to_block.setdefault(key, block)
+
+    def get_blocks_for_obj(self, b_obj, block_type=None):
+        """Returns the exported blocks associated with a Blender object, in order of creation.
+
+        :param b_obj: The Blender object or bone.
+        :param block_type: If given, only return blocks that are an instance of this class.
+        :type block_type: :class:`type`
+        :return: The blocks exported for b_obj.
+        :rtype: :class:`list`
+        """
+        try:
+            blocks = self._obj_to_blocks.get(b_obj, [])
+        except TypeError:
+            blocks = [block for block, block_obj in self._block_to_obj.items() if block_obj == b_obj]
+        if block_type is not None:
+            blocks = [block for block in blocks if isinstance(block, block_type)]
+        return blocks
+
+    def get_block_for_obj(self, b_obj, block_type=None):
+        """Returns the first exported block associated with a Blender object, or None if there is none.
+
+        :param b_obj: The Blender object or bone.
+        :param block_type: If given, only consider blocks that are an instance of this class.
+        :type block_type: :class:`type`
+        """
+        blocks = self.get_blocks_for_obj(b_obj, block_type)
+        return blocks[0] if blocks else None
+
+    def get_blocks_by_type(self, block_type):
+        """Returns the exported blocks that are an instance of a class, in order of creation.
+
+        Only the block types are checked, so this does not scan all blocks.
+
+        :param block_type: The class, or tuple of classes, of the blocks.
+        :type block_type: :class:`type`
+        :return: The blocks of block_type.
+        :rtype: :class:`list`
+        """
+        type_blocks = [blocks for b_type, blocks in self._type_to_blocks.items() if issubclass(b_type, block_type)]
+        if len(type_blocks) == 1:
+            return list(type_blocks[0])
+        return sorted(chain.from_iterable(type_blocks), key=self._block_order.__getitem__)
+
+    def get_block_by_name(self, name, block_type=None):
+        """Returns the first exported block with the given name, or None if there is none.
+
+        :param name: The name of the block in the nif.
+        :type name: :class:`str`
+        :param block_type: If given, only consider blocks that are an instance of this class.
+        :type block_type: :class:`type`
+        """
+        self._index_names()
+        blocks = self._name_to_blocks.get(name, [])
+        # blocks can be renamed after they were indexed, so rebuild the index if that happened or nothing was found
+        if not blocks or any(block.name != name for block in blocks):
+            self._index_names(rebuild=True)
+            blocks = self._name_to_blocks.get(name, [])
+        for block in blocks:
+            if block_type is None or isinstance(block, block_type):
+                return block
+        return None
+
+    def _index_names(self, rebuild=False):
+        """Adds the names of the blocks that were registered since the last lookup by name to the index."""
+        if rebuild:
+            self._name_to_blocks = {}
+            self._unnamed_blocks = list(self._block_to_obj)
+        for block in self._unnamed_blocks:
+            name = getattr(block, "name", None)
+            if name is not None:
+                self._name_to_blocks.setdefault(name, []).append(block)
+        self._unnamed_blocks = []
+
     @staticmethod
     def get_bone_name_for_nif(name):
         """Convert a bone name to a name that can be used by the nif file: turns 'Bip01 xxx.R' into 'Bip01 R xxx', and similar for L.
@@ -81,11 +81,8 @@ class Constraint:
                     NifLog.warn(f"Only Oblivion/Fallout/Skyrim rigid body constraints currently supported: Skipping {b_constr}.")
                     continue
                 # check that the object is a rigid body
-                for otherbody, otherobj in block_store.block_to_obj.items():
-                    if isinstance(otherbody, NifClasses.BhkRigidBody) and otherobj is b_obj:
-                        hkbody = otherbody
-                        break
-                else:
+                hkbody = block_store.get_block_for_obj(b_obj, NifClasses.BhkRigidBody)
+                if hkbody is None:
                     # no collision body for this object
                     raise io_scene_niftools.utils.logging.NifError(f"Object {b_obj.name} has a rigid body constraint, but is not exported as collision object")
 
@@ -149,10 +146,9 @@ class Constraint:
                     NifLog.warn(f"Constraint {b_constr} has no target, skipped")
                     continue
                 # find target's bhkRigidBody
-                for otherbody, otherobj in block_store.block_to_obj.items():
-                    if isinstance(otherbody, NifClasses.BhkRigidBody) and otherobj == targetobj:
-                        n_bhkconstraint.entities[1] = otherbody
-                        break
+                targetbody = block_store.get_block_for_obj(targetobj, NifClasses.BhkRigidBody)
+                if targetbody is not None:
+                    n_bhkconstraint.entities[1] = targetbody
                 else:
                     # not found
                     raise io_scene_niftools.utils.logging.NifError(f"Rigid body target not exported in nif tree - check that {targetobj} is selected during export.")
@@ -51,6 +51,7 @@ from io_scene_niftools.modules.nif_export.block_registry import block_store
 from io_scene_niftools.modules.nif_export.property.object import ObjectProperty
 from io_scene_niftools.modules.nif_export.property.texture.types.nitextureprop import NiTextureProp
 from io_scene_niftools.utils import math
+from io_scene_niftools.utils.arrays import set_struct_array
 from io_scene_niftools.utils.singleton import NifOp, NifData
 from io_scene_niftools.utils.logging import NifLog, NifError
 from io_scene_niftools.modules.nif_export.geometry.mesh.skin_partition import update_skin_partition
@@ -108,19 +109,42 @@ class Mesh:
         nif_scene = bpy.context.scene.niftools_scene
         game = nif_scene.game
 
+        b_uv_layers = eval_mesh.uv_layers
+        if nif_scene.is_fo3() or nif_scene.is_skyrim():
+            if len(b_uv_layers) > 1:
+                raise NifError(f"{game} does not support multiple UV layers.")
+
+        # vertex group weights, only read when the mesh turns out to be skinned
+        skin_weights = None
+
         # Non-textured materials, vertex colors are used to color the mesh
         # Textured materials, they represent lighting details
-
-        # let's now export one n_geom for every mesh material
-        # TODO [material] needs refactoring - move material, texture, etc. to separate function
+        material_flags = {}
         for b_mat_index, b_mat in enumerate(mesh_materials):
-
             mesh_hasnormals = False
             if b_mat is not None:
                 mesh_hasnormals = True  # for proper lighting
                 if nif_scene.is_skyrim() and b_mat.niftools_shader.model_space_normals:
                     mesh_hasnormals = False  # for proper lighting
 
+            use_tangents = False
+            if b_uv_layers and mesh_hasnormals:
+                default_use_tangents = ('BULLY_SE',
+                                        )
+                if game in default_use_tangents or nif_scene.is_bs() or (game in self.texture_helper.USED_EXTRA_SHADER_TEXTURES):
+                    use_tangents = True
+            material_flags[b_mat_index] = (mesh_hasnormals, use_tangents)
+
+        # extract the geometry of all materials at once
+        geom_data = self.get_geom_data(b_mesh=eval_mesh,
+                                       color=mesh_hasvcol,
+                                       uv=len(b_uv_layers) > 0,
+                                       material_flags=material_flags)
+
+        # let's now export one n_geom for every mesh material
+        # TODO [material] needs refactoring - move material, texture, etc. to separate function
+        for b_mat_index, b_mat in enumerate(mesh_materials):
+
             # create a n_geom block
             if game in ("SKYRIM_SE",):
                 n_geom = block_store.create_block("BSTriShape", b_obj)
@@ -173,7 +197,6 @@ class Mesh:
 
             self.object_property.export_properties(b_obj, b_mat, n_geom)
 
-            b_uv_layers = eval_mesh.uv_layers
             # for each face in triangles, a body part index
             bodypartfacemap = []
             polygons_without_bodypart = []
@@ -184,23 +207,7 @@ class Mesh:
                     if not eval_mesh.uv_layer_stencil:
                         NifLog.warn(f"No UV map for texture associated with selected mesh '{eval_mesh.name}'.")
 
-            use_tangents = False
-            if b_uv_layers and mesh_hasnormals:
-                default_use_tangents = ('BULLY_SE',
-                                        )
-                if game in default_use_tangents or nif_scene.is_bs() or (game in self.texture_helper.USED_EXTRA_SHADER_TEXTURES):
-                    use_tangents = True
-
-            if nif_scene.is_fo3() or nif_scene.is_skyrim():
-                if len(b_uv_layers) > 1:
-                    raise NifError(f"{game} does not support multiple UV layers.")
-
-            triangles, t_nif_to_blend, vertex_information, v_nif_to_blend = self.get_geom_data(b_mesh=eval_mesh,
-                                                                             color=mesh_hasvcol,
-                                                                             normal=mesh_hasnormals,
-                                                                             uv=len(b_uv_layers) > 0,
-                                                                             tangent=use_tangents,
-                                                                             b_mat_index=b_mat_index)
+            triangles, t_nif_to_blend, vertex_information, v_nif_to_blend = geom_data[b_mat_index]
 
             if len(vertex_information['POSITION']) == 0:
                 continue  # m_4444x: skip 'empty' material indices
@@ -209,13 +216,6 @@ class Mesh:
             if len(triangles) > 65535:
                 raise NifError("Too many polygons. Decimate your mesh and try again.")
 
-            vertex_map = [None for _ in range(len(eval_mesh.vertices))]
-            for i, vertex_index in enumerate(v_nif_to_blend):
-                if vertex_map[vertex_index] is None:
-                    vertex_map[vertex_index] = [i]
-                else:
-                    vertex_map[vertex_index].append(i)
-
             if len(b_uv_layers) > 0:
                 # adjustment of UV coordinates because of imprecision at larger sizes
                 uv_array = vertex_information['UV']
@@ -258,59 +258,32 @@ class Mesh:
                     skininst, skindata = self.create_skin_inst_data(b_obj, b_obj_armature, polygon_parts)
                     n_geom.skin_instance = skininst
 
-                    # Vertex weights,  find weights and normalization factors
-                    vert_list = {}
-                    vert_norm = {}
-                    unweighted_vertices = []
-
-                    for bone_group in boneinfluences:
-                        b_list_weight = []
-                        b_vert_group = b_obj.vertex_groups[bone_group]
-
-                        for b_vert in eval_mesh.vertices:
-                            if len(b_vert.groups) == 0:  # check vert has weight_groups
-                                unweighted_vertices.append(b_vert.index)
-                                continue
-
-                            for g in b_vert.groups:
-                                if b_vert_group.name in boneinfluences:
-                                    if g.group == b_vert_group.index:
-                                        b_list_weight.append((b_vert.index, g.weight))
-                                        break
-
-                        vert_list[bone_group] = b_list_weight
-
-                        # create normalisation groupings
-                        for v in vert_list[bone_group]:
-                            if v[0] in vert_norm:
-                                vert_norm[v[0]] += v[1]
-                            else:
-                                vert_norm[v[0]] = v[1]
+                    # Vertex weights, find weights and normalization factors once for the whole mesh
+                    if skin_weights is None:
+                        skin_weights = self.get_vertex_group_weights(b_obj, eval_mesh, boneinfluences)
+                    bone_group_names, weight_verts, weight_bones, weight_values, unweighted_vertices = skin_weights
 
                     self.select_unweighted_vertices(b_obj, unweighted_vertices)
 
+                    # fan the weights of the blender vertices out to the nif vertices they were mapped to
+                    nif_verts, weight_bones, weight_values = self.map_vertex_weights(v_nif_to_blend, weight_verts,
+                                                                                     weight_bones, weight_values)
+
                     # for each bone, get the vertex weights and add its n_node to the NiSkinData
-                    for b_bone_name in boneinfluences:
-                        # find vertex weights
-                        vert_weights = {}
-                        for v in vert_list[b_bone_name]:
-                            # v[0] is the original vertex index
-                            # v[1] is the weight
-
-                            # vertex_map[v[0]] is the set of vertices (indices) to which v[0] was mapped
-                            # so we simply export the same weight as the original vertex for each new vertex
-
-                            # write the weights
-                            # extra check for multi material meshes
-                            if vertex_map[v[0]] and vert_norm[v[0]]:
-                                for vert_index in vertex_map[v[0]]:
-                                    vert_weights[vert_index] = v[1] / vert_norm[v[0]]
+                    bone_order = np.argsort(weight_bones, kind='stable')
+                    bone_starts = np.searchsorted(weight_bones[bone_order], np.arange(len(bone_group_names) + 1))
+                    skin_bones = np.zeros(len(bone_group_names), dtype=int)
+                    n_skin_bones = 0
+                    for bone_index, b_bone_name in enumerate(bone_group_names):
+                        bone_weights = bone_order[bone_starts[bone_index]:bone_starts[bone_index + 1]]
                         # add bone as influence, but only if there were actually any vertices influenced by the bone
-                        if vert_weights:
+                        if len(bone_weights):
                             # find bone in exported blocks
                             n_node = self.get_bone_block(b_obj_armature.data.bones[b_bone_name])
-                            n_geom.add_bone(n_node, vert_weights)
-                    del vert_weights
+                            n_geom.add_bone(n_node, dict(zip(nif_verts[bone_weights].tolist(),
+                                                             weight_values[bone_weights].tolist())))
+                            skin_bones[bone_index] = n_skin_bones
+                            n_skin_bones += 1
 
                     # update bind position skinning data
                     # n_geom.update_bind_position()
@@ -320,7 +293,8 @@ class Mesh:
                     # calculate center and radius for each skin bone data block
                     n_geom.update_skin_center_radius()
 
-                    self.export_skin_partition(b_obj, bodypartfacemap, triangles, n_geom)
+                    self.export_skin_partition(b_obj, bodypartfacemap, triangles, n_geom,
+                                               (nif_verts, skin_bones[weight_bones], weight_values))
 
             if isinstance(n_geom, NifClasses.NiTriBasedGeom):
                 # fix data consistency type
@@ -328,28 +302,26 @@ class Mesh:
 
             # export EGM or NiGeomMorpherController animation
             # shape keys are only present on the raw, unevaluated mesh
-            self.morph_anim.export_morph(b_mesh, n_geom, vertex_map)
+            self.morph_anim.export_morph(b_mesh, n_geom, v_nif_to_blend)
         return n_geom
 
-    def get_geom_data(self, b_mesh, color, normal, uv, tangent, b_mat_index):
-        """Converts the blender information in b_mesh to a triangles, a dictionary with vertex information and a
-        mapping of the blender vertices to nif vertices.
+    def get_geom_data(self, b_mesh, color, uv, material_flags):
+        """Converts the blender information in b_mesh to triangles, a dictionary with vertex information and a
+        mapping of the blender vertices to nif vertices, for every requested material index.
 
         :param b_mesh: Blender Mesh object
         :type b_mesh: class:`bpy.types.Mesh`
         :param color: Whether to consider vertex colors
         :type color: bool
-        :param normal: Whether to consider vertex normals
-        :type normal: bool
         :param uv: Whether to consider UV coordinates
         :type uv: bool
-        :param tangent: Whether to consider tangents and bitangents
-        :type tangent: bool
-        :param b_mat_index: Material index to filter on. -1 means no filtering
-        :type b_mat_index: int
+        :param material_flags: Material index mapped to a (normal, tangent) tuple, stating whether to consider
+            vertex normals and tangents (and bitangents) for the geometry of that material
+        :type material_flags: dict(int, tuple(bool, bool))
 
-        :return: the triangles, triangle to polygon array, dict of vertex information and nif vertex to blender vertex array
-        :rtype: tuple(np.ndarray, np.ndarray, dict(str, np.ndarray), np.ndarray)
+        :return: material index mapped to the triangles, triangle to polygon array, dict of vertex information and
+            nif vertex to blender vertex array of that material
+        :rtype: dict(int, tuple(np.ndarray, np.ndarray, dict(str, np.ndarray), np.ndarray))
         The dictionary can contain the following information:
         POSITION: position
         COLOR: vertex colors
@@ -366,38 +338,63 @@ class Mesh:
         Blender's uv vertices and normals are per face.
         Blender supports per face vertex coloring.
         Blender loops, on the other hand, are much like nif vertices, and refer to one vertex associated with a polygon
-        
-        The algorithm merges loops with the same information (as long as they have the same original vertex) and
-        triangulates the mesh without needing a triangulation modifier.
+
+        The algorithm merges loops with the same information (as long as they have the same original vertex and
+        material) and triangulates the mesh without needing a triangulation modifier. The mesh attributes are read only
+        once, and loops are merged once for every distinct combination of flags in material_flags.
+        """
+        normal = any(mat_normal for mat_normal, mat_tangent in material_flags.values())
+        tangent = any(mat_tangent for mat_normal, mat_tangent in material_flags.values())
+        mesh_data = self.get_mesh_data(b_mesh, color, normal, uv, tangent)
+
+        # materials that consider the same information share the merging of their loops
+        flag_to_mats = {}
+        for b_mat_index, flags in material_flags.items():
+            flag_to_mats.setdefault(flags, []).append(b_mat_index)
+
+        geom_data = {}
+        for (mat_normal, mat_tangent), b_mat_indices in flag_to_mats.items():
+            geom_data.update(self.merge_loops(mesh_data, color, mat_normal, uv, mat_tangent, b_mat_indices))
+        return geom_data
+
+    def get_mesh_data(self, b_mesh, color, normal, uv, tangent):
+        """Reads all per-loop and per-triangle information of b_mesh that is needed for export in one pass.
+
+        :return: dict of full length loop and triangle arrays
+        :rtype: dict(str, np.ndarray)
         """
         n_loops = len(b_mesh.loops)
         n_verts = len(b_mesh.vertices)
+        n_polys = len(b_mesh.polygons)
         n_tris = len(b_mesh.loop_triangles)
 
-        if b_mat_index >= 0:
-            loop_mat_indices = np.ones(n_loops, dtype=int) * -1
-            for poly in b_mesh.polygons:
-                loop_mat_indices[poly.loop_indices] = poly.material_index
-            matl_to_loop = np.arange(n_loops, dtype=int)[loop_mat_indices == b_mat_index]
-            del loop_mat_indices
-        else:
-            matl_to_loop = np.arange(n_loops, dtype=int)
-        # for the loops without matl equivalent, use len(matl_to_loop) to exceed the length of the matl array
-        loop_to_matl = np.ones(n_loops, dtype=int) * len(matl_to_loop)
-        loop_to_matl[matl_to_loop] = np.arange(len(matl_to_loop), dtype=int)
-
-        loop_hashes = np.zeros((len(matl_to_loop), 0), dtype=float)
+        mesh_data = {}
+
+        # polygon of each loop, polygon loops are contiguous but not necessarily in polygon order
+        loop_starts = np.zeros(n_polys, dtype=int)
+        b_mesh.polygons.foreach_get('loop_start', loop_starts)
+        loop_totals = np.zeros(n_polys, dtype=int)
+        b_mesh.polygons.foreach_get('loop_total', loop_totals)
+        poly_offsets = np.repeat(np.cumsum(loop_totals) - loop_totals, loop_totals)
+        loop_to_poly = np.ones(n_loops, dtype=int) * -1
+        loop_to_poly[np.repeat(loop_starts, loop_totals) + np.arange(len(poly_offsets)) - poly_offsets] = \
+            np.repeat(np.arange(n_polys, dtype=int), loop_totals)
+        del poly_offsets
+
+        poly_mat_indices = np.zeros(n_polys, dtype=int)
+        b_mesh.polygons.foreach_get('material_index', poly_mat_indices)
+        loop_mat_indices = np.ones(n_loops, dtype=int) * -1
+        loop_mat_indices[loop_to_poly >= 0] = poly_mat_indices[loop_to_poly[loop_to_poly >= 0]]
+        mesh_data['MATERIAL'] = loop_mat_indices
 
         loop_to_vert = np.zeros(n_loops, dtype=int)
         b_mesh.loops.foreach_get('vertex_index', loop_to_vert)
-        matl_to_vert = loop_to_vert[matl_to_loop]
-        loop_hashes = np.concatenate((loop_hashes, matl_to_vert.reshape((-1,1))), axis=1)
+        mesh_data['VERTEX'] = loop_to_vert
 
         vert_positions = np.zeros((n_verts, 3), dtype=float)
         b_mesh.vertices.foreach_get('co', vert_positions.reshape((-1, 1)))
-        loop_positions = vert_positions[matl_to_vert]
+        mesh_data['POSITION'] = vert_positions[loop_to_vert]
         del vert_positions
-        loop_hashes = np.concatenate((loop_hashes, loop_positions), axis=1)
 
         if color:
             loop_colors = np.zeros((n_loops, 4), dtype=float)
@@ -414,117 +411,222 @@ class Mesh:
                     color_attr.data.foreach_get('color', vert_colors.reshape((-1, 1)))
                     loop_colors[:] = vert_colors[loop_to_vert]
                     del vert_colors
-            loop_colors = loop_colors[matl_to_loop]
-            loop_hashes = np.concatenate((loop_hashes, loop_colors), axis=1)
+            mesh_data['COLOR'] = loop_colors
 
         if normal:
             # calculate normals
             b_mesh.calc_normals_split()
+            # flat buffers, as foreach_get is much slower on nested sequences
             loop_normals = np.zeros((n_loops, 3), dtype=float)
-            b_mesh.loops.foreach_get('normal', loop_normals.reshape((-1, 1)))
+            b_mesh.loops.foreach_get('normal', loop_normals.reshape(-1))
             # smooth = vertex normal, non-smooth = face normal)
-            for poly in b_mesh.polygons:
-                if not poly.use_smooth:
-                    loop_normals[poly.loop_indices] = poly.normal
-            loop_normals = loop_normals[matl_to_loop]
-            loop_hashes = np.concatenate((loop_hashes, loop_normals), axis=1)
+            poly_smooth = np.zeros(n_polys, dtype=bool)
+            b_mesh.polygons.foreach_get('use_smooth', poly_smooth)
+            poly_normals = np.zeros((n_polys, 3), dtype=float)
+            b_mesh.polygons.foreach_get('normal', poly_normals.reshape(-1))
+            flat_loops = np.flatnonzero(loop_to_poly >= 0)
+            flat_loops = flat_loops[~poly_smooth[loop_to_poly[flat_loops]]]
+            loop_normals[flat_loops] = poly_normals[loop_to_poly[flat_loops]]
+            del poly_smooth, poly_normals, flat_loops
+            mesh_data['NORMAL'] = loop_normals
 
         if uv:
             uv_layers = []
             for layer in b_mesh.uv_layers:
                 loop_uv = np.zeros((n_loops, 2), dtype=float)
                 layer.data.foreach_get('uv', loop_uv.reshape((-1, 1)))
-                loop_uv = loop_uv[matl_to_loop]
                 uv_layers.append(loop_uv)
-                loop_hashes = np.concatenate((loop_hashes, loop_uv), axis=1)
-            loop_uvs = np.swapaxes(uv_layers, 0, 1)
+            mesh_data['UV'] = np.swapaxes(uv_layers, 0, 1)
             del uv_layers
 
         if tangent:
             b_mesh.calc_tangents(uvmap=b_mesh.uv_layers[0].name)
             loop_tangents = np.zeros((n_loops, 3), dtype=float)
             b_mesh.loops.foreach_get('tangent', loop_tangents.reshape((-1, 1)))
-            loop_tangents = loop_tangents[matl_to_loop]
-            if NifOp.props.sep_tangent_space:
-                loop_hashes = np.concatenate((loop_hashes, loop_tangents), axis=1)
+            mesh_data['TANGENT'] = loop_tangents
 
             bitangent_signs = np.zeros((n_loops, 1), dtype=float)
             b_mesh.loops.foreach_get('bitangent_sign', bitangent_signs)
-            bitangent_signs = bitangent_signs[matl_to_loop]
-            loop_bitangents = bitangent_signs * np.cross(loop_normals, loop_tangents)
-            if NifOp.props.sep_tangent_space:
-                loop_hashes = np.concatenate((loop_hashes, loop_bitangents), axis=1)
+            mesh_data['BITANGENT'] = bitangent_signs * np.cross(mesh_data['NORMAL'], loop_tangents)
             del bitangent_signs
 
-        # now remove duplicates
-        # first exact (also sorts by blender vertex)
-        loop_hashes, hash_to_matl, matl_to_hash = np.unique(loop_hashes, return_index=True, return_inverse=True, axis=0)
-        hash_to_same_hash = np.arange(len(loop_hashes), dtype=int)
-        hash_to_nif_vert = np.arange(len(loop_hashes), dtype=int)
-        # then inexact (if epsilon is not 0)
-        if NifOp.props.epsilon > 0:
-
-            current_vert = -1
-            max_nif_vert = -1
-            for hash_index, loop_hash in enumerate(loop_hashes):
-                if loop_hash[0] != current_vert:
-                    current_vert = loop_hash[0]
-                    current_hash_start = hash_index
-
-                nif_vert_index = max_nif_vert + 1
-                for comp_index in range(current_hash_start, hash_index):
-                    comp_loop_hash = loop_hashes[comp_index]
-                    if any(np.abs(comp_loop_hash - loop_hash) > NifOp.props.epsilon):
-                        # this hash is different, but others may be the same
-                        continue
-                    else:
-                        nif_vert_index = hash_to_nif_vert[comp_index]
-                        hash_to_same_hash[hash_index] = comp_index
-                        break
-                hash_to_nif_vert[hash_index] = nif_vert_index
-                max_nif_vert = max((nif_vert_index, max_nif_vert))
-
-        # finally, use the mapping from blender to nif to create the triangles
-        # first get the actual triangles in an array
-        blend_triangles = np.zeros((n_tris, 3), dtype=int)
-        b_mesh.loop_triangles.foreach_get('loops', blend_triangles.reshape((-1, 1)))
+        # the actual triangles and their polygons and materials
+        tri_loops = np.zeros((n_tris, 3), dtype=int)
+        b_mesh.loop_triangles.foreach_get('loops', tri_loops.reshape((-1, 1)))
+        mesh_data['TRIANGLES'] = tri_loops
         tri_to_poly = np.zeros(n_tris, dtype=int)
         b_mesh.loop_triangles.foreach_get('polygon_index', tri_to_poly)
-        # filter out the ones not in the specified material
+        mesh_data['TRIANGLE_POLYGON'] = tri_to_poly
         triangle_mats = np.zeros(n_tris, dtype=int)
         b_mesh.loop_triangles.foreach_get('material_index', triangle_mats)
-        mattri_to_looptri = np.arange(n_tris, dtype=int)
-        if b_mat_index >= 0:
-            mattri_to_looptri = mattri_to_looptri[triangle_mats == b_mat_index]
-        blend_triangles = blend_triangles[mattri_to_looptri]
-        tri_to_poly = tri_to_poly[mattri_to_looptri]
-        # go from loop indices to nif vertices
-        # [TODO] possibly optimize later
-        for i in range(len(blend_triangles)):
-            blend_triangles[i] = hash_to_nif_vert[matl_to_hash[loop_to_matl[blend_triangles[i]]]]
-        # sort the triangles on polygon index to keep the original order
-        tri_sort = np.argsort(tri_to_poly, axis=0)
-        tri_to_poly = tri_to_poly[tri_sort]
-        blend_triangles = blend_triangles[tri_sort]
-
-        # make the vertex data from the hash map
-        nif_to_hash = np.unique(hash_to_same_hash, return_index=True)[1]
-        nif_to_matl = hash_to_matl[nif_to_hash]
-        data_dict = {
-            'POSITION': loop_positions[nif_to_matl]
-            }
+        mesh_data['TRIANGLE_MATERIAL'] = triangle_mats
 
+        return mesh_data
+
+    def merge_loops(self, mesh_data, color, normal, uv, tangent, b_mat_indices):
+        """Merges the loops of all materials in b_mat_indices in one go and partitions the result per material.
+
+        :param mesh_data: loop and triangle information as returned by get_mesh_data
+        :type mesh_data: dict(str, np.ndarray)
+        :param b_mat_indices: Material indices to export
+        :type b_mat_indices: list(int)
+
+        :return: material index mapped to the triangles, triangle to polygon array, dict of vertex information and
+            nif vertex to blender vertex array of that material
+        :rtype: dict(int, tuple(np.ndarray, np.ndarray, dict(str, np.ndarray), np.ndarray))
+        """
+        loop_mat_indices = mesh_data['MATERIAL']
+        loop_to_vert = mesh_data['VERTEX']
+        n_loops = len(loop_to_vert)
+
+        sel_to_loop = np.arange(n_loops, dtype=int)[np.isin(loop_mat_indices, b_mat_indices)]
+        # for the loops without sel equivalent, use len(sel_to_loop) to exceed the length of the sel array
+        loop_to_sel = np.ones(n_loops, dtype=int) * len(sel_to_loop)
+        loop_to_sel[sel_to_loop] = np.arange(len(sel_to_loop), dtype=int)
+
+        # material first, so that the loops of every material are contiguous after sorting, then blender vertex
+        hash_columns = [loop_mat_indices[sel_to_loop].reshape((-1, 1)),
+                        loop_to_vert[sel_to_loop].reshape((-1, 1)),
+                        mesh_data['POSITION'][sel_to_loop]]
         if color:
-            data_dict['COLOR'] = loop_colors[nif_to_matl]
+            hash_columns.append(mesh_data['COLOR'][sel_to_loop])
         if normal:
-            data_dict['NORMAL'] = loop_normals[nif_to_matl]
+            hash_columns.append(mesh_data['NORMAL'][sel_to_loop])
         if uv:
-            data_dict['UV'] = loop_uvs[nif_to_matl]
-        if tangent:
-            data_dict['TANGENT'] = loop_tangents[nif_to_matl]
-            data_dict['BITANGENT'] = loop_bitangents[nif_to_matl]
+            hash_columns.extend(np.swapaxes(mesh_data['UV'][sel_to_loop], 0, 1))
+        if tangent and NifOp.props.sep_tangent_space:
+            hash_columns.append(mesh_data['TANGENT'][sel_to_loop])
+            hash_columns.append(mesh_data['BITANGENT'][sel_to_loop])
+        loop_hashes = np.concatenate(hash_columns, axis=1).astype(float)
+        del hash_columns
 
-        return blend_triangles, tri_to_poly, data_dict, loop_to_vert[matl_to_loop[nif_to_matl]]
+        # now remove duplicates
+        # first exact (also sorts by material and blender vertex)
+        loop_hashes, hash_to_sel, sel_to_hash = np.unique(loop_hashes, return_index=True, return_inverse=True, axis=0)
+        sel_to_hash = sel_to_hash.reshape(-1)
+        # then inexact (if epsilon is not 0)
+        if NifOp.props.epsilon > 0:
+            hash_to_same_hash, hash_to_nif_vert = self.get_near_duplicates(loop_hashes, NifOp.props.epsilon, 2)
+        else:
+            hash_to_same_hash = np.arange(len(loop_hashes), dtype=int)
+            hash_to_nif_vert = np.arange(len(loop_hashes), dtype=int)
+
+        # the nif vertices, as hashes and as loops
+        nif_to_hash = np.unique(hash_to_same_hash, return_index=True)[1]
+        # the ranges of the hashes per material
+        mat_hash_starts = np.searchsorted(loop_hashes[:, 0], b_mat_indices, side='left')
+        mat_hash_ends = np.searchsorted(loop_hashes[:, 0], b_mat_indices, side='right')
+
+        geom_data = {}
+        for b_mat_index, hash_start, hash_end in zip(b_mat_indices, mat_hash_starts, mat_hash_ends):
+            # hashes of this material are numbered from the first nif vertex of this material
+            nif_vert_offset = hash_to_nif_vert[hash_start] if hash_start < hash_end else 0
+
+            # finally, use the mapping from blender to nif to create the triangles
+            # filter out the ones not in the specified material
+            mattri_to_looptri = np.arange(len(mesh_data['TRIANGLE_MATERIAL']), dtype=int)
+            mattri_to_looptri = mattri_to_looptri[mesh_data['TRIANGLE_MATERIAL'] == b_mat_index]
+            blend_triangles = mesh_data['TRIANGLES'][mattri_to_looptri]
+            tri_to_poly = mesh_data['TRIANGLE_POLYGON'][mattri_to_looptri]
+            # go from loop indices to nif vertices
+            blend_triangles = hash_to_nif_vert[sel_to_hash[loop_to_sel[blend_triangles]]] - nif_vert_offset
+            # sort the triangles on polygon index to keep the original order
+            tri_sort = np.argsort(tri_to_poly, axis=0)
+            tri_to_poly = tri_to_poly[tri_sort]
+            blend_triangles = blend_triangles[tri_sort]
+
+            # make the vertex data from the hash map
+            mat_nif_to_hash = nif_to_hash[np.searchsorted(nif_to_hash, hash_start):
+                                          np.searchsorted(nif_to_hash, hash_end)]
+            nif_to_loop = sel_to_loop[hash_to_sel[mat_nif_to_hash]]
+            data_dict = {
+                'POSITION': mesh_data['POSITION'][nif_to_loop]
+                }
+
+            if color:
+                data_dict['COLOR'] = mesh_data['COLOR'][nif_to_loop]
+            if normal:
+                data_dict['NORMAL'] = mesh_data['NORMAL'][nif_to_loop]
+            if uv:
+                data_dict['UV'] = mesh_data['UV'][nif_to_loop]
+            if tangent:
+                data_dict['TANGENT'] = mesh_data['TANGENT'][nif_to_loop]
+                data_dict['BITANGENT'] = mesh_data['BITANGENT'][nif_to_loop]
+
+            geom_data[b_mat_index] = (blend_triangles, tri_to_poly, data_dict, loop_to_vert[nif_to_loop])
+        return geom_data
+
+    @staticmethod
+    def get_near_duplicates(loop_hashes, epsilon, n_key_columns):
+        """Finds the hashes that are within epsilon of an earlier hash with the same key (the first n_key_columns
+        columns, i.e. material and blender vertex). Every hash is merged with the first earlier hash that is close
+        enough, and is otherwise assigned the next free nif vertex.
+
+        Rather than comparing each hash to all earlier hashes of its key, the hashes are sorted per key on the column
+        that separates them best, so that only the hashes in a sliding window of epsilon on that column are compared,
+        and the comparisons for all windows are done in one batch per window offset.
+
+        :param loop_hashes: Unique hashes, sorted lexicographically
+        :type loop_hashes: np.ndarray
+        :param epsilon: Maximal difference per component to consider two hashes the same
+        :type epsilon: float
+        :param n_key_columns: Number of leading columns that must match exactly
+        :type n_key_columns: int
+
+        :return: the (earlier) hash each hash was merged with, and the nif vertex of each hash
+        :rtype: tuple(np.ndarray, np.ndarray)
+        """
+        n_hashes = len(loop_hashes)
+        hash_indices = np.arange(n_hashes, dtype=int)
+        if n_hashes == 0:
+            return hash_indices, hash_indices.copy()
+
+        # hashes with the same key are contiguous because of the lexicographic sorting
+        key_starts = np.ones(n_hashes, dtype=bool)
+        key_starts[1:] = np.any(loop_hashes[1:, :n_key_columns] != loop_hashes[:-1, :n_key_columns], axis=1)
+        hash_to_key = np.cumsum(key_starts) - 1
+
+        # sweep on the column where most hashes differ from the first hash of their key
+        key_first_hash = hash_indices[key_starts][hash_to_key]
+        spread = np.count_nonzero(np.abs(loop_hashes - loop_hashes[key_first_hash]) > epsilon, axis=0)
+        sweep_column = loop_hashes[:, np.argmax(spread)]
+        sweep_to_hash = np.lexsort((sweep_column, hash_to_key))
+        sweep_keys = hash_to_key[sweep_to_hash]
+        sweep_values = sweep_column[sweep_to_hash]
+
+        # for every hash, the first earlier hash which is within epsilon, n_hashes if there is none
+        hash_to_match = np.full(n_hashes, n_hashes, dtype=int)
+        active = np.arange(n_hashes - 1, dtype=int)
+        offset = 1
+        while len(active):
+            other = active + offset
+            # values are sorted per key, so once out of the window, a hash remains out of it for larger offsets
+            in_window = (sweep_keys[other] == sweep_keys[active]) & \
+                        (np.abs(sweep_values[other] - sweep_values[active]) <= epsilon)
+            active = active[in_window]
+            other = other[in_window]
+            hash_a = sweep_to_hash[active]
+            hash_b = sweep_to_hash[other]
+            is_near = np.all(np.abs(loop_hashes[hash_a] - loop_hashes[hash_b]) <= epsilon, axis=1)
+            later_hash = np.maximum(hash_a[is_near], hash_b[is_near])
+            earlier_hash = np.minimum(hash_a[is_near], hash_b[is_near])
+            np.minimum.at(hash_to_match, later_hash, earlier_hash)
+            active = active[other < n_hashes - 1]
+            offset += 1
+
+        has_match = hash_to_match < n_hashes
+        hash_to_same_hash = np.where(has_match, hash_to_match, hash_indices)
+        # follow the merges back to the hash that started a new nif vertex
+        hash_to_root = hash_to_same_hash.copy()
+        while True:
+            next_root = hash_to_root[hash_to_root]
+            if np.array_equal(next_root, hash_to_root):
+                break
+            hash_to_root = next_root
+        # new nif vertices are numbered in hash order
+        root_to_nif_vert = np.cumsum(~has_match) - 1
+        hash_to_nif_vert = root_to_nif_vert[hash_to_root]
+        return hash_to_same_hash, hash_to_nif_vert
 
     def set_geom_data(self, n_geom, triangles, vertex_information, b_uv_layers):
         if isinstance(n_geom, NifClasses.BSTriShape):
@@ -561,34 +663,26 @@ class Mesh:
         n_geom.data_size = ((n_geom.vertex_desc & 0xF) * n_geom.num_vertices * 4) + (n_geom.num_triangles * 6)
 
         n_geom.reset_field('vertex_data')
-        for n_v, b_v in zip([data.vertex for data in n_geom.vertex_data], vertex_information['POSITION']):
-            n_v.x, n_v.y, n_v.z = b_v
+        vertex_data = n_geom.vertex_data
+        set_struct_array([data.vertex for data in vertex_data], vertex_information['POSITION'], ('x', 'y', 'z'))
         if vertex_flags.u_vs:
-            for n_uv, b_uv in zip([data.uv for data in n_geom.vertex_data], vertex_information['UV']):
-                # NIF flips the texture V-coordinate (OpenGL standard)
-                n_uv.u = b_uv[0][0]
-                n_uv.v = 1.0 - b_uv[0][1]
+            # NIF flips the texture V-coordinate (OpenGL standard)
+            uvs = vertex_information['UV'][:, 0] * (1.0, -1.0) + (0.0, 1.0)
+            set_struct_array([data.uv for data in vertex_data], uvs, ('u', 'v'))
         if vertex_flags.normals:
-            for n_n, b_n in zip([data.normal for data in n_geom.vertex_data], vertex_information['NORMAL']):
-                n_n.x, n_n.y, n_n.z = b_n
+            set_struct_array([data.normal for data in vertex_data], vertex_information['NORMAL'], ('x', 'y', 'z'))
         if vertex_flags.tangents:
             # B_tan: +d(B_u), B_bit: +d(B_v) and N_tan: +d(N_v), N_bit: +d(N_u)
             # moreover, N_v = 1 - B_v, so d(B_v) = - d(N_v), therefore N_tan = -B_bit and N_bit = B_tan
-            for n_t, b_t in zip([data.tangent for data in n_geom.vertex_data], vertex_information['BITANGENT']):
-                n_t.x, n_t.y, n_t.z = -b_t
-            for n_vert, b_b in zip(n_geom.vertex_data, vertex_information['TANGENT']):
-                n_vert.bitangent_x, n_vert.bitangent_y, n_vert.bitangent_z = b_b
+            set_struct_array([data.tangent for data in vertex_data], -vertex_information['BITANGENT'], ('x', 'y', 'z'))
+            set_struct_array(vertex_data, vertex_information['TANGENT'], ('bitangent_x', 'bitangent_y', 'bitangent_z'))
         if vertex_flags.vertex_colors:
-            for n_c, b_c in zip([data.vertex_colors for data in n_geom.vertex_data], vertex_information['COLOR']):
-                n_c.r, n_c.g, n_c.b, n_c.a = b_c
+            set_struct_array([data.vertex_colors for data in vertex_data], vertex_information['COLOR'], ('r', 'g', 'b', 'a'))
 
         n_geom.update_center_radius()
 
         n_geom.reset_field('triangles')
-        for n_tri, b_tri in zip(n_geom.triangles, triangles):
-            n_tri.v_1 = b_tri[0]
-            n_tri.v_2 = b_tri[1]
-            n_tri.v_3 = b_tri[2]
+        set_struct_array(n_geom.triangles, triangles, ('v_1', 'v_2', 'v_3'))
 
     def set_ni_geom_data(self, n_geom, triangles, vertex_information, b_uv_layers):
         """Sets the geometry data (triangles and flat lists of per-vertex data) to a BSGeometry block."""
@@ -596,15 +690,13 @@ class Mesh:
         n_geom.data.num_vertices = len(vertex_information['POSITION'])
         n_geom.data.has_vertices = True
         n_geom.data.reset_field("vertices")
-        for n_v, b_v in zip(n_geom.data.vertices, vertex_information['POSITION']):
-            n_v.x, n_v.y, n_v.z = b_v
+        set_struct_array(n_geom.data.vertices, vertex_information['POSITION'], ('x', 'y', 'z'))
         n_geom.data.update_center_radius()
         # normals
         n_geom.data.has_normals = 'NORMAL' in vertex_information
         if n_geom.data.has_normals:
             n_geom.data.reset_field("normals")
-            for n_v, b_v in zip(n_geom.data.normals, vertex_information['NORMAL']):
-                n_v.x, n_v.y, n_v.z = b_v
+            set_struct_array(n_geom.data.normals, vertex_information['NORMAL'], ('x', 'y', 'z'))
         # tangents
         if 'TANGENT' in vertex_information:
             tangents = vertex_information['TANGENT']
@@ -619,8 +711,7 @@ class Mesh:
         n_geom.data.has_vertex_colors = 'COLOR' in vertex_information
         if n_geom.data.has_vertex_colors:
             n_geom.data.reset_field("vertex_colors")
-            for n_v, b_v in zip(n_geom.data.vertex_colors, vertex_information['COLOR']):
-                n_v.r, n_v.g, n_v.b, n_v.a = b_v
+            set_struct_array(n_geom.data.vertex_colors, vertex_information['COLOR'], ('r', 'g', 'b', 'a'))
         # uv_sets
         if bpy.context.scene.niftools_scene.nif_version == 0x14020007 and bpy.context.scene.niftools_scene.user_version_2:
             data_flags = n_geom.data.bs_data_flags
@@ -634,18 +725,14 @@ class Mesh:
                 NifLog.warn(f"More than one UV layers for game that doesn't support it, only using first UV layer")
         if data_flags.has_uv:
             n_geom.data.reset_field("uv_sets")
-            uv_coords = vertex_information['UV']
+            # NIF flips the texture V-coordinate (OpenGL standard)
+            uv_coords = vertex_information['UV'] * (1.0, -1.0) + (0.0, 1.0)
             for j, n_uv_set in enumerate(n_geom.data.uv_sets):
-                for i, n_uv in enumerate(n_uv_set):
-                    if len(uv_coords[i]) == 0:
-                        continue  # skip non-uv textures
-                    n_uv.u = uv_coords[i][j][0]
-                    # NIF flips the texture V-coordinate (OpenGL standard)
-                    n_uv.v = 1.0 - uv_coords[i][j][1]  # opengl standard
+                set_struct_array(n_uv_set, uv_coords[:, j], ('u', 'v'))
         # set triangles stitch strips for civ4
         n_geom.data.set_triangles(triangles, stitchstrips=NifOp.props.stitch_strips)
 
-    def export_skin_partition(self, b_obj, bodypartfacemap, triangles, n_geom):
+    def export_skin_partition(self, b_obj, bodypartfacemap, triangles, n_geom, vertex_weights=None):
         """Attaches a skin partition to n_geom if needed"""
         game = bpy.context.scene.niftools_scene.game
         if NifData.data.version >= 0x04020100 and NifOp.props.skin_partition:
@@ -681,7 +768,8 @@ class Mesh:
                 triangles=triangles,
                 trianglepartmap=bodypartfacemap,
                 maximize_bone_sharing=(game in ('FALLOUT_3', 'FALLOUT_NV', 'SKYRIM')),
-                part_sort_order=part_order)
+                part_sort_order=part_order,
+                vertex_weights=vertex_weights)
 
             if lostweight > NifOp.props.epsilon:
                 NifLog.warn(
@@ -729,10 +817,83 @@ class Mesh:
 
     def get_bone_block(self, b_bone):
         """For a blender bone, return the corresponding nif node from the blocks that have already been exported"""
-        for n_block, b_obj in block_store.block_to_obj.items():
-            if isinstance(n_block, NifClasses.NiNode) and b_bone == b_obj:
-                return n_block
-        raise NifError(f"Bone '{b_bone.name}' not found.")
+        n_block = block_store.get_block_for_obj(b_bone, NifClasses.NiNode)
+        if n_block is None:
+            raise NifError(f"Bone '{b_bone.name}' not found.")
+        return n_block
+
+    def get_vertex_group_weights(self, b_obj, b_mesh, bone_names):
+        """Collects the weights of the vertex groups of b_obj that correspond to bones in a single pass over the
+        vertices of b_mesh, normalised per vertex.
+
+        :param b_obj: The object owning the vertex groups.
+        :type b_obj: :class:`bpy.types.Object`
+        :param b_mesh: The (evaluated) mesh of b_obj.
+        :type b_mesh: :class:`bpy.types.Mesh`
+        :param bone_names: The names of the vertex groups that are bones.
+        :type bone_names: set(str)
+
+        :return: the names of the bone vertex groups, the blender vertex, bone group index and normalised weight of
+            every weight, and the blender vertices without any vertex group
+        :rtype: tuple(list(str), np.ndarray, np.ndarray, np.ndarray, list(int))
+        """
+        bone_group_names = [b_group.name for b_group in b_obj.vertex_groups if b_group.name in bone_names]
+        group_to_bone = np.ones(len(b_obj.vertex_groups), dtype=int) * -1
+        for bone_index, b_bone_name in enumerate(bone_group_names):
+            group_to_bone[b_obj.vertex_groups[b_bone_name].index] = bone_index
+
+        n_verts = len(b_mesh.vertices)
+        vert_num_groups = np.zeros(n_verts, dtype=int)
+        group_weights = []
+        for b_vert in b_mesh.vertices:
+            b_groups = b_vert.groups
+            vert_num_groups[b_vert.index] = len(b_groups)
+            group_weights.extend((b_vert.index, g.group, g.weight) for g in b_groups)
+        group_weights = np.array(group_weights, dtype=float).reshape((-1, 3))
+        # vertices must be assigned at least one vertex group
+        unweighted_vertices = np.flatnonzero(vert_num_groups == 0).tolist()
+
+        # only keep the weights of the bone groups
+        weight_verts = group_weights[:, 0].astype(int)
+        weight_bones = group_to_bone[group_weights[:, 1].astype(int)]
+        weight_values = group_weights[:, 2]
+        is_bone = weight_bones >= 0
+        weight_verts = weight_verts[is_bone]
+        weight_bones = weight_bones[is_bone]
+        weight_values = weight_values[is_bone]
+
+        # normalise the weights per vertex, skipping vertices whose weights sum to zero
+        vert_norm = np.bincount(weight_verts, weights=weight_values, minlength=n_verts)
+        is_normalizable = vert_norm[weight_verts] != 0
+        weight_verts = weight_verts[is_normalizable]
+        weight_bones = weight_bones[is_normalizable]
+        weight_values = weight_values[is_normalizable] / vert_norm[weight_verts]
+        return bone_group_names, weight_verts, weight_bones, weight_values, unweighted_vertices
+
+    @staticmethod
+    def map_vertex_weights(v_nif_to_blend, weight_verts, *weight_arrays):
+        """Maps the weights of blender vertices to all nif vertices that were made from those vertices.
+
+        :param v_nif_to_blend: The blender vertex of every nif vertex.
+        :type v_nif_to_blend: np.ndarray
+        :param weight_verts: The blender vertex of every weight.
+        :type weight_verts: np.ndarray
+        :param weight_arrays: Further per weight arrays, which are repeated for every nif vertex.
+
+        :return: the nif vertex of every mapped weight, followed by the mapped weight_arrays
+        :rtype: tuple(np.ndarray)
+        """
+        n_verts = max(int(np.max(v_nif_to_blend, initial=-1)), int(np.max(weight_verts, initial=-1))) + 1
+        # nif vertices ordered by blender vertex, and the range of nif vertices of every blender vertex
+        blend_to_nif = np.argsort(v_nif_to_blend, kind='stable')
+        vert_counts = np.bincount(v_nif_to_blend, minlength=n_verts)
+        vert_starts = np.cumsum(vert_counts) - vert_counts
+
+        weight_counts = vert_counts[weight_verts]
+        weight_offsets = np.arange(np.sum(weight_counts)) - np.repeat(np.cumsum(weight_counts) - weight_counts,
+                                                                      weight_counts)
+        nif_verts = blend_to_nif[np.repeat(vert_starts[weight_verts], weight_counts) + weight_offsets]
+        return (nif_verts, *(np.repeat(weight_array, weight_counts) for weight_array in weight_arrays))
 
     def get_polygon_parts(self, b_obj, b_mesh):
         """Returns the body part indices of the mesh polygons. -1 is either not assigned to a face map or not a valid
@@ -766,12 +927,8 @@ class Mesh:
         else:
             n_root_name = block_store.get_full_name(b_obj_armature)
         # make sure that such a block exists, find it
-        for block in block_store.block_to_obj:
-            if isinstance(block, NifClasses.NiNode):
-                if block.name == n_root_name:
-                    skininst.skeleton_root = block
-                    break
-        else:
+        skininst.skeleton_root = block_store.get_block_by_name(n_root_name, NifClasses.NiNode)
+        if skininst.skeleton_root is None:
             raise NifError(f"Skeleton root '{n_root_name}' not found.")
 
         # create skinning data and link it
@@ -938,8 +1095,6 @@ class Mesh:
             # XXX used to be 61440
             # XXX from Sid Meier's Railroad
             n_geom.data.reset_field("tangents")
-            for n_v, b_v in zip(n_geom.data.tangents, tangents):
-                n_v.x, n_v.y, n_v.z = b_v
+            set_struct_array(n_geom.data.tangents, tangents, ('x', 'y', 'z'))
             n_geom.data.reset_field("bitangents")
-            for n_v, b_v in zip(n_geom.data.bitangents, bitangents):
-                n_v.x, n_v.y, n_v.z = b_v
+            set_struct_array(n_geom.data.bitangents, bitangents, ('x', 'y', 'z'))
@@ -36,18 +36,22 @@
 #
 # ***** END LICENSE BLOCK *****
 
-from itertools import repeat
+import heapq
 import logging
+import numpy as np
 from nifgen.utils.vertex_cache import get_cache_optimized_triangles, stable_stripify
 from nifgen.formats.nif import classes as NifClasses
 
+from io_scene_niftools.utils.arrays import set_array, set_struct_array
+
 def update_skin_partition(self,
                         maxbonesperpartition=4, maxbonespervertex=4,
                         verbose=0, stripify=True, stitchstrips=False,
                         padbones=False,
                         triangles=None, trianglepartmap=None,
                         maximize_bone_sharing=False,
-                        part_sort_order=[]):
+                        part_sort_order=[],
+                        vertex_weights=None):
     """Recalculate skin partition data.
 
     :deprecated: Do not use the verbose argument.
@@ -79,13 +83,11 @@ def update_skin_partition(self,
         they should appear, e.g. [5, 3, 6]. The first entry is counted. When
         maximize_bone_sharing is true, sorts the parts within the shared bones,
         and sorts the shared bone lists based on its first body part.
+    :param vertex_weights: The (vertex, bone, weight) arrays of the skin. If
+        not specified, the weights are read from the skin data.
     """
     logger = logging.getLogger("nifgen.nif.nitribasedgeom")
 
-    # if trianglepartmap not specified, map everything to index 0
-    if trianglepartmap is None:
-        trianglepartmap = repeat(0)
-
     # shortcuts relevant blocks
     if not self.skin_instance:
         # no skin, nothing to do
@@ -95,16 +97,29 @@ def update_skin_partition(self,
     skininst = self.skin_instance
     skindata = skininst.data
 
-    # get skindata vertex weights
+    # get skindata vertex weights, as (vertex, bone, weight) arrays ordered by vertex and bone
     logger.debug("Getting vertex weights.")
-    weights = self.get_vertex_weights()
+    if vertex_weights is None:
+        weights = self.get_vertex_weights()
+        num_vertices = len(weights)
+        vertex_weights = (
+            np.array([v for v, weight in enumerate(weights) for bonenum, boneweight in weight], dtype=int),
+            np.array([bonenum for weight in weights for bonenum, boneweight in weight], dtype=int),
+            np.array([boneweight for weight in weights for bonenum, boneweight in weight], dtype=float))
+    else:
+        num_vertices = geomdata.num_vertices
+    weight_verts, weight_bones, weight_values = (np.asarray(array) for array in vertex_weights)
+    weight_order = np.lexsort((weight_bones, weight_verts))
+    weight_verts = weight_verts[weight_order].astype(int)
+    weight_bones = weight_bones[weight_order].astype(int)
+    weight_values = weight_values[weight_order].astype(float)
 
     # count minimum and maximum number of bones per vertex
-    minbones = min(len(weight) for weight in weights)
-    maxbones = max(len(weight) for weight in weights)
+    vert_num_bones = np.bincount(weight_verts, minlength=num_vertices)
+    minbones = int(np.min(vert_num_bones)) if num_vertices else 0
+    maxbones = int(np.max(vert_num_bones)) if num_vertices else 0
     if minbones <= 0:
-        noweights = [v for v, weight in enumerate(weights)
-                     if not weight]
+        noweights = np.flatnonzero(vert_num_bones == 0).tolist()
         #raise ValueError(
         logger.warn(
             'bad NiSkinData: some vertices have no weights %s'
@@ -114,22 +129,8 @@ def update_skin_partition(self,
 
     # reduce bone influences to meet maximum number of bones per vertex
     logger.info("Imposing maximum of %i bones per vertex." % maxbonespervertex)
-    lostweight = 0.0
-    for weight in weights:
-        if len(weight) > maxbonespervertex:
-            # delete bone influences with least weight
-            weight.sort(key=lambda x: x[1], reverse=True) # sort by weight
-            # save lost weight to return to user
-            lostweight = max(
-                lostweight, max(
-                    [x[1] for x in weight[maxbonespervertex:]]))
-            del weight[maxbonespervertex:] # only keep first elements
-            # normalize
-            totalweight = sum([x[1] for x in weight]) # sum of all weights
-            for x in weight: x[1] /= totalweight
-            maxbones = maxbonespervertex
-        # sort by again by bone (relied on later when matching vertices)
-        weight.sort(key=lambda x: x[0])
+    weight_verts, weight_bones, weight_values, lostweight = _trim_vertex_weights(
+        weight_verts, weight_bones, weight_values, maxbonespervertex)
 
     # reduce bone influences to meet maximum number of bones per partition
     # (i.e. maximum number of bones per triangle)
@@ -139,139 +140,24 @@ def update_skin_partition(self,
 
     if triangles is None:
         triangles = geomdata.get_triangles()
+    triangles = np.array([tuple(tri) for tri in triangles], dtype=int).reshape((-1, 3))
+    # if trianglepartmap not specified, map everything to index 0
+    if trianglepartmap is None:
+        trianglepartmap = np.zeros(len(triangles), dtype=int)
+    trianglepartmap = np.asarray(trianglepartmap).reshape(-1)
 
-    for tri in triangles:
-        while True:
-            # find the bones influencing this triangle
-            tribones = []
-            for t in tri:
-                tribones.extend([bonenum for bonenum, boneweight in weights[t]])
-            tribones = set(tribones)
-            # target met?
-            if len(tribones) <= maxbonesperpartition:
-                break
-            # no, need to remove a bone
-
-            # sum weights for each bone to find the one that least influences
-            # this triangle
-            tribonesweights = {}
-            for bonenum in tribones: tribonesweights[bonenum] = 0.0
-            nono = set() # bones with weight 1 cannot be removed
-            for skinweights in [weights[t] for t in tri]:
-                # skinweights[0] is the first skinweight influencing vertex t
-                # and skinweights[0][0] is the bone number of that bone
-                if len(skinweights) == 1: nono.add(skinweights[0][0])
-                for bonenum, boneweight in skinweights:
-                    tribonesweights[bonenum] += boneweight
-
-            # select a bone to remove
-            # first find bones we can remove
-
-            # restrict to bones not in the nono set
-            tribonesweights = [
-                x for x in list(tribonesweights.items()) if x[0] not in nono]
-            if not tribonesweights:
-                raise ValueError(
-                    "cannot remove anymore bones in this skin; "
-                    "increase maxbonesperpartition and try again")
-            # sort by vertex weight sum the last element of this list is now a
-            # candidate for removal
-            tribonesweights.sort(key=lambda x: x[1], reverse=True)
-            minbone = tribonesweights[-1][0]
-
-            # remove minbone from all vertices of this triangle and from all
-            # matching vertices
-            for t in tri:
-                for tt in [t]: #match[t]:
-                    # remove bone
-                    weight = weights[tt]
-                    for i, (bonenum, boneweight) in enumerate(weight):
-                        if bonenum == minbone:
-                            # save lost weight to return to user
-                            lostweight = max(lostweight, boneweight)
-                            del weight[i]
-                            break
-                    else:
-                        continue
-                    # normalize
-                    totalweight = sum([x[1] for x in weight])
-                    for x in weight:
-                        x[1] /= totalweight
+    num_bones = int(np.max(weight_bones, initial=-1)) + 1
+    tribones = _get_triangle_bones(triangles, weight_verts, weight_bones, num_vertices, num_bones)
+    overfull = np.flatnonzero(_count_bits(tribones) > maxbonesperpartition)
+    if len(overfull):
+        weight_verts, weight_bones, weight_values, tri_lostweight = _limit_triangle_bones(
+            triangles[overfull], weight_verts, weight_bones, weight_values, maxbonesperpartition)
+        lostweight = max(lostweight, tri_lostweight)
+        tribones = _get_triangle_bones(triangles, weight_verts, weight_bones, num_vertices, num_bones)
 
     # split triangles into partitions
     logger.info("Creating partitions")
-    parts = []
-    # keep creating partitions as long as there are triangles left
-    while len(triangles) > 0:
-        # create a partition
-        part = [set(), [], None] # bones, triangles, partition index
-        usedverts = set()
-        addtriangles = True
-        # keep adding triangles to it as long as the flag is set
-        while addtriangles:
-            # newtriangles is a list of triangles that have not been added to
-            # the partition, similar for newtrianglepartmap
-            newtriangles = []
-            newtrianglepartmap = []
-            for tri, partindex in zip(triangles, trianglepartmap):
-                # find the bones influencing this triangle
-                tribones = []
-                for t in tri:
-                    tribones.extend([
-                        bonenum for bonenum, boneweight in weights[t]])
-                tribones = set(tribones)
-                # if part has no bones,
-                # or if part has all bones of tribones and index coincides
-                # then add this triangle to this part
-                if ((not part[0])
-                    or ((part[0] >= tribones) and (part[2] == partindex))):
-                    part[0] |= tribones
-                    part[1].append(tri)
-                    usedverts |= set(tri)
-                    # if part was empty, assign it the index
-                    if part[2] is None:
-                        part[2] = partindex
-                else:
-                    newtriangles.append(tri)
-                    newtrianglepartmap.append(partindex)
-            triangles = newtriangles
-            trianglepartmap = newtrianglepartmap
-
-            # if we have room left in the partition
-            # then add adjacent triangles
-            addtriangles = False
-            newtriangles = []
-            newtrianglepartmap = []
-            if len(part[0]) < maxbonesperpartition:
-                for tri, partindex in zip(triangles, trianglepartmap):
-                    # if triangle is adjacent, and has same index
-                    # then check if it can be added to the partition
-                    if (usedverts & set(tri)) and (part[2] == partindex):
-                        # find the bones influencing this triangle
-                        tribones = []
-                        for t in tri:
-                            tribones.extend([
-                                bonenum for bonenum, boneweight in weights[t]])
-                        tribones = set(tribones)
-                        # and check if we exceed the maximum number of allowed
-                        # bones
-                        if len(part[0] | tribones) <= maxbonesperpartition:
-                            part[0] |= tribones
-                            part[1].append(tri)
-                            usedverts |= set(tri)
-                            # signal another try in adding triangles to
-                            # the partition
-                            addtriangles = True
-                        else:
-                            newtriangles.append(tri)
-                            newtrianglepartmap.append(partindex)
-                    else:
-                        newtriangles.append(tri)
-                        newtrianglepartmap.append(partindex)
-                triangles = newtriangles
-                trianglepartmap = newtrianglepartmap
-
-        parts.append(part)
+    parts = _create_partitions(triangles, trianglepartmap, tribones, maxbonesperpartition, num_vertices)
 
     logger.info("Created %i small partitions." % len(parts))
 
@@ -435,6 +321,9 @@ def update_skin_partition(self,
             # store part for next iteration
             lastpart = part
 
+    # weights of each vertex are contiguous, ordered by bone
+    vert_weight_starts = np.searchsorted(weight_verts, np.arange(num_vertices + 1))
+
     for skinpartblock, part in zip(skinpart.partitions, parts):
         # get sorted list of bones
         bones = sorted(list(part[0]))
@@ -448,7 +337,6 @@ def update_skin_partition(self,
             triangles, stitchstrips=stitchstrips)
         triangles_size = 3 * len(triangles)
         strips_size = len(strips) + sum(len(strip) for strip in strips)
-        vertices = []
         # decide whether to use strip or triangles as primitive
         if stripify is None:
             stripifyblock = (
@@ -459,25 +347,18 @@ def update_skin_partition(self,
         if stripifyblock:
             # stripify the triangles
             # also update triangle list
-            numtriangles = 0
-            # calculate number of triangles and get sorted
-            # list of vertices
+            numtriangles = sum(len(strip) - 2 for strip in strips)
+            # get sorted list of vertices
             # for optimal performance, vertices must be sorted
             # by strip
-            for strip in strips:
-                numtriangles += len(strip) - 2
-                for t in strip:
-                    if t not in vertices:
-                        vertices.append(t)
+            vertices = list(dict.fromkeys(int(t) for strip in strips for t in strip))
         else:
             numtriangles = len(triangles)
             # get sorted list of vertices
             # for optimal performance, vertices must be sorted
             # by triangle
-            for tri in triangles:
-                for t in tri:
-                    if t not in vertices:
-                        vertices.append(t)
+            vertices = list(dict.fromkeys(int(t) for tri in triangles for t in tri))
+        vertex_indices = {v: i for i, v in enumerate(vertices)}
         # set all the data
         skinpartblock.num_vertices = len(vertices)
         skinpartblock.num_triangles = numtriangles
@@ -500,31 +381,24 @@ def update_skin_partition(self,
         # are fewer
         skinpartblock.num_weights_per_vertex = maxbonespervertex
         skinpartblock.reset_field("bones")
-        for i, bonenum in enumerate(bones):
-            skinpartblock.bones[i] = bonenum
-        for i in range(len(bones), skinpartblock.num_bones):
-            skinpartblock.bones[i] = 0 # dummy bone slots refer to first bone
+        # dummy bone slots refer to first bone
+        set_array(skinpartblock.bones, bones + [0] * (skinpartblock.num_bones - len(bones)))
         skinpartblock.has_vertex_map = True
         skinpartblock.reset_field("vertex_map")
-        for i, v in enumerate(vertices):
-            skinpartblock.vertex_map[i] = v
+        set_array(skinpartblock.vertex_map, vertices)
+        bone_indices, vertex_weights = _get_partition_weights(
+            np.array(vertices, dtype=int), bones, vert_weight_starts, weight_bones, weight_values,
+            skinpartblock.num_bones, skinpartblock.num_weights_per_vertex, padbones)
         skinpartblock.has_vertex_weights = True
         skinpartblock.reset_field("vertex_weights")
-        for i, v in enumerate(vertices):
-            for j in range(skinpartblock.num_weights_per_vertex):
-                if j < len(weights[v]):
-                    skinpartblock.vertex_weights[i][j] = weights[v][j][1]
-                else:
-                    skinpartblock.vertex_weights[i][j] = 0.0
+        set_array(skinpartblock.vertex_weights, vertex_weights)
         if stripifyblock:
             skinpartblock.has_faces = True
             skinpartblock.reset_field("strip_lengths")
-            for i, strip in enumerate(strips):
-                skinpartblock.strip_lengths[i] = len(strip)
+            set_array(skinpartblock.strip_lengths, [len(strip) for strip in strips])
             skinpartblock.reset_field("strips")
-            for i, strip in enumerate(strips):
-                for j, v in enumerate(strip):
-                    skinpartblock.strips[i][j] = vertices.index(v)
+            for n_strip, strip in zip(skinpartblock.strips, strips):
+                set_array(n_strip, [vertex_indices[v] for v in strip])
         else:
             skinpartblock.has_faces = True
             # clear strip lengths array
@@ -532,43 +406,270 @@ def update_skin_partition(self,
             # clear strips array
             skinpartblock.reset_field("strips")
             skinpartblock.reset_field("triangles")
-            for i, (v_1,v_2,v_3) in enumerate(triangles):
-                skinpartblock.triangles[i].v_1 = vertices.index(v_1)
-                skinpartblock.triangles[i].v_2 = vertices.index(v_2)
-                skinpartblock.triangles[i].v_3 = vertices.index(v_3)
+            set_struct_array(skinpartblock.triangles,
+                             [[vertex_indices[v] for v in tri] for tri in triangles],
+                             ('v_1', 'v_2', 'v_3'))
         skinpartblock.has_bone_indices = True
         skinpartblock.reset_field("bone_indices")
-        for i, v in enumerate(vertices):
-            # the boneindices set keeps track of indices that have not been
-            # used yet
-            boneindices = set(range(skinpartblock.num_bones))
-            for j in range(len(weights[v])):
-                skinpartblock.bone_indices[i][j] = bones.index(weights[v][j][0])
-                boneindices.remove(skinpartblock.bone_indices[i][j])
-            for j in range(len(weights[v]),skinpartblock.num_weights_per_vertex):
-                if padbones:
-                    # if padbones is True then we have enforced
-                    # num_bones == num_weights_per_vertex so this will not trigger
-                    # a KeyError
-                    skinpartblock.bone_indices[i][j] = boneindices.pop()
-                else:
-                    skinpartblock.bone_indices[i][j] = 0
-
-        # sort weights
-        for i, v in enumerate(vertices):
-            vweights = []
-            for j in range(skinpartblock.num_weights_per_vertex):
-                vweights.append([
-                    skinpartblock.bone_indices[i][j],
-                    skinpartblock.vertex_weights[i][j]])
-            if padbones:
-                # by bone index (for ffvt3r)
-                vweights.sort(key=lambda w: w[0])
-            else:
-                # by weight (for fallout 3, largest weight first)
-                vweights.sort(key=lambda w: -w[1])
-            for j in range(skinpartblock.num_weights_per_vertex):
-                skinpartblock.bone_indices[i][j] = vweights[j][0]
-                skinpartblock.vertex_weights[i][j] = vweights[j][1]
+        set_array(skinpartblock.bone_indices, bone_indices)
 
     return lostweight
+
+
+def _trim_vertex_weights(weight_verts, weight_bones, weight_values, maxbonespervertex):
+    """Deletes the bone influences with least weight from vertices with more than maxbonespervertex bones, and
+    normalizes the remaining weights of those vertices.
+
+    :return: The trimmed (vertex, bone, weight) arrays, ordered by vertex and bone, and the largest weight removed.
+    """
+    # rank the influences of each vertex by weight
+    order = np.lexsort((weight_bones, -weight_values, weight_verts))
+    starts = np.searchsorted(weight_verts[order], weight_verts[order], side='left')
+    rank = np.empty(len(order), dtype=int)
+    rank[order] = np.arange(len(order)) - starts
+    keep = rank < maxbonespervertex
+    if np.all(keep):
+        return weight_verts, weight_bones, weight_values, 0.0
+    # save lost weight to return to user
+    lostweight = float(np.max(weight_values[~keep]))
+    trimmed = np.zeros(int(np.max(weight_verts)) + 1, dtype=bool)
+    trimmed[weight_verts[~keep]] = True
+    weight_verts = weight_verts[keep]
+    weight_bones = weight_bones[keep]
+    weight_values = weight_values[keep]
+    # normalize
+    totals = np.bincount(weight_verts, weights=weight_values, minlength=len(trimmed))
+    renormalize = trimmed[weight_verts]
+    weight_values[renormalize] /= totals[weight_verts[renormalize]]
+    return weight_verts, weight_bones, weight_values, lostweight
+
+
+def _get_triangle_bones(triangles, weight_verts, weight_bones, num_vertices, num_bones):
+    """Returns the set of bones influencing each triangle, as rows of 64 bit words."""
+    num_words = max(1, (num_bones + 63) // 64)
+    vertex_bones = np.zeros((num_vertices, num_words), dtype=np.uint64)
+    np.bitwise_or.at(vertex_bones, (weight_verts, weight_bones // 64),
+                     np.left_shift(np.uint64(1), (weight_bones % 64).astype(np.uint64)))
+    return vertex_bones[triangles[:, 0]] | vertex_bones[triangles[:, 1]] | vertex_bones[triangles[:, 2]]
+
+
+def _count_bits(words):
+    """Returns the number of bits set in each row of words."""
+    return np.unpackbits(np.ascontiguousarray(words).view(np.uint8), axis=1).sum(axis=1, dtype=int)
+
+
+def _limit_triangle_bones(triangles, weight_verts, weight_bones, weight_values, maxbonesperpartition):
+    """Removes the least influencing bones from the given triangles until they meet maxbonesperpartition.
+
+    Only the weights of the vertices of these triangles are touched, so callers pass the triangles that exceed the
+    limit, in their original order.
+
+    :return: The updated (vertex, bone, weight) arrays, ordered by vertex and bone, and the largest weight removed.
+    """
+    lostweight = 0.0
+    starts = np.searchsorted(weight_verts, np.arange(int(np.max(triangles)) + 2))
+    weights = {}
+    for v in np.unique(triangles).tolist():
+        weights[v] = [[bonenum, boneweight] for bonenum, boneweight in
+                      zip(weight_bones[starts[v]:starts[v + 1]].tolist(),
+                          weight_values[starts[v]:starts[v + 1]].tolist())]
+
+    for tri in triangles.tolist():
+        while True:
+            # find the bones influencing this triangle
+            tribones = []
+            for t in tri:
+                tribones.extend([bonenum for bonenum, boneweight in weights[t]])
+            tribones = set(tribones)
+            # target met?
+            if len(tribones) <= maxbonesperpartition:
+                break
+            # no, need to remove a bone
+
+            # sum weights for each bone to find the one that least influences
+            # this triangle
+            tribonesweights = {}
+            for bonenum in tribones: tribonesweights[bonenum] = 0.0
+            nono = set() # bones with weight 1 cannot be removed
+            for skinweights in [weights[t] for t in tri]:
+                # skinweights[0] is the first skinweight influencing vertex t
+                # and skinweights[0][0] is the bone number of that bone
+                if len(skinweights) == 1: nono.add(skinweights[0][0])
+                for bonenum, boneweight in skinweights:
+                    tribonesweights[bonenum] += boneweight
+
+            # select a bone to remove
+            # first find bones we can remove
+
+            # restrict to bones not in the nono set
+            tribonesweights = [
+                x for x in list(tribonesweights.items()) if x[0] not in nono]
+            if not tribonesweights:
+                raise ValueError(
+                    "cannot remove anymore bones in this skin; "
+                    "increase maxbonesperpartition and try again")
+            # sort by vertex weight sum the last element of this list is now a
+            # candidate for removal
+            tribonesweights.sort(key=lambda x: x[1], reverse=True)
+            minbone = tribonesweights[-1][0]
+
+            # remove minbone from all vertices of this triangle
+            for t in tri:
+                weight = weights[t]
+                for i, (bonenum, boneweight) in enumerate(weight):
+                    if bonenum == minbone:
+                        # save lost weight to return to user
+                        lostweight = max(lostweight, boneweight)
+                        del weight[i]
+                        break
+                else:
+                    continue
+                # normalize
+                totalweight = sum([x[1] for x in weight])
+                for x in weight:
+                    x[1] /= totalweight
+
+    # replace the weights of the touched vertices
+    untouched = ~np.isin(weight_verts, list(weights))
+    touched = [(v, bonenum, boneweight) for v, weight in weights.items() for bonenum, boneweight in weight]
+    touched = np.array(touched, dtype=float).reshape((-1, 3))
+    weight_verts = np.concatenate((weight_verts[untouched], touched[:, 0].astype(int)))
+    weight_bones = np.concatenate((weight_bones[untouched], touched[:, 1].astype(int)))
+    weight_values = np.concatenate((weight_values[untouched], touched[:, 2]))
+    order = np.lexsort((weight_bones, weight_verts))
+    return weight_verts[order], weight_bones[order], weight_values[order], lostweight
+
+
+def _create_partitions(triangles, trianglepartmap, tribones, maxbonesperpartition, num_vertices):
+    """Splits the triangles into partitions of at most maxbonesperpartition bones.
+
+    A partition is seeded by the first remaining triangle and then repeatedly grown by all remaining triangles whose
+    bones it already has, and by adjacent triangles that fit in its bone budget, visiting triangles in their original
+    order. Adjacent triangles are found through a vertex to triangle index instead of rescanning all triangles.
+
+    :return: List of partitions, as [set of bones, list of triangles, partition index].
+    """
+    num_triangles = len(triangles)
+    num_words = tribones.shape[1]
+    # the bones of each triangle as a single integer, for cheap unions
+    tribone_bits = [0] * num_triangles
+    for word in range(num_words):
+        tribone_bits = [bits | (value << (64 * word)) for bits, value in
+                        zip(tribone_bits, tribones[:, word].tolist())]
+    has_bones = np.any(tribones != 0, axis=1)
+    tri_list = [tuple(tri) for tri in triangles.tolist()]
+    partindices = trianglepartmap.tolist()
+    # triangles of each vertex, in triangle order
+    vertex_order = np.argsort(triangles.reshape(-1), kind='stable')
+    vertex_tris = (vertex_order // 3).tolist()
+    vertex_starts = np.searchsorted(triangles.reshape(-1)[vertex_order], np.arange(num_vertices + 1)).tolist()
+
+    remaining = np.ones(num_triangles, dtype=bool)
+    remaining_tris = np.arange(num_triangles)
+    # the partition in which a triangle was last queued as adjacent triangle
+    queued = [-1] * num_triangles
+
+    def part_words(bits):
+        return np.array([(bits >> (64 * word)) & 0xFFFFFFFFFFFFFFFF for word in range(num_words)], dtype=np.uint64)
+
+    parts = []
+    # keep creating partitions as long as there are triangles left
+    while len(remaining_tris):
+        part_number = len(parts)
+        part_tris = []
+        usedverts = set()
+        # triangles adjacent to the partition, to be visited in this and the next pass
+        adjacent = []
+        next_adjacent = []
+
+        def add_triangles(tris, cursor=None):
+            """Adds tris to the partition and queues the newly adjacent triangles."""
+            for tri_index in tris:
+                remaining[tri_index] = False
+                part_tris.append(tri_list[tri_index])
+                for v in tri_list[tri_index]:
+                    if v in usedverts:
+                        continue
+                    usedverts.add(v)
+                    for other in vertex_tris[vertex_starts[v]:vertex_starts[v + 1]]:
+                        if queued[other] != part_number and partindices[other] == partindex:
+                            queued[other] = part_number
+                            if cursor is None or other > cursor:
+                                heapq.heappush(adjacent, other)
+                            else:
+                                next_adjacent.append(other)
+
+        # if part has no bones, then it takes all triangles up to and including the first one with bones
+        with_bones = np.flatnonzero(has_bones[remaining_tris])
+        seed_end = with_bones[0] + 1 if len(with_bones) else len(remaining_tris)
+        partindex = partindices[remaining_tris[0]]
+        bits = 0
+        for tri_index in remaining_tris[:seed_end].tolist():
+            bits |= tribone_bits[tri_index]
+        add_triangles(remaining_tris[:seed_end].tolist())
+        checked_bits = None
+        while True:
+            # add all triangles whose bones are all in the part
+            if bits and bits != checked_bits:
+                candidates = remaining_tris[remaining[remaining_tris]]
+                candidates = candidates[trianglepartmap[candidates] == partindex]
+                subset = np.all((tribones[candidates] & ~part_words(bits)) == 0, axis=1)
+                add_triangles(candidates[subset].tolist())
+                checked_bits = bits
+            # if we have room left in the partition
+            # then add adjacent triangles
+            if bin(bits).count("1") >= maxbonesperpartition:
+                break
+            added = False
+            while adjacent:
+                tri_index = heapq.heappop(adjacent)
+                if not remaining[tri_index]:
+                    continue
+                # check if we exceed the maximum number of allowed bones
+                new_bits = bits | tribone_bits[tri_index]
+                if bin(new_bits).count("1") <= maxbonesperpartition:
+                    bits = new_bits
+                    add_triangles((tri_index,), cursor=tri_index)
+                    added = True
+            if not added:
+                break
+            adjacent = next_adjacent
+            heapq.heapify(adjacent)
+            next_adjacent = []
+
+        bones = set(bone for bone in range(64 * num_words) if (bits >> bone) & 1)
+        parts.append([bones, part_tris, partindex])
+        remaining_tris = remaining_tris[remaining[remaining_tris]]
+    return parts
+
+
+def _get_partition_weights(vertices, bones, vert_weight_starts, weight_bones, weight_values,
+                           num_bones, num_weights_per_vertex, padbones):
+    """Returns the bone indices and vertex weights of a partition, with num_weights_per_vertex entries per vertex.
+
+    :return: Bone indices into bones, and weights, as arrays of shape (len(vertices), num_weights_per_vertex).
+    """
+    starts = vert_weight_starts[vertices]
+    counts = vert_weight_starts[vertices + 1] - starts
+    rows = np.repeat(np.arange(len(vertices)), counts)
+    columns = np.arange(len(rows)) - np.repeat(np.cumsum(counts) - counts, counts)
+    sources = np.repeat(starts, counts) + columns
+    bone_indices = np.zeros((len(vertices), num_weights_per_vertex), dtype=int)
+    vertex_weights = np.zeros((len(vertices), num_weights_per_vertex), dtype=float)
+    bone_indices[rows, columns] = np.searchsorted(bones, weight_bones[sources])
+    vertex_weights[rows, columns] = weight_values[sources]
+    if padbones:
+        # if padbones is True then we have enforced num_bones == num_weights_per_vertex, so the unused bone
+        # indices fill the remaining slots, lowest first
+        used = np.zeros((len(vertices), num_bones), dtype=bool)
+        used[rows, bone_indices[rows, columns]] = True
+        unused = np.argsort(used, axis=1, kind='stable')
+        slots = np.arange(num_weights_per_vertex) - counts[:, None]
+        padding = slots >= 0
+        bone_indices[padding] = np.take_along_axis(unused, np.maximum(slots, 0), axis=1)[padding]
+        # sort by bone index (for ffvt3r)
+        order = np.argsort(bone_indices, axis=1, kind='stable')
+    else:
+        # sort by weight (for fallout 3, largest weight first)
+        order = np.argsort(-vertex_weights, axis=1, kind='stable')
+    return np.take_along_axis(bone_indices, order, axis=1), np.take_along_axis(vertex_weights, order, axis=1)
@@ -208,8 +208,7 @@ class Object:
                 if b_child.parent_bone:
                     b_obj_bone = b_obj.data.bones[b_child.parent_bone]
                     # find the correct n_node
-                    # todo [object] this is essentially the same as Mesh.get_bone_block()
-                    n_node = [k for k, v in block_store.block_to_obj.items() if v == b_obj_bone][0]
+                    n_node = block_store.get_block_for_obj(b_obj_bone)
                     self.export_node(b_child, n_node)
                 # just child of the armature itself, so attach to armature root
                 else:
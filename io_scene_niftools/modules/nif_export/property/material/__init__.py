@@ -107,25 +107,20 @@ class MaterialProp:
 
         # search for duplicate
         # (ignore the name string as sometimes import needs to create different materials even when NiMaterialProperty is the same)
-        for n_block in block_store.block_to_obj:
-            if not isinstance(n_block, NifClasses.NiMaterialProperty):
-                continue
-
-            # when optimization is enabled, ignore material name
-            if EXPORT_OPTIMIZE_MATERIALS:
-                ignore_strings = not(n_block.name in specialnames)
-            else:
-                ignore_strings = False
-
-            # check hash
-            first_index = 1 if ignore_strings else 0
-            if n_block.get_hash()[first_index:] == n_mat_prop.get_hash()[first_index:]:
-                NifLog.warn(f"Merging materials '{n_mat_prop.name}' and '{n_block.name}' (they are identical in nif)")
-                n_mat_prop = n_block
-                break
+        # materials are shared without their name, unless it is a special name
+        n_block = block_store.get_shared_block(block_store.get_content_key(n_mat_prop, first_index=1))
+        if n_block is None:
+            n_block = block_store.get_shared_block(block_store.get_content_key(n_mat_prop))
+        if n_block is not None:
+            NifLog.warn(f"Merging materials '{n_mat_prop.name}' and '{n_block.name}' (they are identical in nif)")
+            n_mat_prop = n_block
 
         block_store.register_block(n_mat_prop)
         # material animation
         self.material_anim.export_material(b_mat, n_mat_prop)
-        # no material property with given settings found, so use and register the new one
+        # share it with its controllers, so animated materials are only merged with identical animations
+        # when optimization is enabled, ignore material name
+        ignore_strings = EXPORT_OPTIMIZE_MATERIALS and n_mat_prop.name not in specialnames
+        block_store.share_block(block_store.get_content_key(n_mat_prop, first_index=1 if ignore_strings else 0),
+                                n_mat_prop)
         return n_mat_prop
@@ -103,30 +103,21 @@ class ObjectProperty:
 
     def get_matching_block(self, block_type, **kwargs):
         """Try to find a block matching block_type. Keyword arguments are a dict of parameters and required attributes of the block"""
-        # go over all blocks of block_type
+        # blocks are shared by type and the values of their required attributes
+        attributes = {param: attribute for param, attribute in kwargs.items() if attribute is not None}
+        key = (block_type, tuple(sorted(attributes.items())))
 
         NifLog.debug(f"Looking for {block_type} block. Kwargs: {kwargs}")
-        for block in block_store.block_to_obj:
-            # if isinstance(block, block_type):
-            if block_type in str(type(block)):
-                # skip blocks that don't match additional conditions
-                for param, attribute in kwargs.items():
-                    # now skip this block if any of the conditions does not match
-                    if attribute is not None:
-                        ret_attr = getattr(block, param, None)
-                        if ret_attr != attribute:
-                            NifLog.debug(f"break, {param} != {attribute}, returns {ret_attr}")
-                            break
-                else:
-                    # we did not break out of the loop, so all checks went through, so we can use this block
-                    NifLog.debug(f"Found existing {block_type} block matching all criteria!")
-                    return block
-        # we are still here, so we must create a block of this type and set all attributes accordingly
+        block = block_store.get_shared_block(key)
+        if block is not None:
+            NifLog.debug(f"Found existing {block_type} block matching all criteria!")
+            return block
+        # we must create a block of this type and set all attributes accordingly
         NifLog.debug(f"Created new {block_type} block because none matched the required criteria!")
         block = block_store.create_block(block_type)
-        for param, attribute in kwargs.items():
-            if attribute is not None:
-                setattr(block, param, attribute)
+        for param, attribute in attributes.items():
+            setattr(block, param, attribute)
+        block_store.share_block(key, block)
         return block
 
     def export_root_node_properties(self, n_root):
@@ -39,6 +39,7 @@
 from nifgen.formats.nif import classes as NifClasses
 
 import io_scene_niftools.utils.logging
+from io_scene_niftools.modules.nif_export.block_registry import block_store
 from io_scene_niftools.modules.nif_export.property.texture.types.bsshadertexture import BSShaderTexture
 from io_scene_niftools.utils import math
 from io_scene_niftools.utils.consts import FLOAT_MAX
@@ -68,6 +69,12 @@ class BSShaderProperty:
         if b_mat.niftools_shader.bs_shadertype == 'BSEffectShaderProperty':
             bsshader = self.export_bs_effect_shader_property(b_mat)
 
+        # search for duplicate
+        key = block_store.get_content_key(bsshader)
+        n_block = block_store.get_shared_block(key)
+        if n_block is not None:
+            return n_block
+        block_store.share_block(key, bsshader)
         return bsshader
 
     def export_bs_effect_shader_property(self, b_mat):
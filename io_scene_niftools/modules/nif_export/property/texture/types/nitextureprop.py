@@ -95,12 +95,14 @@ class NiTextureProp(TextureSlotManager):
         self.export_nitextureprop_tex_descs(texprop)
 
         # search for duplicate
-        for n_block in block_store.block_to_obj:
-            if isinstance(n_block, NifClasses.NiTexturingProperty) and n_block.get_hash() == texprop.get_hash():
-                return n_block
+        key = block_store.get_content_key(texprop)
+        n_block = block_store.get_shared_block(key)
+        if n_block is not None:
+            return n_block
 
         # no texturing property with given settings found, so use and register
         # the new one
+        block_store.share_block(key, texprop)
         return texprop
 
     def export_nitextureprop_tex_descs(self, texprop):
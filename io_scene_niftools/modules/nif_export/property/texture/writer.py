@@ -86,11 +86,13 @@ class TextureWriter:
         srctex.unknown_byte = 1
 
         # search for duplicate
-        for block in block_store.block_to_obj:
-            if isinstance(block, NifClasses.NiSourceTexture) and block.get_hash() == srctex.get_hash():
-                return block
+        key = block_store.get_content_key(srctex)
+        block = block_store.get_shared_block(key)
+        if block is not None:
+            return block
 
         # no identical source texture found, so use and register the new one
+        block_store.share_block(key, srctex)
         return block_store.register_block(srctex, n_texture)
 
     def export_tex_desc(self, texdesc=None, uv_set=0, b_texture_node=None):
@@ -37,9 +37,11 @@
 #
 # ***** END LICENSE BLOCK *****
 import bpy
+import numpy as np
 
 from nifgen.formats.nif import classes as NifClasses
 
+from io_scene_niftools.file_io import kf
 from io_scene_niftools.utils.logging import NifLog
 from io_scene_niftools.utils.consts import QUAT, EULER, LOC, SCALE
 
@@ -58,14 +60,7 @@ class Animation:
     @staticmethod
     def get_controller_data(ctrl):
         """Return data for ctrl, look in interpolator (for newer games) or directly on ctrl"""
-        if hasattr(ctrl, 'interpolator') and ctrl.interpolator:
-            data = ctrl.interpolator.data
-        else:
-            data = ctrl.data
-        # these have their data set as a KeyGroup on data
-        if isinstance(data, (NifClasses.NiBoolData, NifClasses.NiFloatData, NifClasses.NiPosData)):
-            return data.data
-        return data
+        return kf.get_controller_data(ctrl)
 
     @staticmethod
     def get_keys_values(items):
@@ -163,24 +158,30 @@ class Animation:
         """
         Create needed fcurves and add a list of keys to an action.
         """
-        samples = [round(t * self.fps) for t in times]
-        assert len(samples) == len(keys)
+        samples = np.round(np.asarray(times, dtype=float) * self.fps)
+        if len(key_range) == 1:
+            # flat key - one column
+            values = np.asarray(keys, dtype=float).reshape((-1, 1))
+        elif isinstance(keys, np.ndarray):
+            values = keys.reshape((len(keys), -1))
+        else:
+            values = np.array([tuple(key) for key in keys], dtype=float).reshape((len(keys), -1))
+        assert len(samples) == len(values)
         # get interpolation enum representation
         ipo = bpy.types.Keyframe.bl_rna.properties['interpolation'].enum_items[interp].value
-        interpolations = [ipo for _ in range(len(samples))]
+        interpolations = np.full(len(samples), ipo, dtype=np.int32)
+        # (frame, value) pairs of each fcurve
+        co = np.empty((len(samples), 2), dtype=np.float32)
+        co[:, 0] = samples
         # import the keys
         try:
             fcurves = self.create_fcurves(b_action, key_type, key_range, flags, bone_name, key_name)
-            if len(key_range) == 1:
-                # flat key - make it zippable
-                key_per_fcurve = [keys]
-            else:
-                key_per_fcurve = zip(*keys)
-            for fcurve, fcu_keys in zip(fcurves, key_per_fcurve):
+            for fcurve, fcu_keys in zip(fcurves, values.T):
                 # add new points
-                fcurve.keyframe_points.add(count=len(fcu_keys))
+                fcurve.keyframe_points.add(count=len(samples))
                 # populate points with keys for this curve
-                fcurve.keyframe_points.foreach_set("co", [x for co in zip(samples, fcu_keys) for x in co])
+                co[:, 1] = fcu_keys
+                fcurve.keyframe_points.foreach_set("co", co.ravel())
                 fcurve.keyframe_points.foreach_set("interpolation", interpolations)
                 # update
                 fcurve.update()
@@ -199,44 +200,28 @@ class Animation:
 
     def import_text_key_extra_data(self, txk, b_action):
         """Stores the text keys as pose markers in a blender action."""
-        if txk and b_action:
-            for key in txk.text_keys:
-                newkey = key.value.replace('\r\n', '/').rstrip('/')
-                frame = round(key.time * self.fps)
+        self.import_text_key_list(kf.get_text_keys(txk), b_action)
+
+    def import_text_key_list(self, text_keys, b_action):
+        """Stores text keys, given as (time, text) pairs, as pose markers in a blender action."""
+        if text_keys and b_action:
+            for time, text in text_keys:
+                newkey = text.replace('\r\n', '/').rstrip('/')
+                frame = round(time * self.fps)
                 marker = b_action.pose_markers.new(newkey)
                 marker.frame = frame
 
     def set_frames_per_second(self, roots):
         """Scan all blocks and set a reasonable number for fps to this class and the scene."""
-        # find all key times
-        key_times = []
-        for root in roots:
-            for kfd in root.tree(block_type=NifClasses.NiKeyframeData):
-                key_times.extend(key.time for key in kfd.translations.keys)
-                key_times.extend(key.time for key in kfd.scales.keys)
-                key_times.extend(key.time for key in kfd.quaternion_keys)
-                for dimension in kfd.xyz_rotations:
-                    key_times.extend(key.time for key in dimension.keys)
-
-            for kfi in root.tree(block_type=NifClasses.NiBSplineInterpolator):
-                if not kfi.basis_data:
-                    # skip bsplines without basis data (eg bowidle.kf in Oblivion)
-                    continue
-                key_times.extend(
-                    point * (kfi.stop_time - kfi.start_time)
-                    / (kfi.basis_data.num_control_points - 2)
-                    for point in range(kfi.basis_data.num_control_points - 2))
-
-            for uv_data in root.tree(block_type=NifClasses.NiUVData):
-                for uv_group in uv_data.uv_groups:
-                    key_times.extend(key.time for key in uv_group.keys)
+        self.set_frames_per_second_from_times(kf.get_key_times(roots))
 
+    def set_frames_per_second_from_times(self, key_times):
+        """Set a reasonable number for fps, given the sorted, unique key times, to this class and the scene."""
         # not animated, return a reasonable default
         if not key_times:
             return
 
         # calculate fps
-        key_times = sorted(set(key_times))
         fps = self.fps
         lowest_diff = sum(abs(int(time * fps + 0.5) - (time * fps)) for time in key_times)
 
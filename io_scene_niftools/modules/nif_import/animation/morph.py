@@ -38,12 +38,13 @@
 # ***** END LICENSE BLOCK *****
 
 import bpy
-import mathutils
+import numpy as np
 from nifgen.formats.nif import classes as NifClasses
 
 from io_scene_niftools.modules.nif_import import animation
 from io_scene_niftools.modules.nif_import.animation import Animation
 from io_scene_niftools.utils import math
+from io_scene_niftools.utils.arrays import get_struct_array
 from io_scene_niftools.utils.singleton import EGMData
 from io_scene_niftools.utils.logging import NifLog
 
@@ -73,7 +74,8 @@ class MorphAnimation(Animation):
                 sk_basis = b_obj.shape_key_add(name=key_name)
 
                 # get base vectors and import all morphs
-                base_verts = morph.vectors
+                mesh_verts = self.get_mesh_vertices(b_mesh)
+                base_verts = get_struct_array(morph.vectors, ('x', 'y', 'z'))
 
                 shape_action = self.create_action(b_obj.data.shape_keys, f"{b_obj.name}-Morphs")
                 
@@ -85,9 +87,9 @@ class MorphAnimation(Animation):
                         key_name = f'Key {morph_i}'
                     NifLog.info(f"Inserting key '{key_name}'")
                     # get vectors
-                    morph_verts = morph.vectors
-                    self.morph_mesh(b_mesh, base_verts, morph_verts)
+                    morph_verts = get_struct_array(morph.vectors, ('x', 'y', 'z'))
                     shape_key = b_obj.shape_key_add(name=key_name, from_mix=False)
+                    self.set_shape_key_vertices(shape_key, mesh_verts, base_verts, morph_verts)
 
                     # find the keys
                     # older versions store keys in the morph_data
@@ -120,23 +122,34 @@ class MorphAnimation(Animation):
         morphs = ([(morph, f"EGM SYM {i}") for i, morph in enumerate(sym_morphs)] +
                   [(morph, f"EGM ASYM {i}") for i, morph in enumerate(asym_morphs)])
 
-        base_verts = [v.co for v in b_mesh.vertices]
+        base_verts = self.get_mesh_vertices(b_mesh)
         for morph_verts, key_name in morphs:
-            # convert tuples into vector here so we can simply add in morph_mesh()
-            for b_v_index, (bv, mv) in enumerate(zip(base_verts, morph_verts)):
-                b_mesh.vertices[b_v_index].co = bv + mathutils.Vector(mv)
-            b_obj.shape_key_add(name=key_name, from_mix=False)
-
-    def morph_mesh(self, b_mesh, baseverts, morphverts):
-        """Transform a mesh to be in the shape given by morphverts."""
-        # for each vertex calculate the key position from base
+            shape_key = b_obj.shape_key_add(name=key_name, from_mix=False)
+            self.set_shape_key_vertices(shape_key, base_verts, base_verts, np.array(morph_verts, dtype=float))
+
+    @staticmethod
+    def get_mesh_vertices(b_mesh):
+        """Returns the vertex positions of a mesh as array of shape (n, 3)."""
+        mesh_verts = np.empty(len(b_mesh.vertices) * 3, dtype=np.float32)
+        b_mesh.vertices.foreach_get("co", mesh_verts)
+        return mesh_verts.reshape((-1, 3))
+
+    @staticmethod
+    def set_shape_key_vertices(shape_key, mesh_verts, baseverts, morphverts):
+        """Sets the vertices of a shape key to the shape given by morphverts, relative to baseverts.
+
+        :param shape_key: The shape key, whose vertex count is that of the mesh.
+        :type shape_key: bpy.types.ShapeKey
+        :param mesh_verts: The vertex positions of the mesh, kept for vertices that the morph does not have.
+        :type mesh_verts: np.ndarray
+        :param baseverts: The base positions, as array of shape (n, 3).
+        :type baseverts: np.ndarray
+        :param morphverts: The offsets from the base positions, as array of shape (n, 3).
+        :type morphverts: np.ndarray
+        """
         # pos + delta offset
-        # length check disabled
         # as sometimes, oddly, the morph has more vertices...
-        # assert(len(baseverts) == len(morphverts))
-        for b_v_index, (bv, mv) in enumerate(zip(baseverts, morphverts)):
-            # pyffi vector3
-            v = bv + mv
-            # if applytransform:
-            # v *= transform
-            b_mesh.vertices[b_v_index].co = v.as_tuple()
+        num_verts = min(len(mesh_verts), len(baseverts), len(morphverts))
+        key_verts = np.array(mesh_verts, dtype=np.float32)
+        key_verts[:num_verts] = np.reshape(baseverts, (-1, 3))[:num_verts] + np.reshape(morphverts, (-1, 3))[:num_verts]
+        shape_key.data.foreach_set("co", key_verts.reshape(-1))
@@ -38,13 +38,11 @@
 # ***** END LICENSE BLOCK *****
 
 import bpy
-import mathutils
-import time
+import numpy as np
 
-from functools import singledispatch
-from bisect import bisect_left
 from nifgen.formats.nif import classes as NifClasses
 
+from io_scene_niftools.file_io.kf import get_keyframe_data, get_kf_root_data
 from io_scene_niftools.modules.nif_import.animation import Animation
 from io_scene_niftools.modules.nif_import.object import block_registry
 from io_scene_niftools.utils import math
@@ -52,73 +50,39 @@ from io_scene_niftools.utils.logging import NifLog
 from io_scene_niftools.utils.consts import QUAT, EULER, LOC, SCALE
 
 
-def as_b_quat(n_val):
-    return mathutils.Quaternion([n_val.w, n_val.x, n_val.y, n_val.z])
+def correct_loc(keys, n_bind_rot_inv, n_bind_trans):
+    key_matrices = np.tile(np.identity(4), (len(keys), 1, 1))
+    key_matrices[:, :3, 3] = keys - np.array(n_bind_trans)
+    return math.import_keymats(n_bind_rot_inv, key_matrices)[:, :3, 3]
 
 
-def as_b_loc(n_val):
-    return mathutils.Vector([n_val.x, n_val.y, n_val.z])
+def correct_quat(keys, n_bind_rot_inv, n_bind_trans):
+    key_matrices = np.tile(np.identity(4), (len(keys), 1, 1))
+    key_matrices[:, :3, :3] = math.quats_to_matrices(keys)
+    return math.matrices_to_quats(math.import_keymats(n_bind_rot_inv, key_matrices))
 
 
-def as_b_scale(n_val):
-    return n_val, n_val, n_val
+def correct_euler(keys, n_bind_rot_inv, n_bind_trans):
+    key_matrices = np.tile(np.identity(4), (len(keys), 1, 1))
+    key_matrices[:, :3, :3] = math.eulers_to_matrices(keys)
+    return math.matrices_to_eulers(math.import_keymats(n_bind_rot_inv, key_matrices))
 
 
-def as_b_euler(n_val):
-    return mathutils.Euler(n_val)
-
-
-def correct_loc(key, n_bind_rot_inv, n_bind_trans):
-    return math.import_keymat(n_bind_rot_inv, mathutils.Matrix.Translation(key - n_bind_trans)).to_translation()
-
-
-def correct_quat(key, n_bind_rot_inv, n_bind_trans):
-    return math.import_keymat(n_bind_rot_inv, key.to_matrix().to_4x4()).to_quaternion()
-
-
-def correct_euler(key, n_bind_rot_inv, n_bind_trans):
-    return math.import_keymat(n_bind_rot_inv, key.to_matrix().to_4x4()).to_euler()
-
-
-def correct_scale(key, n_bind_rot_inv, n_bind_trans):
-    return key
+def correct_scale(keys, n_bind_rot_inv, n_bind_trans):
+    return keys
 
 
+# key corrector and number of components per key type, all keys are arrays of shape (num_keys, num_components)
 key_lut = {
-    QUAT: (as_b_quat, correct_quat, 4),
-    EULER: (as_b_euler, correct_euler, 3),
-    LOC: (as_b_loc, correct_loc, 3),
-    SCALE: (as_b_scale, correct_scale, 3),
+    QUAT: (correct_quat, 4),
+    EULER: (correct_euler, 3),
+    LOC: (correct_loc, 3),
+    SCALE: (correct_scale, 3),
 }
 
 
-def interpolate(x_out, x_in, y_in):
-    """
-    sample (x_in I y_in) at x coordinates x_out
-    """
-    y_out = []
-    intervals = zip(x_in, x_in[1:], y_in, y_in[1:])
-    slopes = [(y2 - y1) / (x2 - x1) for x1, x2, y1, y2 in intervals]
-    # if we had just one input, slope will be 0 for constant extrapolation
-    if not slopes:
-        slopes = [0, ]
-    for x in x_out:
-        i = bisect_left(x_in, x) - 1
-        # clamp to valid range
-        i = max(min(i, len(slopes) - 1), 0)
-        y_out.append(y_in[i] + slopes[i] * (x - x_in[i]))
-    return y_out
-
-
 class TransformAnimation(Animation):
 
-    def __init__(self):
-        super().__init__()
-        self.import_kf_root = singledispatch(self.import_kf_root)
-        self.import_kf_root.register(NifClasses.NiControllerSequence, self.import_controller_sequence)
-        self.import_kf_root.register(NifClasses.NiSequenceStreamHelper, self.import_sequence_stream_helper)
-        self.import_kf_root.register(NifClasses.NiSequenceData, self.import_sequence_data)
-
     def get_bind_data(self, b_armature):
         """Get the required bind data of an armature. Used by standalone KF import and export. """
         self.bind_data = {}
@@ -140,79 +104,31 @@ class TransformAnimation(Animation):
                 return bpy.data.objects[b_name]
 
     def import_kf_root(self, kf_root, b_armature_obj):
-        """Base method to warn user that this root type is not supported"""
-        NifLog.warn(f"Unknown KF root block found : {kf_root.name}")
-        NifLog.warn(f"This type isn't currently supported: {type(kf_root)}")
-
-    def import_generic_kf_root(self, kf_root):
-        NifLog.debug(f'Importing {type(kf_root)}...')
-        return kf_root.name
+        """Imports a kf root block, such as a NiControllerSequence, as actions."""
+        self.import_kf_root_data(get_kf_root_data(kf_root), b_armature_obj)
 
-    def import_sequence_data(self, kf_root, b_armature_obj):
-        b_action_name = self.import_generic_kf_root(kf_root)
-        actions = set()
-        for evaluator in kf_root.evaluators:
-            b_target = self.get_target(b_armature_obj, evaluator.node_name)
-            actions.add(self.import_keyframe_controller(evaluator, b_armature_obj, b_target, b_action_name))
-        for b_action in actions:
-            if b_action:
-                self.import_text_keys(kf_root, b_action)
-                if kf_root.cycle_type:
-                    extend = self.get_extend_from_cycle_type(kf_root.cycle_type)
-                    self.set_extrapolation(extend, b_action.fcurves)
-
-    def import_sequence_stream_helper(self, kf_root, b_armature_obj):
-        b_action_name = self.import_generic_kf_root(kf_root)
-        actions = set()
-        # import parallel trees of extra datas and keyframe controllers
-        extra = kf_root.extra_data
-        controller = kf_root.controller
-        textkeys = None
-        while extra and controller:
-            # textkeys in the stack do not specify node names, import as markers
-            while isinstance(extra, NifClasses.NiTextKeyExtraData):
-                textkeys = extra
-                extra = extra.next_extra_data
-
-            # grabe the node name from string data
-            if isinstance(extra, NifClasses.NiStringExtraData):
-                b_target = self.get_target(b_armature_obj, extra.string_data)
-                actions.add(self.import_keyframe_controller(controller, b_armature_obj, b_target, b_action_name))
-            # grab next pair of extra and controller
-            extra = extra.next_extra_data
-            controller = controller.next_controller
-        for b_action in actions:
-            if b_action:
-                self.import_text_key_extra_data(textkeys, b_action)
+    def import_kf_root_data(self, root_data, b_armature_obj):
+        """Imports the animation of a kf root block, as read by get_kf_root_data, as actions.
 
-    def import_controller_sequence(self, kf_root, b_armature_obj):
-        b_action_name = self.import_generic_kf_root(kf_root)
+        :param root_data: The animation of the kf root block.
+        :type root_data: KfRootData
+        :param b_armature_obj: The armature whose bones are animated, or None to animate objects.
+        """
+        if root_data.controllers is None:
+            NifLog.warn(f"Unknown KF root block found : {root_data.name}")
+            NifLog.warn(f"This type isn't currently supported: {root_data.root_type}")
+            return
+        NifLog.debug(f'Importing {root_data.root_type}...')
         actions = set()
-        for controlledblock in kf_root.controlled_blocks:
-            # get bone name
-            # todo [pyffi] fixed get_node_name() is up, make release and clean up here
-            # ZT2 - old way is not supported by pyffi's get_node_name()
-            n_name = controlledblock.target_name
-            # fallout (node_name) & Loki (StringPalette)
-            if not n_name:
-                n_name = controlledblock.get_node_name()
+        for n_name, kf_data in root_data.controllers:
             b_target = self.get_target(b_armature_obj, n_name)
-            # todo - temporarily disabled! should become a custom property on both object and pose bone, ideally
-            # import bone priority
-            # b_target.niftools.priority = controlledblock.priority
-            # fallout, Loki
-            kfc = controlledblock.interpolator
-            if not kfc:
-                # ZT2
-                kfc = controlledblock.controller
-            if kfc:
-                actions.add(self.import_keyframe_controller(kfc, b_armature_obj, b_target, b_action_name))
+            actions.add(self.import_keyframe_data(kf_data, b_armature_obj, b_target, root_data.name))
         for b_action in actions:
             if b_action:
-                self.import_text_keys(kf_root, b_action)
+                self.import_text_key_list(root_data.text_keys, b_action)
                 # fallout: set global extrapolation mode here (older versions have extrapolation per controller)
-                if kf_root.cycle_type:
-                    extend = self.get_extend_from_cycle_type(kf_root.cycle_type)
+                if root_data.cycle_type:
+                    extend = self.get_extend_from_cycle_type(root_data.cycle_type)
                     self.set_extrapolation(extend, b_action.fcurves)
 
     def import_keyframe_controller(self, n_kfc, b_armature, b_target, b_action_name):
@@ -224,13 +140,25 @@ class TransformAnimation(Animation):
         b_action_name: name of the action that should be used; the actual imported name may differ due to suffixes
         """
         # the target may not exist in the scene, in which case it is None here
+        if not b_target:
+            return
+        return self.import_keyframe_data(get_keyframe_data(n_kfc), b_armature, b_target, b_action_name)
+
+    def import_keyframe_data(self, kf_data, b_armature, b_target, b_action_name):
+        """
+        Imports the keys of a keyframe controller as fcurves in an action, which is created if necessary.
+        kf_data: KeyframeData, as read by get_keyframe_data
+        b_armature: either None or Object (blender armature)
+        b_target: either Object or PoseBone
+        b_action_name: name of the action that should be used; the actual imported name may differ due to suffixes
+        """
+        # the target may not exist in the scene, in which case it is None here
         if not b_target:
             return
         NifLog.debug(f'Importing keyframe controller for {b_target.name}')
 
-        n_kfd = None
         # fallout, Loki - we set extrapolation according to the root NiControllerSequence.cycle_type
-        flags = None
+        flags = kf_data.flags
         n_bind_rot_inv = n_bind_trans = None
 
         # create or get the action
@@ -245,76 +173,52 @@ class TransformAnimation(Animation):
             b_action = self.create_action(b_target, f"{b_action_name}_{b_target.name}")
             bone_name = None
 
-        # B-spline curve import
-        if isinstance(n_kfc, NifClasses.NiBSplineInterpolator):
+        if kf_data.kind == "unsupported":
+            return
+        elif kf_data.kind == "bspline":
             # Bsplines are Bezier curves
             interp = "BEZIER"
-            if isinstance(n_kfc, NifClasses.NiBSplineCompFloatInterpolator):
-                # used by WLP2 (tiger.kf), but only for non-LocRotScale data
-                # eg. bone stretching - see controlledblock.get_variable_1()
-                # do not support this for now, no good representation in Blender
-                # pyffi lacks support for this, but the following gets float keys
-                # keys = list(kfc._getCompKeys(kfc.offset, 1, kfc.bias, kfc.multiplier))
-                return
-            times = list(n_kfc.get_times())
-            keys = [NifClasses.Vector3.from_value(tuple_key) for tuple_key in n_kfc.get_translations()]
-            self.import_keys(LOC, b_action, bone_name, times, keys, flags, interp, n_bind_rot_inv, n_bind_trans)
-            keys = [NifClasses.Quaternion.from_value(tuple_key) for tuple_key in n_kfc.get_rotations()]
-            self.import_keys(QUAT, b_action, bone_name, times, keys, flags, interp, n_bind_rot_inv, n_bind_trans)
-            keys = list(n_kfc.get_scales())
-            self.import_keys(SCALE, b_action, bone_name, times, keys, flags, interp, n_bind_rot_inv, n_bind_trans)
+            for key_type, (times, keys, _) in ((LOC, kf_data.translations), (QUAT, kf_data.rotations),
+                                               (SCALE, kf_data.scales)):
+                self.import_keys(key_type, b_action, bone_name, times, keys, flags, interp, n_bind_rot_inv,
+                                 n_bind_trans)
             return b_action
-        elif isinstance(n_kfc, NifClasses.NiMultiTargetTransformController):
-            # not sure what this is used for
-            return
-        n_kfd = self.get_controller_data(n_kfc)
-        # ZT2 - get extrapolation for every kfc
-        if isinstance(n_kfc, NifClasses.NiKeyframeController):
-            flags = n_kfc.flags
-        if isinstance(n_kfd, NifClasses.NiKeyframeData):
-            if n_kfd.rotation_type == 4:
+        if kf_data.rotations:
+            times, keys, n_interp = kf_data.rotations
+            if kf_data.rotation_type == EULER:
                 b_target.rotation_mode = "XYZ"
-                # euler keys need not be sampled at the same time in KFs
-                # but we need complete key sets to do the space conversion
-                # so perform linear interpolation to import all keys properly
-
-                # get all the times and keys for each coordinate
-                times_keys = [self.get_keys_values(euler.keys) for euler in n_kfd.xyz_rotations]
-                # the unique time stamps we have to sample all curves at
-                times_all = sorted(set(times_keys[0][0] + times_keys[1][0] + times_keys[2][0]))
-                # todo - this assumes that all three channels are keyframed, but it seems like this need not be the case
-                # resample each coordinate for all times
-                keys_res = [interpolate(times_all, times, keys) for times, keys in times_keys]
-                # for eulers, the actual interpolation type is apparently stored per channel
-                interp = self.get_b_interp_from_n_interp(n_kfd.xyz_rotations[0].interpolation)
-                self.import_keys(EULER, b_action, bone_name, times_all, zip(*keys_res), flags, interp, n_bind_rot_inv, n_bind_trans)
             else:
                 b_target.rotation_mode = "QUATERNION"
-                times, keys = self.get_keys_values(n_kfd.quaternion_keys)
-                interp = self.get_b_interp_from_n_interp(n_kfd.rotation_type)
-                self.import_keys(QUAT, b_action, bone_name, times, keys, flags, interp, n_bind_rot_inv, n_bind_trans)
-            times, keys = self.get_keys_values(n_kfd.scales.keys)
-            interp = self.get_b_interp_from_n_interp(n_kfd.scales.interpolation)
-            self.import_keys(SCALE, b_action, bone_name, times, keys, flags, interp, n_bind_rot_inv, n_bind_trans)
-
-            times, keys = self.get_keys_values(n_kfd.translations.keys)
-            interp = self.get_b_interp_from_n_interp(n_kfd.translations.interpolation)
-            self.import_keys(LOC, b_action, bone_name, times, keys, flags, interp, n_bind_rot_inv, n_bind_trans)
+            interp = self.get_b_interp_from_n_interp(n_interp)
+            self.import_keys(kf_data.rotation_type, b_action, bone_name, times, keys, flags, interp, n_bind_rot_inv,
+                             n_bind_trans)
+        for key_type, channel in ((SCALE, kf_data.scales), (LOC, kf_data.translations)):
+            if channel:
+                times, keys, n_interp = channel
+                interp = self.get_b_interp_from_n_interp(n_interp)
+                self.import_keys(key_type, b_action, bone_name, times, keys, flags, interp, n_bind_rot_inv,
+                                 n_bind_trans)
 
         return b_action
 
     def import_keys(self, key_type, b_action, bone_name, times, keys, flags, interp, n_bind_rot_inv, n_bind_trans):
-        """Imports key frames according to the specified key_type"""
-        if not keys:
+        """Imports key frames according to the specified key_type
+
+        :param times: The key times, as array of shape (num_keys,).
+        :param keys: The nif key values, as array of shape (num_keys, num_components), or (num_keys,) for scales.
+        """
+        if not len(keys):
             return
         # look up conventions by key type
-        key_func, key_corrector, key_dim = key_lut[key_type]
+        key_corrector, key_dim = key_lut[key_type]
         NifLog.debug(f'{key_type} keys...')
-        # convert nif keys to proper key type for blender
-        keys = [key_func(val) for val in keys]
+        # convert nif keys to proper key type for blender, scales are uniform
+        keys = np.asarray(keys, dtype=float).reshape((len(keys), -1))
+        if key_type == SCALE:
+            keys = np.repeat(keys[:, :1], key_dim, axis=1)
         # correct for bone space if target is an armature bone
         if bone_name:
-            keys = [key_corrector(key, n_bind_rot_inv, n_bind_trans) for key in keys]
+            keys = key_corrector(keys, n_bind_rot_inv, n_bind_trans)
         self.add_keys(b_action, key_type, range(key_dim), flags, times, keys, interp, bone_name=bone_name)
 
     def import_transforms(self, n_block, b_obj, bone_name=None):
@@ -52,6 +52,7 @@ from io_scene_niftools.modules.nif_export.block_registry import block_store as b
 from io_scene_niftools.modules.nif_import.animation.transform import TransformAnimation
 from io_scene_niftools.modules.nif_import.object import Object
 from io_scene_niftools.utils import math
+from io_scene_niftools.utils.arrays import get_struct_array, set_struct_array
 from io_scene_niftools.utils.logging import NifLog
 from io_scene_niftools.utils.singleton import NifOp, NifData
 
@@ -153,18 +154,16 @@ class Armature:
                         # BSDynamicTriShape uses Vector4 to store vertices with a 0 W component, which would
                         # nullify translation when multiplied by a Matrix44. Hence, first conversion to three-component
                         # vector
-                        np_vertices = np.array(vertices, dtype=float)[:,:3]
-                        np_vertices = np.pad(np_vertices, (0, 1), constant_values=1.0)
+                        np_vertices = get_struct_array(vertices, ('x', 'y', 'z'), float)
+                        np_vertices = np.pad(np_vertices, ((0, 0), (0, 1)), constant_values=1.0)
                         np_diff = np.array(diff.as_list())
                         np_vertices = np_vertices @ np_diff
-                        np_normals = np.array(normals, dtype=float)
+                        np_normals = get_struct_array(normals, ('x', 'y', 'z'), float)
                         np_diff33 = np.array(diff.get_matrix_33().as_list())
                         np_normals = np_normals @ np_diff33
                         # assign the transformed values back
-                        for vertex, t_vertex in zip(vertices, np_vertices[:, :3]):
-                            vertex.x, vertex.y, vertex.z = t_vertex
-                        for normal, t_normal in zip(normals, np_normals):
-                            normal.x, normal.y, normal.z = t_normal
+                        set_struct_array(vertices, np_vertices[:, :3], ('x', 'y', 'z'))
+                        set_struct_array(normals, np_normals, ('x', 'y', 'z'))
                         break
                 # store bind pose
                 for bonenode, bonedata in self.bones_iter(skininst):
@@ -245,16 +244,45 @@ class Armature:
                     self.transform_anim.import_transforms(n_block, b_armature_obj, bone_name)
 
         # import pose
+        b_pose_matrices = {}
         for b_name, n_block in self.name_to_block.items():
-            n_pose = self.pose_store[n_block]
-            b_pose_bone = b_armature_obj.pose.bones[b_name]
-            n_bind = math.nifformat_to_mathutils_matrix(n_pose)
-            b_pose_bone.matrix = math.nif_bind_to_blender_bind(n_bind)
-            # force update is required after each pbone to ensure the transforms are set properly in blender
-            bpy.context.view_layer.update()
+            n_pose = math.nifformat_to_mathutils_matrix(self.pose_store[n_block])
+            b_pose_matrices[b_name] = math.nif_bind_to_blender_bind(n_pose)
+        # set the local matrices directly, so blender need not evaluate the parents' poses after each bone
+        for b_name, b_matrix_basis in self.get_pose_bases(b_armature_obj.data.bones, b_pose_matrices).items():
+            b_armature_obj.pose.bones[b_name].matrix_basis = b_matrix_basis
+        bpy.context.view_layer.update()
 
         return b_armature_obj
 
+    @staticmethod
+    def get_pose_bases(b_bones, b_pose_matrices):
+        """Calculates the matrix_basis that gives each bone its armature space pose matrix.
+
+        :param b_bones: The bones of the armature.
+        :type b_bones: bpy.types.ArmatureBones
+        :param b_pose_matrices: The armature space pose matrix per bone name. Bones without one keep their rest pose.
+        :type b_pose_matrices: dict(str, mathutils.Matrix)
+        :return: The matrix_basis per name of each bone with a pose matrix.
+        :rtype: dict(str, mathutils.Matrix)
+        """
+        b_matrix_bases = {}
+        b_armature_poses = {}
+        # the bones collection lists parents before their children
+        for b_bone in b_bones:
+            b_rest = b_bone.matrix_local
+            if b_bone.parent:
+                # the rest matrix relative to the parent, moved along with the posed parent
+                b_parent = b_bone.parent
+                b_rest = b_armature_poses[b_parent.name] @ b_parent.matrix_local.inverted() @ b_rest
+            b_pose = b_pose_matrices.get(b_bone.name)
+            if b_pose is None:
+                b_armature_poses[b_bone.name] = b_rest
+            else:
+                b_armature_poses[b_bone.name] = b_pose
+                b_matrix_bases[b_bone.name] = b_rest.inverted() @ b_pose
+        return b_matrix_bases
+
     def create_bone(self, bone_name, bind_key, b_armature_data, b_parent_bone=None):
         """Adds a bone to the armature in edit mode."""
         # create a new bone
@@ -339,15 +367,21 @@ class Armature:
     @staticmethod
     def fix_bone_lengths(b_armature_data):
         """Sets all edit_bones to a suitable length."""
+        # EditBone.children scans all bones, so gather the children of all bones in one go
+        b_children = {b_edit_bone.name: [] for b_edit_bone in b_armature_data.edit_bones}
+        for b_edit_bone in b_armature_data.edit_bones:
+            if b_edit_bone.parent:
+                b_children[b_edit_bone.parent.name].append(b_edit_bone)
         for b_edit_bone in b_armature_data.edit_bones:
             # don't change root bones
             if b_edit_bone.parent:
                 # take the desired length from the mean of all children's heads
-                if b_edit_bone.children:
+                b_edit_children = b_children[b_edit_bone.name]
+                if b_edit_children:
                     child_heads = mathutils.Vector()
-                    for b_child in b_edit_bone.children:
+                    for b_child in b_edit_children:
                         child_heads += b_child.head
-                    bone_length = (b_edit_bone.head - child_heads / len(b_edit_bone.children)).length
+                    bone_length = (b_edit_bone.head - child_heads / len(b_edit_children)).length
                     if bone_length < 0.01:
                         bone_length = 0.25
                 # end of a chain
@@ -36,6 +36,7 @@
 #
 # ***** END LICENSE BLOCK *****
 
+import bpy
 import numpy as np
 
 from nifgen.formats.nif import classes as NifClasses
@@ -49,6 +50,7 @@ from io_scene_niftools.modules.nif_import.geometry.vertex import Vertex
 from io_scene_niftools.modules.nif_import.property.material import Material
 from io_scene_niftools.modules.nif_import.property.geometry.mesh import MeshPropertyProcessor
 from io_scene_niftools.utils import math
+from io_scene_niftools.utils.arrays import get_struct_array
 from io_scene_niftools.utils.singleton import NifOp
 from io_scene_niftools.utils.logging import NifLog, NifError
 
@@ -77,7 +79,8 @@ class Mesh:
 
         assert isinstance(n_block, self.supported_mesh_types)
 
-        vertices = []
+        # all geometry is gathered as contiguous arrays, one row per vertex
+        vertices = np.zeros((0, 3))
         triangles = []
         uvs = None
         vertex_colors = None
@@ -88,16 +91,17 @@ class Mesh:
             vertex_data = n_block.get_vertex_data()
             if isinstance(n_block, NifClasses.BSDynamicTriShape):
                 # for BSDynamicTriShapes, the vertex data is stored in 4-component vertices
-                vertices = [(vertex.x, vertex.y, vertex.z) for vertex in n_block.vertices]
+                vertices = get_struct_array(n_block.vertices, ('x', 'y', 'z'))
             elif vertex_attributes.vertex:
-                vertices = [vertex.vertex for vertex in vertex_data]
+                vertices = get_struct_array(vertex_data, ('vertex.x', 'vertex.y', 'vertex.z'))
             triangles = n_block.get_triangles()
             if vertex_attributes.u_vs:
-                uvs = [[vertex.uv for vertex in vertex_data]]
+                uvs = [get_struct_array(vertex_data, ('uv.u', 'uv.v'))]
             if vertex_attributes.vertex_colors:
-                vertex_colors = [NifClasses.Color4.from_value(tuple(c / 255.0 for c in vertex.vertex_colors)) for vertex in vertex_data]
+                vertex_colors = get_struct_array(vertex_data, ('vertex_colors.r', 'vertex_colors.g', 'vertex_colors.b',
+                                                               'vertex_colors.a'), float) / 255.0
             if vertex_attributes.normals:
-                normals = [vertex.normal for vertex in vertex_data]
+                normals = get_struct_array(vertex_data, ('normal.x', 'normal.y', 'normal.z'))
         elif isinstance(n_block, NifClasses.NiMesh):
             # if it has a displaylist then the vertex data is encoded differently
             displaylist_data = n_block.geomdata_by_name("DISPLAYLIST", False, False)
@@ -106,44 +110,46 @@ class Mesh:
                 vertices_info, triangles, weights = displaylist.extract_mesh_data(n_block)
                 vertices = vertices_info[0]
                 normals = vertices_info[1]
-                vertex_colors = [NifClasses.Color4.from_value(color) for color in vertices_info[2]]
+                vertex_colors = vertices_info[2]
                 uvs = vertices_info[3]
             else:
                 # get the data from the associated nidatastreams based on the description in the component semantics
-                vertices.extend(n_block.geomdata_by_name("POSITION", sep_datastreams=False))
+                vertices = n_block.geomdata_by_name("POSITION", sep_datastreams=False)
                 vertices.extend(n_block.geomdata_by_name("POSITION_BP", sep_datastreams=False))
                 triangles = n_block.get_triangles()
                 uvs = n_block.geomdata_by_name("TEXCOORD")
                 vertex_colors = n_block.geomdata_by_name("COLOR", sep_datastreams=False)
-                if len(vertex_colors) == 0:
-                    vertex_colors = None
-                else:
-                    vertex_colors = [NifClasses.Color4.from_value(color) for color in vertex_colors]
                 normals = n_block.geomdata_by_name("NORMAL", sep_datastreams=False)
                 normals.extend(n_block.geomdata_by_name("NORMAL_BP", sep_datastreams=False))
+            vertices = np.array(vertices, dtype=float).reshape((-1, 3))
+            if len(vertex_colors) == 0:
+                vertex_colors = None
+            else:
+                vertex_colors = np.array(vertex_colors, dtype=float).reshape((-1, 4))
             if len(uvs) == 0:
                 uvs = None
             else:
-                uvs = [[NifClasses.TexCoord.from_value(tex_coord) for tex_coord in uv_coords] for uv_coords in uvs]
+                uvs = [np.array(uv_coords, dtype=float).reshape((-1, 2)) for uv_coords in uvs]
             if len(normals) == 0:
                 normals = None
+            else:
+                normals = np.array(normals, dtype=float)
         elif isinstance(n_block, NifClasses.NiTriBasedGeom):
 
             # shortcut for mesh geometry data
             n_tri_data = n_block.data
             if not n_tri_data:
                 raise io_scene_niftools.utils.logging.NifError(f"No shape data in {node_name}")
-            vertices = n_tri_data.vertices
+            vertices = get_struct_array(n_tri_data.vertices, ('x', 'y', 'z'))
             triangles = n_block.get_triangles()
-            uvs = n_tri_data.uv_sets
+            uvs = [get_struct_array(uv_set, ('u', 'v')) for uv_set in n_tri_data.uv_sets]
             if n_tri_data.has_vertex_colors:
-                vertex_colors = n_tri_data.vertex_colors
+                vertex_colors = get_struct_array(n_tri_data.vertex_colors, ('r', 'g', 'b', 'a'))
             if n_tri_data.has_normals:
-                normals = n_tri_data.normals
+                normals = get_struct_array(n_tri_data.normals, ('x', 'y', 'z'))
 
         # create raw mesh from vertices and triangles
-        b_mesh.from_pydata(vertices, [], triangles)
-        b_mesh.update()
+        self.create_mesh(b_mesh, vertices, triangles)
 
         # must set faces to smooth before setting custom normals, or the normals bug out!
         is_smooth = True if (not(normals is None) or n_block.is_skin()) else False
@@ -156,7 +162,7 @@ class Mesh:
             Vertex.map_vertex_colors(b_mesh, vertex_colors)
         if normals is not None:
             # for some cases, normals can be four-component structs instead of 3, discard the 4th.
-            Vertex.map_normals(b_mesh, np.array(normals)[:, :3])
+            Vertex.map_normals(b_mesh, normals[:, :3])
 
         self.mesh_prop_processor.process_property_list(n_block, b_obj)
 
@@ -170,10 +176,37 @@ class Mesh:
 
         # todo [mesh] remove doubles here using blender operator
 
+    @staticmethod
+    def create_mesh(b_mesh, vertices, triangles):
+        """Fills an empty mesh with the given vertices and triangles.
+
+        :param b_mesh: The mesh to fill.
+        :type b_mesh: bpy.types.Mesh
+        :param vertices: The vertex positions, as array of shape (n, 3).
+        :type vertices: np.ndarray
+        :param triangles: The vertex indices of the triangles.
+        """
+        vertices = np.asarray(vertices, dtype=np.float32).reshape((-1, 3))
+        if not isinstance(triangles, np.ndarray):
+            triangles = list(triangles)
+        triangles = np.asarray(triangles, dtype=np.int32).reshape((-1, 3))
+        num_triangles = len(triangles)
+
+        b_mesh.vertices.add(len(vertices))
+        b_mesh.vertices.foreach_set("co", vertices.reshape(-1))
+        b_mesh.loops.add(3 * num_triangles)
+        b_mesh.loops.foreach_set("vertex_index", triangles.reshape(-1))
+        b_mesh.polygons.add(num_triangles)
+        b_mesh.polygons.foreach_set("loop_start", np.arange(0, 3 * num_triangles, 3, dtype=np.int32))
+        # newer versions of blender derive the loop totals from the loop starts
+        if not bpy.types.MeshPolygon.bl_rna.properties["loop_total"].is_readonly:
+            b_mesh.polygons.foreach_set("loop_total", np.full(num_triangles, 3, dtype=np.int32))
+        b_mesh.update(calc_edges=True)
+
     @staticmethod
     def set_face_smooth(b_mesh, smooth):
         """set face smoothing and material"""
 
-        for poly in b_mesh.polygons:
-            poly.use_smooth = smooth
-            poly.material_index = 0  # only one material
+        num_polygons = len(b_mesh.polygons)
+        b_mesh.polygons.foreach_set("use_smooth", np.full(num_polygons, smooth, dtype=bool))
+        b_mesh.polygons.foreach_set("material_index", np.zeros(num_polygons, dtype=np.int32))  # only one material
@@ -46,16 +46,24 @@ from io_scene_niftools.utils.singleton import NifOp
 
 class Vertex:
 
+    @staticmethod
+    def get_loop_vertices(b_mesh):
+        """Returns the vertex index of every loop of b_mesh."""
+        loop_vertices = np.empty(len(b_mesh.loops), dtype=np.int32)
+        b_mesh.loops.foreach_get("vertex_index", loop_vertices)
+        return loop_vertices
+
     @staticmethod
     def map_vertex_colors(b_mesh, vertex_colors):
+        vertex_colors = np.asarray(vertex_colors, dtype=np.float32).reshape((-1, 4))
         # in Blender 3.2, vertex_colors was deprecated (https://wiki.blender.org/wiki/Reference/Release_Notes/3.2/Python_API)
         # so use Color attribute instead when 3.2 or greater
         if bpy.app.version >= (3, 2, 0):
             b_mesh.color_attributes.new(name="RGBA",type="FLOAT_COLOR",domain="POINT")
-            b_mesh.color_attributes[-1].data.foreach_set("color", [channel for color in vertex_colors for channel in color])
+            b_mesh.color_attributes[-1].data.foreach_set("color", vertex_colors.reshape(-1))
         else:
             b_mesh.vertex_colors.new(name="RGBA")
-            b_mesh.vertex_colors[-1].data.foreach_set("color", [channel for col in [vertex_colors[loop.vertex_index] for loop in b_mesh.loops] for channel in (col.r, col.g, col.b, col.a)])
+            b_mesh.vertex_colors[-1].data.foreach_set("color", vertex_colors[Vertex.get_loop_vertices(b_mesh)].reshape(-1))
 
     @staticmethod
     def map_uv_layer(b_mesh, uv_sets):
@@ -63,10 +71,13 @@ class Vertex:
             So whenever a hard edge or a UV seam is present the mesh, vertices are duplicated.
             Blender only must duplicate vertices for hard edges; duplicating for UV seams would introduce unnecessary hard edges."""
 
+        loop_vertices = Vertex.get_loop_vertices(b_mesh)
         # "sticky" UV coordinates: these are transformed in Blender UV's
         for uv_i, uv_set in enumerate(uv_sets):
+            loop_uvs = np.asarray(uv_set, dtype=np.float32).reshape((-1, 2))[loop_vertices]
+            loop_uvs[:, 1] = 1.0 - loop_uvs[:, 1]
             b_mesh.uv_layers.new(name=f"UV{uv_i}")
-            b_mesh.uv_layers[-1].data.foreach_set("uv", [coord for uv in [uv_set[loop.vertex_index] for loop in b_mesh.loops] for coord in (uv.u, 1.0 - uv.v)])
+            b_mesh.uv_layers[-1].data.foreach_set("uv", loop_uvs.reshape(-1))
 
     @staticmethod
     def map_normals(b_mesh, normals):
@@ -44,6 +44,7 @@ from nifgen.formats.nif import classes as NifClasses
 from nifgen.formats.nif.nimesh.structs.DisplayList import DisplayList
 
 from io_scene_niftools.modules.nif_import.object.block_registry import block_store, get_bone_name_for_blender
+from io_scene_niftools.utils.arrays import get_struct_array, set_struct_array
 from io_scene_niftools.utils.logging import NifLog
 
 
@@ -51,55 +52,86 @@ class VertexGroup:
     """Class that maps weighted vertices to specific groups"""
 
     @staticmethod
-    def get_skin_deformation_from_partition(n_geom):
-        """ Workaround because pyffi does not support this skinning method """
+    def get_bone_transforms(skin_inst):
+        """Returns the transform of each bone of the skin instance from the skin's bind pose to its current pose.
 
-        # todo [pyffi] integrate this into pyffi!!!
-        #              so that NiGeometry.get_skin_deformation() deals with this as intended
-
-        # mostly a copy from pyffi...
-        skin_inst = n_geom.skin_instance
+        :param skin_inst: The skin instance.
+        :type skin_inst: NifClasses.NiSkinInstance
+        :return: Array of shape (num_bones, 4, 4), zero for empty bones.
+        :rtype: np.ndarray
+        """
         skin_data = skin_inst.data
-        skin_partition = skin_inst.skin_partition
         skel_root = skin_inst.skeleton_root
-        vertices = [NifClasses.Vector3() for _ in range(n_geom.data.num_vertices)]
-
-        # ignore normals for now, not needed for import
-        sum_weights = [0.0 for _ in range(n_geom.data.num_vertices)]
         skin_offset = skin_data.get_transform()
-
-        # store one transform per bone
-        bone_transforms = []
+        bone_transforms = np.zeros((len(skin_inst.bones), 4, 4))
         for i, bone_block in enumerate(skin_inst.bones):
-            bone_data = skin_data.bone_list[i]
-            bone_offset = bone_data.get_transform()
+            # empty bones deform nothing (see pyffi issue #3114079)
+            if not bone_block:
+                continue
+            bone_offset = skin_data.bone_list[i].get_transform()
             bone_matrix = bone_block.get_transform(skel_root)
-            transform = bone_offset * bone_matrix * skin_offset
-            bone_transforms.append(transform)
-
-        # now the actual unique bit
-        for block in skin_partition.partitions:
-            # create all vgroups for this block's bones
-            block_bone_transforms = [bone_transforms[i] for i in block.bones]
-
-            # go over each vert in this block
-            for vert_index, vertex_weights, bone_indices in zip(block.vertex_map, block.vertex_weights, block.bone_indices):
-                # skip verts that were already processed in an earlier block
-                if sum_weights[vert_index] != 0:
-                    continue
+            bone_transforms[i] = (bone_offset * bone_matrix * skin_offset).as_list()
+        return bone_transforms
 
-                # go over all 4 weight / bone pairs and transform this vert
-                for weight, b_i in zip(vertex_weights, bone_indices):
-                    if weight > 0:
-                        transform = block_bone_transforms[b_i]
-                        vertices[vert_index] += weight * (n_geom.data.vertices[vert_index] * transform)
-                        sum_weights[vert_index] += weight
+    @staticmethod
+    def get_skin_deformation(n_geom):
+        """Calculates the vertex positions of a skinned geometry in the current pose of its bones.
 
-        for i, s in enumerate(sum_weights):
-            if abs(s - 1.0) > 0.01:
-                print(f"Vertex {i:d} has weights not summing to one: {sum_weights['i']:d}")
+        Supports both weights in the skin data and weights that are only stored in the skin partition.
 
-        return vertices
+        :param n_geom: The skinned geometry.
+        :type n_geom: NifClasses.NiGeometry
+        :return: The deformed vertex positions, as array of shape (num_vertices, 3).
+        :rtype: np.ndarray
+        """
+        skin_inst = n_geom.skin_instance
+        skin_data = skin_inst.data
+        bone_transforms = VertexGroup.get_bone_transforms(skin_inst)
+        vertices = get_struct_array(n_geom.data.vertices, ('x', 'y', 'z'), float)
+        num_vertices = len(vertices)
+
+        weight_arrays = [(np.zeros(0, dtype=int), np.zeros(0, dtype=int), np.zeros(0))]
+        if skin_data.has_vertex_weights:
+            for idx, bone_data in enumerate(skin_data.bone_list):
+                if not len(bone_data.vertex_weights):
+                    continue
+                index_weights = get_struct_array(bone_data.vertex_weights, ('index', 'weight'), float)
+                weight_arrays.append((index_weights[:, 0].astype(int),
+                                      np.full(len(index_weights), idx, dtype=int),
+                                      index_weights[:, 1]))
+            weight_verts, weight_bones, weight_values = (np.concatenate(arrays) for arrays in zip(*weight_arrays))
+        else:
+            # WLP2 - hides the weights in the partition
+            vertex_maps = [np.zeros(0, dtype=int)]
+            num_rows = 0
+            for block in skin_inst.skin_partition.partitions:
+                vertex_map = np.asarray(list(block.vertex_map), dtype=int)
+                rows, block_bone_indices, weights = VertexGroup.get_weight_arrays(
+                    block.vertex_weights, block.bone_indices, np.arange(num_rows, num_rows + len(vertex_map)))
+                partition_bones = np.asarray(list(block.bones), dtype=int)
+                weight_arrays.append((rows, partition_bones[block_bone_indices], weights))
+                vertex_maps.append(vertex_map)
+                num_rows += len(vertex_map)
+            weight_rows, weight_bones, weight_values = (np.concatenate(arrays) for arrays in zip(*weight_arrays))
+            weight_verts = np.concatenate(vertex_maps)[weight_rows]
+            # a vertex is only deformed by the first partition row that weights it, later ones are skipped
+            _, first = np.unique(weight_verts, return_index=True)
+            first_rows = np.zeros(num_vertices, dtype=int)
+            first_rows[weight_verts[first]] = weight_rows[first]
+            used = weight_rows == first_rows[weight_verts]
+            weight_verts, weight_bones, weight_values = weight_verts[used], weight_bones[used], weight_values[used]
+
+        # blend the vertices transformed by each of their bones, in homogeneous coordinates
+        weighted = np.einsum('ij,ijk->ik', np.pad(vertices[weight_verts], ((0, 0), (0, 1)), constant_values=1.0),
+                             bone_transforms[weight_bones])[:, :3] * weight_values[:, None]
+        deformed = np.stack([np.bincount(weight_verts, weighted[:, i], minlength=num_vertices) for i in range(3)], axis=1)
+
+        sum_weights = np.bincount(weight_verts, weight_values, minlength=num_vertices)
+        num_unnormalized = np.count_nonzero(np.abs(sum_weights - 1.0) > 0.01)
+        if num_unnormalized:
+            NifLog.warn(f"{num_unnormalized} vertices of {n_geom.name} have weights not summing to one")
+
+        return deformed
 
     @staticmethod
     def apply_skin_deformation(n_data):
@@ -110,39 +142,60 @@ class VertexGroup:
         # make sure that each skin is applied only once to avoid distortions when a model is referred to twice
         for n_geom in set(n_geoms):
             NifLog.info(f'Applying skin deformation on geometry {n_geom.name}')
-            skininst = n_geom.skin_instance
-            skindata = skininst.data
-            if skindata.has_vertex_weights:
-                vertices = n_geom.get_skin_deformation()[0]
-            else:
-                NifLog.info("PyFFI does not support this type of skinning, so here's a workaround...")
-                vertices = VertexGroup.get_skin_deformation_from_partition(n_geom)
-
+            vertices = VertexGroup.get_skin_deformation(n_geom)
             # finally we can actually set the data
-            for vold, vnew in zip(n_geom.data.vertices, vertices):
-                vold.x = vnew.x
-                vold.y = vnew.y
-                vold.z = vnew.z
+            set_struct_array(n_geom.data.vertices, vertices, ('x', 'y', 'z'))
 
     @classmethod
     def import_skin(cls, ni_block, b_obj):
         """Import a NiSkinInstance and its contents as vertex groups"""
-        bone_weights_map = cls.get_bone_weights(ni_block)
-        cls.set_bone_weights(bone_weights_map, b_obj)
+        bone_weights = cls.get_bone_weights(ni_block)
+        cls.set_bone_weights(bone_weights, b_obj)
         face_maps = cls.get_face_maps(ni_block)
         cls.set_face_maps(face_maps, b_obj)
 
+    @staticmethod
+    def get_weight_arrays(vertex_weights, bone_indices, vertices=None):
+        """Flattens rows of weights and bone indices per vertex into (vertex, bone, weight) arrays.
+
+        :param vertex_weights: The weights of each vertex.
+        :param bone_indices: The bone indices of each vertex, matching vertex_weights. Surplus columns of either are
+            ignored.
+        :param vertices: The vertex index of each row, if not the row number.
+        :return: The vertex, bone index and weight of every weight slot in use, that is, with a valid bone and a
+            positive weight.
+        :rtype: tuple(np.ndarray)
+        """
+        vertex_weights = np.array(vertex_weights, dtype=float)
+        bone_indices = np.array(bone_indices, dtype=int)
+        if not len(vertex_weights) or not len(bone_indices):
+            return np.zeros(0, dtype=int), np.zeros(0, dtype=int), np.zeros(0, dtype=float)
+        vertex_weights = vertex_weights.reshape((len(vertex_weights), -1))
+        bone_indices = bone_indices.reshape((len(bone_indices), -1))
+        num_rows = min(len(vertex_weights), len(bone_indices))
+        num_slots = min(vertex_weights.shape[1], bone_indices.shape[1])
+        vertex_weights = vertex_weights[:num_rows, :num_slots]
+        bone_indices = bone_indices[:num_rows, :num_slots]
+        if vertices is None:
+            vertices = np.arange(num_rows)
+        vertices = np.repeat(np.asarray(vertices, dtype=int)[:num_rows], num_slots).reshape((num_rows, num_slots))
+        used = (bone_indices >= 0) & (vertex_weights > 0)
+        return vertices[used], bone_indices[used], vertex_weights[used]
+
     @staticmethod
     def get_bone_weights(ni_block):
         """Retrieve the vertex weights per bone per vertex
 
         :param ni_block: NiObject from which to take the weights
         :type ni_block: NifClasses.NiAVObject
-        :return: dictionary mapping bone name to vertex indices and weights
-        :rtype: dict(str, list(tuple(int, float)))
+        :return: the vertex group names, and the vertex, vertex group index and weight arrays of all weights, with
+            one weight per vertex and group
+        :rtype: tuple(list(str), np.ndarray, np.ndarray, np.ndarray)
 
         """
-        bone_weights_map = {}
+        # names of the bones that the bone indices refer to, and the (vertex, bone index, weight) arrays per source
+        bone_names = []
+        weight_arrays = []
         if isinstance(ni_block, NifClasses.NiMesh):
             if ni_block.has_extra_em_data:
                 # only for Epic Mickey nifs for now
@@ -155,16 +208,15 @@ class VertexGroup:
                     weight_indices = displaylist.extract_mesh_data(ni_block)[2]
                 else:
                     weight_indices = ni_block.extra_em_data.vertex_to_weight_map
-                bone_indices = np.zeros((len(weight_indices), 3), dtype=int)
-                bone_weights = np.zeros((len(weight_indices), 3), dtype=float)
-                for i, set_index in enumerate(weight_indices):
-                    weight = bone_weights_set[set_index]
-                    bone_indices[i] = weight.bone_indices
-                    bone_weights[i] = weight.weights
+                weight_indices = np.asarray(weight_indices, dtype=int)
+                set_bone_indices = np.array([weight.bone_indices for weight in bone_weights_set], dtype=int).reshape((-1, 3))
+                set_weights = np.array([weight.weights for weight in bone_weights_set], dtype=float).reshape((-1, 3))
+                bone_indices = set_bone_indices[weight_indices]
+                bone_weights = set_weights[weight_indices]
                 bone_names = [get_bone_name_for_blender(str(i)) for i in range(len(ni_block.extra_em_data.bone_transforms))]
             else:
                 bone_indices = []
-                bone_weights = chain.from_iterable(ni_block.geomdata_by_name('BLENDWEIGHT'))
+                bone_weights = list(chain.from_iterable(ni_block.geomdata_by_name('BLENDWEIGHT')))
 
                 # assume there's only on SkinningMeshModifier
                 skin_modifier = [block for block in ni_block.modifiers if isinstance(block, NifClasses.NiSkinningMeshModifier)][0]
@@ -176,99 +228,106 @@ class VertexGroup:
                 for palette, index_datas in zip(bone_palettes, bone_index_datas):
                     bone_indices.extend([[palette[i] for i in indices] for indices in index_datas])
 
-            for name in bone_names:
-                bone_weights_map[name] = []
-
-            # add every vertex to the corresponding groups
-            for i, (weights, indices) in enumerate(zip(bone_weights, bone_indices)):
-                for w, b_i in zip(weights, indices):
-                    # weights and indices is not necessarily equally long - luckily zip limits to the shortest
-                    if b_i >= 0 and w > 0:
-                        group_name = bone_names[b_i]
-                        bone_weights_map[group_name].append((i, w))
+            # weights and indices are not necessarily equally long, surplus entries are ignored
+            weight_arrays.append(VertexGroup.get_weight_arrays(bone_weights, bone_indices))
 
         else:
             skininst = ni_block.skin_instance
             if skininst:
                 skindata = skininst.data
                 bones = skininst.bones
+                # skip empty bones (see pyffi issue #3114079)
+                bone_names = [block_store.import_name(n_bone) if n_bone else None for n_bone in bones]
                 if isinstance(skininst, NifClasses.BSSkinInstance):
-                    bone_names = [None for _ in bones]
-                    for idx, n_bone in enumerate(bones):
-                        if not n_bone:
-                            continue
-
-                        group_name = block_store.import_name(n_bone)
-                        if group_name not in bone_weights_map:
-                            bone_weights_map[group_name] = []
-                        bone_names[idx] = group_name
-                    for name in bone_names:
-                        if name:
-                            bone_weights_map[name] = []
-
-                    for i, (weights, indices) in enumerate([(vert.bone_weights, vert.bone_indices) for vert in ni_block.vertex_data]):
-                        for w, b_i in zip(weights, indices):
-                            if b_i  >= 0 and w > 0:
-                                group_name = bone_names[b_i]
-                                bone_weights_map[group_name].append((i, w))
+                    vertex_data = ni_block.vertex_data
+                    weight_arrays.append(VertexGroup.get_weight_arrays(
+                        [vert.bone_weights for vert in vertex_data], [vert.bone_indices for vert in vertex_data]))
 
                 # the usual case
                 elif skindata.has_vertex_weights:
-                    bone_weights = skindata.bone_list
                     for idx, n_bone in enumerate(bones):
-                        # skip empty bones (see pyffi issue #3114079)
                         if not n_bone:
                             continue
-
-                        vertex_weights = bone_weights[idx].vertex_weights
-                        group_name = block_store.import_name(n_bone)
-                        if group_name not in bone_weights_map:
-                            bone_weights_map[group_name] = []
-    
-                        for skinWeight in vertex_weights:
-                            vert = skinWeight.index
-                            weight = skinWeight.weight
-                            bone_weights_map[group_name].append((vert, weight))
+                        vertex_weights = skindata.bone_list[idx].vertex_weights
+                        if not len(vertex_weights):
+                            continue
+                        # all weights are kept, even zero ones
+                        index_weights = get_struct_array(vertex_weights, ('index', 'weight'), float)
+                        weight_arrays.append((index_weights[:, 0].astype(int),
+                                              np.full(len(index_weights), idx, dtype=int),
+                                              index_weights[:, 1]))
 
                 # WLP2 - hides the weights in the partition
                 else:
-                    skin_partition = skininst.skin_partition
-                    for block in skin_partition.partitions:
-                        # create all vgroups for this block's bones
-                        bone_names = [block_store.import_name(bones[i]) for i in block.bones]
-                        for group_name in bone_names:
-                            bone_weights_map[group_name] = []
-    
-                        # go over each vert in this block
-                        for vert, vertex_weights, bone_indices in zip(block.vertex_map, block.vertex_weights, block.bone_indices):
-    
-                            # assign this vert's 4 weights to its 4 vgroups (at max)
-                            for w, b_i in zip(vertex_weights, bone_indices):
-                                if w > 0:
-                                    group_name = bone_names[b_i]
-                                    bone_weights_map[group_name].append((vert, w))
-        return bone_weights_map
+                    bone_names = []
+                    for block in skininst.skin_partition.partitions:
+                        # create all vgroups for this block's bones, the block's bone indices are offset to refer to them
+                        bone_offset = len(bone_names)
+                        bone_names.extend(block_store.import_name(bones[i]) for i in block.bones)
+                        verts, block_bone_indices, weights = VertexGroup.get_weight_arrays(
+                            block.vertex_weights, block.bone_indices, block.vertex_map)
+                        weight_arrays.append((verts, block_bone_indices + bone_offset, weights))
+
+        return VertexGroup.merge_bone_weights(bone_names, weight_arrays)
+
+    @staticmethod
+    def merge_bone_weights(bone_names, weight_arrays):
+        """Maps bone indices to vertex groups by name, and keeps the last weight of each vertex in each group, like
+        adding the weights one by one would.
+
+        :param bone_names: The vertex group name of each bone index, None for bones to skip.
+        :type bone_names: list(str)
+        :param weight_arrays: (vertex, bone index, weight) arrays, in order of assignment.
+        :return: the vertex group names, and the vertex, vertex group index and weight arrays
+        :rtype: tuple(list(str), np.ndarray, np.ndarray, np.ndarray)
+        """
+        group_names = list(dict.fromkeys(name for name in bone_names if name))
+        group_indices = {name: i for i, name in enumerate(group_names)}
+        bone_groups = np.array([group_indices[name] if name else -1 for name in bone_names] + [-1], dtype=int)
+        if weight_arrays:
+            weight_verts, weight_bones, weight_values = (np.concatenate(arrays) for arrays in zip(*weight_arrays))
+        else:
+            weight_verts, weight_bones, weight_values = np.zeros(0, dtype=int), np.zeros(0, dtype=int), np.zeros(0)
+        weight_groups = bone_groups[weight_bones]
+        used = weight_groups >= 0
+        weight_verts, weight_groups, weight_values = weight_verts[used], weight_groups[used], weight_values[used]
+        # the last weight of a vertex in a group replaces the earlier ones
+        _, last = np.unique(np.stack((weight_verts, weight_groups), axis=1)[::-1], axis=0, return_index=True)
+        last = len(weight_verts) - 1 - last
+        return group_names, weight_verts[last], weight_groups[last], weight_values[last]
 
     @staticmethod
     def set_bone_weights(bone_weights, b_obj):
         """Set the bone weights on the object
 
-        :param bone_weights: dictionary mapping bone name to vertex indices and weights
-        :type bone_weights: dict(str, list(tuple(int, float)))
+        All vertices with the same weight in a group are added in a single call.
+
+        :param bone_weights: the vertex group names, and the vertex, vertex group index and weight arrays
+        :type bone_weights: tuple(list(str), np.ndarray, np.ndarray, np.ndarray)
         :param b_obj: Blender object to which to add the vertex groups
         :type b_obj: bpy.types.Object
         :return: None
         :rtype: NoneType
 
         """
-        for bone_name, index_weights in bone_weights.items():
-            if bone_name not in b_obj.vertex_groups:
-                v_group = b_obj.vertex_groups.new(name=bone_name)
+        group_names, weight_verts, weight_groups, weight_values = bone_weights
+        v_groups = []
+        for group_name in group_names:
+            if group_name not in b_obj.vertex_groups:
+                v_groups.append(b_obj.vertex_groups.new(name=group_name))
             else:
-                v_group = b_obj.vertex_groups[bone_name]
-            for (v_index, weight) in index_weights:
-                # conversion from numpy.uint16 to int necessary because Blender doesn't accept them
-                v_group.add([int(v_index)], weight, 'REPLACE')
+                v_groups.append(b_obj.vertex_groups[group_name])
+        if not len(weight_verts):
+            return
+        # runs of equal group and weight
+        order = np.lexsort((weight_values, weight_groups))
+        weight_verts, weight_groups, weight_values = weight_verts[order], weight_groups[order], weight_values[order]
+        run_starts = np.flatnonzero((np.diff(weight_groups, prepend=-1) != 0) | (np.diff(weight_values, prepend=-1.0) != 0))
+        run_ends = np.append(run_starts[1:], len(weight_verts))
+        # conversion from numpy integers to int necessary because Blender doesn't accept them
+        for start, end, group_index, weight in zip(run_starts.tolist(), run_ends.tolist(),
+                                                   weight_groups[run_starts].tolist(), weight_values[run_starts].tolist()):
+            v_groups[group_index].add(weight_verts[start:end].tolist(), weight, 'REPLACE')
 
     @staticmethod
     def get_face_maps(ni_block):
@@ -36,14 +36,14 @@
 # POSSIBILITY OF SUCH DAMAGE.
 #
 # ***** END LICENSE BLOCK *****
-from functools import reduce
-import operator
 import traceback
 import os.path
 
 import bpy
 from nifgen.formats.nif import classes as NifClasses
 
+from io_scene_niftools.file_io.archive import archive_library, get_default_cache_dir, normalize_name
+from io_scene_niftools.modules.nif_import.property.texture.resolver import texture_resolver
 from io_scene_niftools.utils.singleton import NifOp
 from io_scene_niftools.utils.logging import NifLog
 
@@ -52,6 +52,37 @@ class TextureLoader:
 
     external_textures = set()
 
+    @staticmethod
+    def configure_archives():
+        """Sets the archives to search for textures that are not found as loose files, by default those in the data
+        directory of the imported nif."""
+        archive_paths = [path.strip() for path in NifOp.props.archive_paths.split(";") if path.strip()]
+        if not archive_paths:
+            import_path = os.path.dirname(NifOp.props.filepath)
+            meshes_index = import_path.lower().find("meshes")
+            if meshes_index != -1:
+                archive_paths.append(import_path[:meshes_index])
+        archive_library.configure([bpy.path.abspath(path) for path in archive_paths], get_default_cache_dir(),
+                                  NifOp.props.archive_cache_size * 1024 * 1024)
+
+    @staticmethod
+    def get_archive_names(fn):
+        """Returns the names under which a texture may be stored in an archive, in order of preference."""
+        name = normalize_name(fn)
+        # archive names are relative to the data directory
+        textures_index = ("\\" + name).find("\\textures\\")
+        if textures_index != -1:
+            bases = [name[textures_index:]]
+        else:
+            # Morrowind style paths are relative to the textures directory
+            bases = ["textures\\" + name, name]
+        names = []
+        for base in bases:
+            root, ext = os.path.splitext(base)
+            names.append(base)
+            names.extend(root + alt_ext for alt_ext in texture_resolver.extensions if alt_ext != ext)
+        return names
+
     @staticmethod
     def load_image(tex_path):
         """Returns an image or a generated image if none was found"""
@@ -149,41 +180,33 @@ class TextureLoader:
         # go through all texture search paths
         for texdir in search_path_list:
             if texdir[0:2] == "//":
-                # Blender-specific directory, slows down resolve_ncase:
+                # Blender-specific directory, relative to the blend file
                 relative = True
-                texdir = texdir[2:]
+                texdir = bpy.path.abspath(texdir)
             else:
                 relative = False
-            texdir = texdir.replace('\\', os.sep)
-            texdir = texdir.replace('/', os.sep)
-            # go through all possible file names, try alternate extensions too; for linux, also try lower case versions of filenames
-            texfns = reduce(operator.add,
-                            [[fn[:-4] + ext, fn[:-4].lower() + ext]
-                             for ext in ('.DDS', '.dds', '.PNG', '.png',
-                                         '.TGA', '.tga', '.BMP', '.bmp',
-                                         '.JPG', '.jpg')])
-
-            texfns = [fn, fn.lower()] + list(set(texfns))
-            for texfn in texfns:
-                # now a little trick, to satisfy many Morrowind mods
-                if texfn[:9].lower() == 'textures' + os.sep and texdir[-9:].lower() == os.sep + 'textures':
-                    # strip one of the two 'textures' from the path
-                    tex = os.path.join(texdir[:-9], texfn)
-                else:
-                    tex = os.path.join(texdir, texfn)
-
-                # "ignore case" on linuxW
+            # the resolver ignores case and tries alternate extensions too
+            NifLog.debug(f"Searching {fn} in {texdir}")
+            tex = texture_resolver.resolve(fn, texdir)
+            if tex:
                 if relative:
-                    tex = bpy.path.abspath("//" + tex)
-                tex = bpy.path.resolve_ncase(tex)
-                NifLog.debug(f"Searching {tex}")
-                if os.path.exists(tex):
-                    if relative:
-                        return self.load_image(bpy.path.relpath(tex))
-                    else:
-                        return self.load_image(tex)
-
-        else:
-            tex = fn
+                    return self.load_image(bpy.path.relpath(tex))
+                else:
+                    return self.load_image(tex)
+
+        # then extract it from the archives
+        for name in self.get_archive_names(fn):
+            tex = archive_library.extract(name)
+            if tex:
+                b_image = self.load_image(tex)
+                # the cache may remove the extracted file in a later session, so keep the image in the blend file
+                if b_image.filepath == tex and not b_image.packed_file:
+                    try:
+                        b_image.pack()
+                    except RuntimeError:
+                        NifLog.warn(f"Could not pack texture '{tex}' extracted from an archive")
+                return b_image
+
+        tex = fn
         # probably not found, but load a dummy regardless
         return self.load_image(tex)
@@ -0,0 +1,185 @@
+"""Finds texture files through a cached, case insensitive index of the search directories."""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2026, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above
+#      copyright notice, this list of conditions and the following
+#      disclaimer in the documentation and/or other materials provided
+#      with the distribution.
+#
+#    * Neither the name of the NIF File Format Library and Tools
+#      project nor the names of its contributors may be used to endorse
+#      or promote products derived from this software without specific
+#      prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import ntpath
+import os
+
+
+class _DirectoryListing:
+    """The case folded names of the entries of a directory, and its modification time when they were read."""
+
+    def __init__(self, path, generation):
+        # the last generation in which the listing was known to be up to date
+        self.generation = generation
+        # case folded name -> (real name, whether it is a directory)
+        self.entries = {}
+        # case folded file name without extension -> real file names with that stem
+        self.stems = {}
+        try:
+            self.mtime_ns = os.stat(path).st_mtime_ns
+            with os.scandir(path) as dir_entries:
+                for dir_entry in dir_entries:
+                    is_dir = dir_entry.is_dir()
+                    folded = dir_entry.name.casefold()
+                    self.entries[folded] = (dir_entry.name, is_dir)
+                    if not is_dir:
+                        self.stems.setdefault(os.path.splitext(folded)[0], []).append(dir_entry.name)
+        except OSError:
+            # missing or unreadable, so empty until it appears
+            self.mtime_ns = None
+            self.entries = {}
+            self.stems = {}
+
+
+class TextureResolver:
+    """Finds texture files case insensitively, with alternate extensions, through an in-memory index of the
+    directories that were searched.
+
+    Each directory is listed once. Its listing, and the results of all lookups, are kept across imports. They are only
+    checked against the directory's modification time once after each call to refresh.
+    """
+
+    # alternate extensions to try if the file does not exist with its own, in order of preference
+    extensions = ('.dds', '.png', '.tga', '.bmp', '.jpg')
+
+    def __init__(self):
+        self._listings = {}
+        self._results = {}
+        self._generation = 0
+
+    def refresh(self):
+        """Marks all directory listings to be checked for changes when they are used next, eg. for a new import."""
+        self._generation += 1
+
+    def clear(self):
+        """Forgets all directory listings and lookup results."""
+        self._listings = {}
+        self._results = {}
+
+    def resolve(self, file_name, search_dir):
+        """Finds a texture in a search directory. If it does not exist with its own extension, the alternate
+        extensions are tried.
+
+        :param file_name: The path of the texture relative to the search directory, with any case and separators.
+            Absolute paths are resolved from their own root instead.
+        :type file_name: str
+        :param search_dir: The absolute path of the directory to search.
+        :type search_dir: str
+        :return: The real path of the texture, or None if it was not found.
+        :rtype: str
+        """
+        file_name = file_name.replace('\\', '/')
+        # absolute paths are not below the search directory, ntpath also finds drive letters outside of Windows
+        drive, tail = ntpath.splitdrive(file_name)
+        if drive or os.path.isabs(file_name):
+            search_dir = drive + '/'
+            file_name = tail
+        rel_parts = [part for part in file_name.split('/') if part and part != '.']
+        search_dir = os.path.normpath(search_dir)
+        # now a little trick, to satisfy many Morrowind mods
+        if len(rel_parts) > 1 and rel_parts[0].casefold() == 'textures' and \
+                os.path.basename(search_dir).casefold() == 'textures':
+            # strip one of the two 'textures' from the path
+            search_dir = os.path.dirname(search_dir)
+        key = (search_dir, tuple(part.casefold() for part in rel_parts))
+        # results are only valid as long as all listings they were found from are
+        if key in self._results:
+            tex_path, listings = self._results[key]
+            if all(self._is_current(path, listing) for path, listing in listings):
+                return tex_path
+        listings = []
+        tex_path = self._find(search_dir, rel_parts, listings)
+        self._results[key] = (tex_path, listings)
+        return tex_path
+
+    def _find(self, search_dir, rel_parts, listings):
+        """Walks down rel_parts from search_dir, storing the (path, listing) of every listing that was used."""
+        if not rel_parts:
+            return None
+        dir_path = search_dir
+        for part in rel_parts[:-1]:
+            if part == '..':
+                dir_path = os.path.dirname(dir_path)
+                continue
+            listing = self._get_listing(dir_path)
+            listings.append((dir_path, listing))
+            entry = listing.entries.get(part.casefold())
+            if not entry or not entry[1]:
+                return None
+            dir_path = os.path.join(dir_path, entry[0])
+        listing = self._get_listing(dir_path)
+        listings.append((dir_path, listing))
+        name = rel_parts[-1].casefold()
+        entry = listing.entries.get(name)
+        if entry and not entry[1]:
+            return os.path.join(dir_path, entry[0])
+        # try alternate extensions
+        alternates = {os.path.splitext(alternate)[1].casefold(): alternate
+                      for alternate in listing.stems.get(os.path.splitext(name)[0], ())}
+        for extension in self.extensions:
+            if extension in alternates:
+                return os.path.join(dir_path, alternates[extension])
+        return None
+
+    def _get_listing(self, dir_path):
+        """Returns the up to date listing of a directory."""
+        listing = self._listings.get(dir_path)
+        if listing is None or not self._is_current(dir_path, listing):
+            listing = _DirectoryListing(dir_path, self._generation)
+            self._listings[dir_path] = listing
+        return listing
+
+    def _is_current(self, dir_path, listing):
+        """Checks whether a listing is still the one of its directory, by modification time at most once per
+        generation."""
+        if listing is not self._listings.get(dir_path):
+            return False
+        if listing.generation == self._generation:
+            return True
+        try:
+            mtime_ns = os.stat(dir_path).st_mtime_ns
+        except OSError:
+            mtime_ns = None
+        if mtime_ns != listing.mtime_ns:
+            return False
+        listing.generation = self._generation
+        return True
+
+
+texture_resolver = TextureResolver()
@@ -39,9 +39,8 @@
 
 import bpy
 import nifgen.formats.nif as NifFormat
-from nifgen.spells.nif import NifToaster
-from nifgen.spells.nif.fix import SpellScale
 
+from io_scene_niftools.file_io.nif import NifFile
 from io_scene_niftools.utils import debugging
 from io_scene_niftools.utils.singleton import NifOp
 from io_scene_niftools.utils.logging import NifLog
@@ -71,7 +70,4 @@ class NifCommon:
 
     @staticmethod
     def apply_scale(data, scale):
-        NifLog.info(f"Scale Correction set to {scale}")
-        toaster = NifToaster()
-        toaster.scale = scale
-        SpellScale(data=data, toaster=toaster).recurse()
\ No newline at end of file
+        NifFile.apply_scale(data, scale)
\ No newline at end of file
@@ -141,53 +141,47 @@ class NifExport(NifCommon):
             if bpy.context.scene.niftools_scene.game == 'MORROWIND':
                 # animations without keyframe animations crash the TESCS
                 # if we are in that situation, add a trivial keyframe animation
-                has_keyframecontrollers = False
-                for block in block_store.block_to_obj:
-                    if isinstance(block, NifClasses.NiKeyframeController):
-                        has_keyframecontrollers = True
-                        break
+                has_keyframecontrollers = bool(block_store.get_blocks_by_type(NifClasses.NiKeyframeController))
                 if (not has_keyframecontrollers) and (not NifOp.props.bs_animation_node):
                     NifLog.info("Defining dummy keyframe controller")
                     # add a trivial keyframe controller on the scene root
                     self.transform_anim.create_controller(root_block, root_block.name)
 
                 if NifOp.props.bs_animation_node:
-                    for block in block_store.block_to_obj:
-                        if isinstance(block, NifClasses.NiNode):
-                            # if any of the shape children has a controller or if the ninode has a controller convert its type
-                            if block.controller or any(child.controller for child in block.children if isinstance(child, NifClasses.NiGeometry)):
-                                new_block = NifClasses.NiBSAnimationNode(NifData.data).deepcopy(block)
-                                # have to change flags to 42 to make it work
-                                new_block.flags = 42
-                                root_block.replace_global_node(block, new_block)
-                                if root_block is block:
-                                    root_block = new_block
+                    for block in block_store.get_blocks_by_type(NifClasses.NiNode):
+                        # if any of the shape children has a controller or if the ninode has a controller convert its type
+                        if block.controller or any(child.controller for child in block.children if isinstance(child, NifClasses.NiGeometry)):
+                            new_block = NifClasses.NiBSAnimationNode(NifData.data).deepcopy(block)
+                            # have to change flags to 42 to make it work
+                            new_block.flags = 42
+                            root_block.replace_global_node(block, new_block)
+                            block_store.replace_block(block, new_block)
+                            if root_block is block:
+                                root_block = new_block
 
             # oblivion skeleton export: check that all bones have a transform controller and transform interpolator
             if bpy.context.scene.niftools_scene.is_bs() and filebase.lower() in ('skeleton', 'skeletonbeast'):
                 self.transform_anim.add_dummy_controllers()
 
             # bhkConvexVerticesShape of children of bhkListShapes need an extra bhkConvexTransformShape (see issue #3308638, reported by Koniption)
-            # note: block_store.block_to_obj changes during iteration, so need list copy
-            for block in list(block_store.block_to_obj.keys()):
-                if isinstance(block, NifClasses.BhkListShape):
-                    for i, sub_shape in enumerate(block.sub_shapes):
-                        if isinstance(sub_shape, NifClasses.BhkConvexVerticesShape):
-                            coltf = block_store.create_block("bhkConvexTransformShape")
-                            coltf.material = sub_shape.material
-                            coltf.unknown_float_1 = 0.1
-                            unk_8 = coltf.unknown_8_bytes
-                            unk_8[0] = 96
-                            unk_8[1] = 120
-                            unk_8[2] = 53
-                            unk_8[3] = 19
-                            unk_8[4] = 24
-                            unk_8[5] = 9
-                            unk_8[6] = 253
-                            unk_8[7] = 4
-                            coltf.transform.set_identity()
-                            coltf.shape = sub_shape
-                            block.sub_shapes[i] = coltf
+            for block in block_store.get_blocks_by_type(NifClasses.BhkListShape):
+                for i, sub_shape in enumerate(block.sub_shapes):
+                    if isinstance(sub_shape, NifClasses.BhkConvexVerticesShape):
+                        coltf = block_store.create_block("bhkConvexTransformShape")
+                        coltf.material = sub_shape.material
+                        coltf.unknown_float_1 = 0.1
+                        unk_8 = coltf.unknown_8_bytes
+                        unk_8[0] = 96
+                        unk_8[1] = 120
+                        unk_8[2] = 53
+                        unk_8[3] = 19
+                        unk_8[4] = 24
+                        unk_8[5] = 9
+                        unk_8[6] = 253
+                        unk_8[7] = 4
+                        coltf.transform.set_identity()
+                        coltf.shape = sub_shape
+                        block.sub_shapes[i] = coltf
 
             # export constraints
             for b_obj in self.exportable_objects:
@@ -234,16 +228,15 @@ class NifExport(NifCommon):
 
             # generate mopps (must be done after applying scale!)
             if bpy.context.scene.niftools_scene.is_bs():
-                for block in block_store.block_to_obj:
-                    if isinstance(block, NifClasses.BhkMoppBvTreeShape):
-                        NifLog.info("Generating mopp...")
-                        block.update_mopp()
-                        # print "=== DEBUG: MOPP TREE ==="
-                        # block.parse_mopp(verbose = True)
-                        # print "=== END OF MOPP TREE ==="
-                        # warn about mopps on non-static objects
-                        if any(sub_shape.layer != 1 for sub_shape in block.shape.sub_shapes):
-                            NifLog.warn("Mopps for non-static objects may not function correctly in-game. You may wish to use simple primitives for collision.")
+                for block in block_store.get_blocks_by_type(NifClasses.BhkMoppBvTreeShape):
+                    NifLog.info("Generating mopp...")
+                    block.update_mopp()
+                    # print "=== DEBUG: MOPP TREE ==="
+                    # block.parse_mopp(verbose = True)
+                    # print "=== END OF MOPP TREE ==="
+                    # warn about mopps on non-static objects
+                    if any(sub_shape.layer != 1 for sub_shape in block.shape.sub_shapes):
+                        NifLog.warn("Mopps for non-static objects may not function correctly in-game. You may wish to use simple primitives for collision.")
 
             # export nif file:
             # ----------------
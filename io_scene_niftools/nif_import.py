@@ -57,6 +57,8 @@ from io_scene_niftools.modules.nif_import.object import Object
 from io_scene_niftools.modules.nif_import.object.types import NiTypes
 from io_scene_niftools.modules.nif_import import scene
 from io_scene_niftools.modules.nif_import.property.object import ObjectProperty
+from io_scene_niftools.modules.nif_import.property.texture.loader import TextureLoader
+from io_scene_niftools.modules.nif_import.property.texture.resolver import texture_resolver
 
 from io_scene_niftools.nif_common import NifCommon
 from io_scene_niftools.utils import math
@@ -72,6 +74,9 @@ class NifImport(NifCommon):
     def execute(self):
         """Main import function."""
         self.load_files()  # needs to be first to provide version info.
+        # textures may have changed since the last import
+        texture_resolver.refresh()
+        TextureLoader.configure_archives()
 
         self.armaturehelper = Armature()
         self.boundhelper = Bound()
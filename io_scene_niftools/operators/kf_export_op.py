@@ -61,6 +61,27 @@ class KfExportOperator(Operator, ExportHelper, CommonDevOperator, CommonScale, C
         description="Use NiBSAnimationNode (for Morrowind)",
         default=False)
 
+    # Export every action of the armature to its own file.
+    batch_export: bpy.props.BoolProperty(
+        name="Export All Actions",
+        description="Export each action of the armature to its own kf file, named after the action, in the folder of "
+                    "the chosen file",
+        default=False)
+
+    # Only export the actions whose name matches this pattern.
+    action_filter: bpy.props.StringProperty(
+        name="Action Filter",
+        description="Only export the actions whose name matches this pattern, such as walk*",
+        default="*")
+
+    # Number of threads that write kf files in parallel.
+    max_workers: bpy.props.IntProperty(
+        name="Max Workers",
+        description="Maximum number of threads writing the kf files in parallel, 0 for one per CPU core, "
+                    "1 to write them one after another",
+        default=0,
+        min=0)
+
     def execute(self, context):
         """Execute the export operators: first constructs a
         :class:`~io_scene_niftools.nif_export.NifExport` instance and then
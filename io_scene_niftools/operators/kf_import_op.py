@@ -57,6 +57,14 @@ class KfImportOperator(Operator, ImportHelper, CommonDevOperator, CommonScale, C
 
     files: bpy.props.CollectionProperty(type=PropertyGroup)
 
+    # Number of processes that read kf files in parallel.
+    max_workers: bpy.props.IntProperty(
+        name="Max Workers",
+        description="Maximum number of processes reading the kf files in parallel, 0 for one per CPU core, "
+                    "1 to read them one after another",
+        default=0,
+        min=0)
+
     def execute(self, context):
         """Execute the import operators: first constructs a
         :class:`~io_scene_niftools.kf_import.KfImport` instance and then
@@ -117,6 +117,20 @@ class NifImportOperator(Operator, ImportHelper, CommonScale, CommonDevOperator,
         description="Loads texture embedded in .nif",
         default=False)
 
+    # Search Bethesda archives for textures that are not found as loose files.
+    archive_paths: bpy.props.StringProperty(
+        name="Archives",
+        description="BSA and BA2 archives, or folders containing them, separated by semicolons. "
+                    "If empty, the archives in the data folder of the nif are used",
+        default="")
+
+    archive_cache_size: bpy.props.IntProperty(
+        name="Archive Cache Size",
+        description="Size limit of the files extracted from archives, in megabytes. Files used in this session "
+                    "are kept even beyond it",
+        default=1024,
+        min=1)
+
     #Automatically detect armature orientation
     override_armature_orientation: bpy.props.BoolProperty(
         name="Override Armature Orientation",
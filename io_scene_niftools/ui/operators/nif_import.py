@@ -135,6 +135,8 @@ class OperatorImportTexturePanel(OperatorSetting, Panel):
         operator = sfile.active_operator
 
         layout.prop(operator, "use_embedded_texture")
+        layout.prop(operator, "archive_paths")
+        layout.prop(operator, "archive_cache_size")
 
 
 class OperatorImportArmaturePanel(OperatorSetting, Panel):
@@ -0,0 +1,126 @@
+"""Helpers to move data between NumPy arrays and nif struct arrays in bulk."""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2026, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above
+#      copyright notice, this list of conditions and the following
+#      disclaimer in the documentation and/or other materials provided
+#      with the distribution.
+#
+#    * Neither the name of the NIF File Format Library and Tools
+#      project nor the names of its contributors may be used to endorse
+#      or promote products derived from this software without specific
+#      prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+from collections import deque
+from functools import reduce
+from itertools import repeat
+from operator import attrgetter, getitem
+
+import numpy as np
+from numpy.lib import recfunctions
+
+
+def get_struct_array(n_array, attributes, dtype=None):
+    """Returns the attributes of the structs in n_array as array with one row per struct and one column per attribute.
+
+    NumPy backed arrays are returned as views where the layout allows it, so the data is not copied. For arrays of struct instances, all attributes are gathered in a single pass.
+
+    :param n_array: The nif array of structs.
+    :param attributes: The names of the struct attributes to read, nested attributes separated by dots.
+    :type attributes: tuple(str)
+    :param dtype: The type of the returned array, by default that of the nif data, so NumPy arrays need no copy.
+    :return: Array of shape (len(n_array), len(attributes)).
+    :rtype: np.ndarray
+    """
+    if isinstance(n_array, np.ndarray):
+        if not n_array.dtype.names:
+            return np.asarray(n_array, dtype=dtype).reshape((len(n_array), len(attributes)))
+        if not any("." in attribute for attribute in attributes):
+            # unstructured view of the selected fields, copied only if their layout requires it
+            return recfunctions.structured_to_unstructured(n_array[list(attributes)], dtype=dtype)
+        columns = [reduce(getitem, attribute.split("."), n_array) for attribute in attributes]
+        return np.asarray(np.stack(columns, axis=-1), dtype=dtype)
+    getter = attrgetter(*attributes)
+    return np.array([getter(n_struct) for n_struct in n_array], dtype=dtype).reshape((len(n_array), len(attributes)))
+
+
+def set_struct_array(n_array, values, attributes):
+    """Writes the rows of values into the structs of n_array, the columns going to attributes in order.
+
+    NumPy backed arrays are copied in one go. Struct arrays of nifgen (such as vertices, normals, UVs and the
+    BSTriShape vertex_data) are lists of struct instances, which cannot take a packed buffer, so this still costs one
+    setattr per struct per attribute. These are written column by column from plain Python lists through map, so
+    no NumPy scalar (or row view) is created per component and there is no Python loop body per struct.
+    See testframework/benchmark/bench_geometry_write.py for the gain over the per row loops.
+
+    :param n_array: The nif array, as created by reset_field.
+    :param values: Array with one row per struct and one column per attribute.
+    :type values: np.ndarray
+    :param attributes: The names of the struct attributes to write, nested attributes separated by dots.
+    :type attributes: tuple(str)
+    """
+    values = np.asarray(values).reshape((len(values), len(attributes)))
+    if isinstance(n_array, np.ndarray):
+        if n_array.dtype.names:
+            # structured array, one field per attribute
+            for attribute, column in zip(attributes, values.T):
+                *parents, name = attribute.split(".")
+                reduce(getitem, parents, n_array)[name] = column
+        else:
+            n_array.reshape(values.shape)[:] = values
+        return
+    for attribute, column in zip(attributes, values.T.tolist()):
+        parent, _, name = attribute.rpartition(".")
+        n_structs = map(attrgetter(parent), n_array) if parent else n_array
+        # consume the setattr calls without building a list of their results
+        deque(map(setattr, n_structs, repeat(name), column), maxlen=0)
+
+
+def set_array(n_array, values):
+    """Writes values into the (possibly nested) nif array of basic values n_array.
+
+    :param n_array: The nif array, as created by reset_field.
+    :param values: Array of the same shape as n_array.
+    :type values: np.ndarray
+    """
+    if isinstance(n_array, np.ndarray):
+        n_array[...] = np.asarray(values).reshape(n_array.shape)
+    else:
+        _set_nested_array(n_array, np.asarray(values).tolist())
+
+
+def _set_nested_array(n_array, values):
+    if isinstance(n_array, np.ndarray):
+        n_array[...] = values
+        return
+    for i, value in enumerate(values):
+        if isinstance(value, list):
+            _set_nested_array(n_array[i], value)
+        else:
+            n_array[i] = value
@@ -36,6 +36,8 @@
 #
 # ***** END LICENSE BLOCK *****
 
+import numpy as np
+
 import bpy
 from bpy_extras.io_utils import axis_conversion
 import mathutils
@@ -72,6 +74,121 @@ def import_keymat(rest_rot_inv, key_matrix):
     return correction @ (rest_rot_inv @ key_matrix) @ correction_inv
 
 
+def import_keymats(rest_rot_inv, key_matrices):
+    """Handles space conversions for an array of imported keys, as import_keymat does for a single one.
+
+    :param rest_rot_inv: The inverse rest rotation of the bone.
+    :type rest_rot_inv: mathutils.Matrix
+    :param key_matrices: Array of shape (n, 4, 4).
+    :type key_matrices: np.ndarray
+    :return: The converted key matrices, as array of shape (n, 4, 4).
+    :rtype: np.ndarray
+    """
+    return np.array(correction) @ (np.array(rest_rot_inv) @ key_matrices) @ np.array(correction_inv)
+
+
+def quats_to_matrices(quats):
+    """Converts an array of (w, x, y, z) quaternions of shape (n, 4) to rotation matrices of shape (n, 3, 3)."""
+    quats = np.asarray(quats, dtype=float)
+    norms = np.linalg.norm(quats, axis=1, keepdims=True)
+    w, x, y, z = (quats / np.where(norms > 0.0, norms, 1.0)).T
+    return np.stack((
+        np.stack((1.0 - 2.0 * (y * y + z * z), 2.0 * (x * y - w * z), 2.0 * (x * z + w * y)), axis=-1),
+        np.stack((2.0 * (x * y + w * z), 1.0 - 2.0 * (x * x + z * z), 2.0 * (y * z - w * x)), axis=-1),
+        np.stack((2.0 * (x * z - w * y), 2.0 * (y * z + w * x), 1.0 - 2.0 * (x * x + y * y)), axis=-1)), axis=1)
+
+
+def matrices_to_quats(matrices):
+    """Converts an array of rotation matrices of shape (n, 3, 3) to (w, x, y, z) quaternions of shape (n, 4).
+
+    Like Matrix.to_quaternion, the quaternions are normalized and have a non-negative w.
+    """
+    m = np.asarray(matrices, dtype=float)[:, :3, :3]
+    diagonal = np.stack((m[:, 0, 0] + m[:, 1, 1] + m[:, 2, 2], m[:, 0, 0], m[:, 1, 1], m[:, 2, 2]), axis=1)
+    # solve for the largest component first to stay accurate, per quaternion
+    largest = np.argmax(diagonal, axis=1)
+    quats = np.empty((len(m), 4))
+    for i in range(4):
+        selected = largest == i
+        mi = m[selected]
+        if i == 0:
+            s = 2.0 * np.sqrt(1.0 + diagonal[selected, 0])
+            quats[selected] = np.stack((0.25 * s, (mi[:, 2, 1] - mi[:, 1, 2]) / s, (mi[:, 0, 2] - mi[:, 2, 0]) / s,
+                                        (mi[:, 1, 0] - mi[:, 0, 1]) / s), axis=1)
+        elif i == 1:
+            s = 2.0 * np.sqrt(1.0 + mi[:, 0, 0] - mi[:, 1, 1] - mi[:, 2, 2])
+            quats[selected] = np.stack(((mi[:, 2, 1] - mi[:, 1, 2]) / s, 0.25 * s, (mi[:, 0, 1] + mi[:, 1, 0]) / s,
+                                        (mi[:, 0, 2] + mi[:, 2, 0]) / s), axis=1)
+        elif i == 2:
+            s = 2.0 * np.sqrt(1.0 - mi[:, 0, 0] + mi[:, 1, 1] - mi[:, 2, 2])
+            quats[selected] = np.stack(((mi[:, 0, 2] - mi[:, 2, 0]) / s, (mi[:, 0, 1] + mi[:, 1, 0]) / s, 0.25 * s,
+                                        (mi[:, 1, 2] + mi[:, 2, 1]) / s), axis=1)
+        else:
+            s = 2.0 * np.sqrt(1.0 - mi[:, 0, 0] - mi[:, 1, 1] + mi[:, 2, 2])
+            quats[selected] = np.stack(((mi[:, 1, 0] - mi[:, 0, 1]) / s, (mi[:, 0, 2] + mi[:, 2, 0]) / s,
+                                        (mi[:, 1, 2] + mi[:, 2, 1]) / s, 0.25 * s), axis=1)
+    quats[quats[:, 0] < 0.0] *= -1.0
+    return quats / np.linalg.norm(quats, axis=1, keepdims=True)
+
+
+def eulers_to_matrices(eulers):
+    """Converts an array of XYZ euler angles of shape (n, 3) to rotation matrices of shape (n, 3, 3)."""
+    cos_x, cos_y, cos_z = np.cos(np.asarray(eulers, dtype=float)).T
+    sin_x, sin_y, sin_z = np.sin(np.asarray(eulers, dtype=float)).T
+    return np.stack((
+        np.stack((cos_y * cos_z, sin_x * sin_y * cos_z - cos_x * sin_z, cos_x * sin_y * cos_z + sin_x * sin_z), axis=-1),
+        np.stack((cos_y * sin_z, sin_x * sin_y * sin_z + cos_x * cos_z, cos_x * sin_y * sin_z - sin_x * cos_z), axis=-1),
+        np.stack((-sin_y, sin_x * cos_y, cos_x * cos_y), axis=-1)), axis=1)
+
+
+def matrices_to_eulers(matrices, compatible_eulers=None):
+    """Converts an array of rotation matrices of shape (n, 3, 3) to XYZ euler angles of shape (n, 3).
+
+    Like Matrix.to_euler, the one of both possible solutions with the smallest angles is chosen or, if
+    compatible_eulers are given, the one closest to those.
+    """
+    m = np.asarray(matrices, dtype=float)[:, :3, :3]
+    cos_y = np.hypot(m[:, 0, 0], m[:, 1, 0])
+    eulers_1 = np.stack((np.arctan2(m[:, 2, 1], m[:, 2, 2]), np.arctan2(-m[:, 2, 0], cos_y),
+                         np.arctan2(m[:, 1, 0], m[:, 0, 0])), axis=1)
+    eulers_2 = np.stack((np.arctan2(-m[:, 2, 1], -m[:, 2, 2]), np.arctan2(-m[:, 2, 0], -cos_y),
+                         np.arctan2(-m[:, 1, 0], -m[:, 0, 0])), axis=1)
+    # gimbal lock, x and z rotate about the same axis
+    locked = cos_y <= 16.0 * np.finfo(np.float32).eps
+    eulers_1[locked] = np.stack((np.arctan2(-m[locked, 1, 2], m[locked, 1, 1]), np.arctan2(-m[locked, 2, 0], cos_y[locked]),
+                                 np.zeros(np.count_nonzero(locked))), axis=1)
+    eulers_2[locked] = eulers_1[locked]
+    if compatible_eulers is None:
+        use_2 = np.abs(eulers_1).sum(axis=1) > np.abs(eulers_2).sum(axis=1)
+    else:
+        compatible_eulers = np.asarray(compatible_eulers, dtype=float)
+        eulers_1 = _make_compatible_eulers(eulers_1, compatible_eulers)
+        eulers_2 = _make_compatible_eulers(eulers_2, compatible_eulers)
+        use_2 = np.abs(eulers_1 - compatible_eulers).sum(axis=1) > np.abs(eulers_2 - compatible_eulers).sum(axis=1)
+    return np.where(use_2[:, None], eulers_2, eulers_1)
+
+
+def _make_compatible_eulers(eulers, compatible_eulers):
+    """Adds whole turns to the eulers to bring them close to compatible_eulers, like Euler.make_compatible."""
+    # blender uses a threshold a bit above pi for this
+    pi_threshold = 5.1
+    eulers = np.array(eulers)
+    differences = eulers - compatible_eulers
+    # correct differences of about whole turns first
+    turns = np.floor(np.abs(differences) / (2.0 * np.pi) + 0.5)
+    turns[np.abs(differences) <= pi_threshold] = 0.0
+    eulers -= np.sign(differences) * turns * 2.0 * np.pi
+    differences = eulers - compatible_eulers
+    # a single axis differing by more than half a turn gets another turn
+    large = np.abs(differences) > 3.2
+    small = np.abs(differences) < 1.6
+    for axis in range(3):
+        others = [other for other in range(3) if other != axis]
+        single = large[:, axis] & small[:, others[0]] & small[:, others[1]]
+        eulers[single, axis] -= np.sign(differences[single, axis]) * 2.0 * np.pi
+    return eulers
+
+
 def export_keymat(rest_rot, key_matrix, bone):
     """Handles space conversions for exported keys """
     if bone:
@@ -80,6 +197,23 @@ def export_keymat(rest_rot, key_matrix, bone):
         return rest_rot @ key_matrix
 
 
+def export_keymats(rest_rot, key_matrices, bone):
+    """Handles space conversions for an array of exported keys, as export_keymat does for a single one.
+
+    :param rest_rot: The rest rotation of the bone or object.
+    :type rest_rot: mathutils.Matrix
+    :param key_matrices: Array of shape (n, 4, 4).
+    :type key_matrices: np.ndarray
+    :param bone: Whether the keys belong to a bone.
+    :return: The converted key matrices, as array of shape (n, 4, 4).
+    :rtype: np.ndarray
+    """
+    if bone:
+        return np.array(rest_rot) @ (np.array(correction_inv) @ key_matrices @ np.array(correction))
+    else:
+        return np.array(rest_rot) @ key_matrices
+
+
 def _get_bone_bind(bone):
     """Get a nif local-space matrix from a blender bone. """
     bind = bone.matrix_local @ correction
@@ -0,0 +1,121 @@
+"""Benchmark of the loop to nif vertex triangle remapping and the flat shading normal override on export.
+
+Run with "blender --background --factory-startup --python testframework/benchmark/bench_geometry_export.py"
+"""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2026, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above
+#      copyright notice, this list of conditions and the following
+#      disclaimer in the documentation and/or other materials provided
+#      with the distribution.
+#
+#    * Neither the name of the NIF File Format Library and Tools
+#      project nor the names of its contributors may be used to endorse
+#      or promote products derived from this software without specific
+#      prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import inspect
+import os
+import re
+import sys
+import textwrap
+import types
+
+import bpy
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from testframework.benchmark import timed, report
+from io_scene_niftools.modules.nif_export.geometry import mesh as mesh_module
+from io_scene_niftools.modules.nif_export.geometry.mesh import Mesh
+from io_scene_niftools.utils.singleton import NifOp
+
+# a 708 x 708 grid has 707 * 707 quads, so just over 1M triangles
+GRID_SUBDIVISIONS = 708
+
+
+def create_grid_mesh():
+    """Creates a grid mesh of about 1M triangles, where every other face is flat shaded."""
+    bpy.ops.mesh.primitive_grid_add(x_subdivisions=GRID_SUBDIVISIONS, y_subdivisions=GRID_SUBDIVISIONS)
+    b_mesh = bpy.context.active_object.data
+    use_smooth = np.zeros(len(b_mesh.polygons), dtype=bool)
+    use_smooth[::2] = True
+    b_mesh.polygons.foreach_set('use_smooth', use_smooth)
+    b_mesh.calc_loop_triangles()
+    return b_mesh
+
+
+# the changed lines of the current Mesh methods, and the previous per polygon and per triangle loops they replaced
+LEGACY_CODE = {
+    "get_mesh_data": (
+        r"^( *)poly_smooth = np\.zeros\(n_polys, dtype=bool\)\n.*?^ *del poly_smooth, poly_normals, flat_loops\n",
+        "\\1for poly in b_mesh.polygons:\n"
+        "\\1    if not poly.use_smooth:\n"
+        "\\1        loop_normals[poly.loop_indices] = poly.normal\n"),
+    "merge_loops": (
+        r"^( *)blend_triangles = (hash_to_nif_vert\[sel_to_hash\[loop_to_sel\[)blend_triangles(\]\]\] - nif_vert_offset)$",
+        "\\1for i in range(len(blend_triangles)):\n"
+        "\\1    blend_triangles[i] = \\2blend_triangles[i]\\3"),
+}
+
+
+def legacy_mesh(name):
+    """Returns a Mesh whose method name is the current one, except for its lines in LEGACY_CODE."""
+    pattern, replacement = LEGACY_CODE[name]
+    source = textwrap.dedent(inspect.getsource(getattr(Mesh, name)))
+    source, count = re.subn(pattern, replacement, source, flags=re.MULTILINE | re.DOTALL)
+    assert count == 1, f"changed lines not found in Mesh.{name}"
+    namespace = {}
+    exec(compile(source, inspect.getsourcefile(Mesh), "exec"), vars(mesh_module), namespace)
+    return type("LegacyMesh", (Mesh,), {name: namespace[name]})()
+
+
+def run():
+    NifOp.props = types.SimpleNamespace(epsilon=0.0, sep_tangent_space=True)
+    mesh_helper = Mesh()
+    b_mesh = create_grid_mesh()
+    print(f"Mesh with {len(b_mesh.loop_triangles)} triangles and {len(b_mesh.loops)} loops")
+
+    # the full methods as they run on export, so the timings include reading the mesh
+    args = (b_mesh, False, True, False, False)
+    legacy_time, legacy_mesh_data = timed(legacy_mesh("get_mesh_data").get_mesh_data, *args)
+    new_time, new_mesh_data = timed(mesh_helper.get_mesh_data, *args)
+    assert np.allclose(legacy_mesh_data['NORMAL'], new_mesh_data['NORMAL'])
+    report("Mesh.get_mesh_data with the flat shading normal override", legacy_time, new_time)
+
+    args = (b_mesh, False, False, {0: (True, False)})
+    legacy_time, legacy_geom_data = timed(legacy_mesh("merge_loops").get_geom_data, *args, repeat=1)
+    new_time, new_geom_data = timed(mesh_helper.get_geom_data, *args, repeat=1)
+    assert np.array_equal(legacy_geom_data[0][0], new_geom_data[0][0])
+    report("Mesh.get_geom_data with the loop to nif vertex triangle remapping", legacy_time, new_time)
+
+
+if __name__ == "__main__":
+    run()
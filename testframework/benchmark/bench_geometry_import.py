@@ -0,0 +1,120 @@
+"""Benchmark of the UV and vertex colour loop mapping and face smoothing on import, on a mesh of about 500k loops.
+
+Run with "blender --background --factory-startup --python testframework/benchmark/bench_geometry_import.py"
+"""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2026, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above
+#      copyright notice, this list of conditions and the following
+#      disclaimer in the documentation and/or other materials provided
+#      with the distribution.
+#
+#    * Neither the name of the NIF File Format Library and Tools
+#      project nor the names of its contributors may be used to endorse
+#      or promote products derived from this software without specific
+#      prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import os
+import sys
+
+import bpy
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from testframework.benchmark import timed, report
+from io_scene_niftools.modules.nif_import.geometry.mesh import Mesh
+from io_scene_niftools.modules.nif_import.geometry.vertex import Vertex
+
+# a 290 x 290 vertex grid has 289 * 289 quads, so 167k triangles and just over 500k loops
+GRID_SIZE = 290
+
+
+def create_grid_mesh():
+    """Creates a triangulated grid mesh through the import path, and random per-vertex UVs and colours."""
+    x, y = np.meshgrid(np.arange(GRID_SIZE), np.arange(GRID_SIZE), indexing='ij')
+    vertices = np.stack((x.reshape(-1), y.reshape(-1), np.zeros(GRID_SIZE * GRID_SIZE)), axis=1)
+    quads = (x[:-1, :-1] * GRID_SIZE + y[:-1, :-1]).reshape(-1)
+    triangles = np.concatenate((
+        np.stack((quads, quads + GRID_SIZE, quads + 1), axis=1),
+        np.stack((quads + 1, quads + GRID_SIZE, quads + GRID_SIZE + 1), axis=1)))
+    b_mesh = bpy.data.meshes.new("benchmark")
+    Mesh.create_mesh(b_mesh, vertices, triangles)
+    rng = np.random.default_rng(0)
+    return b_mesh, rng.random((len(vertices), 2)), rng.random((len(vertices), 4))
+
+
+def legacy_map_uv_layer(b_mesh, uv_sets):
+    for uv_i, uv_set in enumerate(uv_sets):
+        b_mesh.uv_layers.new(name=f"UV{uv_i}")
+        b_mesh.uv_layers[-1].data.foreach_set("uv", [coord for uv in [uv_set[loop.vertex_index] for loop in b_mesh.loops] for coord in (uv[0], 1.0 - uv[1])])
+
+
+def legacy_map_loop_colors(b_mesh, vertex_colors):
+    return [channel for col in [vertex_colors[loop.vertex_index] for loop in b_mesh.loops] for channel in col]
+
+
+def legacy_set_face_smooth(b_mesh, smooth):
+    for poly in b_mesh.polygons:
+        poly.use_smooth = smooth
+        poly.material_index = 0
+
+
+def get_uvs(b_mesh):
+    uvs = np.empty(2 * len(b_mesh.loops), dtype=np.float32)
+    b_mesh.uv_layers[-1].data.foreach_get("uv", uvs)
+    return uvs
+
+
+def run():
+    b_mesh, uvs, colors = create_grid_mesh()
+    print(f"Mesh with {len(b_mesh.polygons)} triangles and {len(b_mesh.loops)} loops")
+
+    legacy_time, _ = timed(legacy_map_uv_layer, b_mesh, [uvs], repeat=1)
+    legacy_uvs = get_uvs(b_mesh)
+    b_mesh.uv_layers.remove(b_mesh.uv_layers[-1])
+    new_time, _ = timed(Vertex.map_uv_layer, b_mesh, [uvs], repeat=1)
+    # the legacy path flips V in double precision before storing float32
+    assert np.allclose(legacy_uvs, get_uvs(b_mesh), atol=1e-6)
+    report("UV loop mapping", legacy_time, new_time)
+
+    # the loop colour mapping of blender before 3.2, timed without the layer it writes to
+    legacy_time, legacy_colors = timed(legacy_map_loop_colors, b_mesh, colors, repeat=1)
+    new_time, new_colors = timed(lambda: colors[Vertex.get_loop_vertices(b_mesh)].reshape(-1))
+    assert np.allclose(legacy_colors, new_colors)
+    report("vertex colour loop mapping", legacy_time, new_time)
+
+    legacy_time, _ = timed(legacy_set_face_smooth, b_mesh, True, repeat=1)
+    new_time, _ = timed(Mesh.set_face_smooth, b_mesh, False)
+    assert not any(poly.use_smooth for poly in b_mesh.polygons)
+    report("face smoothing", legacy_time, new_time)
+
+
+if __name__ == "__main__":
+    run()
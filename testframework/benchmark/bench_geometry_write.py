@@ -0,0 +1,176 @@
+"""Benchmark of writing exported vertex data into the struct arrays of NiTriShapeData and BSTriShape blocks.
+
+Run with "blender --background --factory-startup --python testframework/benchmark/bench_geometry_write.py"
+"""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2026, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above
+#      copyright notice, this list of conditions and the following
+#      disclaimer in the documentation and/or other materials provided
+#      with the distribution.
+#
+#    * Neither the name of the NIF File Format Library and Tools
+#      project nor the names of its contributors may be used to endorse
+#      or promote products derived from this software without specific
+#      prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from nifgen.formats.nif import NifFormat
+from testframework.benchmark import timed, report
+from io_scene_niftools.utils.arrays import get_struct_array, set_struct_array
+
+NUM_VERTICES = 200000
+
+
+def create_vertex_information():
+    """Returns random positions, normals, colours and uvs as they come out of Mesh.get_geom_data."""
+    rng = np.random.default_rng(0)
+    normals = rng.random((NUM_VERTICES, 3)) - 0.5
+    normals /= np.linalg.norm(normals, axis=1, keepdims=True)
+    return {'POSITION': rng.random((NUM_VERTICES, 3)) * 100.0,
+            'NORMAL': normals,
+            'COLOR': rng.random((NUM_VERTICES, 4)),
+            'UV': rng.random((NUM_VERTICES, 1, 2))}
+
+
+def create_ni_data(data):
+    """Returns an NiTriShapeData with freshly reset vertex, normal, colour and uv arrays."""
+    n_data = NifFormat.niobject_map["NiTriShapeData"](data)
+    n_data.num_vertices = NUM_VERTICES
+    n_data.has_vertices = True
+    n_data.has_normals = True
+    n_data.has_vertex_colors = True
+    n_data.data_flags.has_uv = True
+    n_data.data_flags.num_uv_sets = 1
+    for field in ("vertices", "normals", "vertex_colors", "uv_sets"):
+        n_data.reset_field(field)
+    return n_data
+
+
+def create_bs_geom(data):
+    """Returns a BSTriShape with freshly reset vertex data that has positions, uvs and normals."""
+    n_geom = NifFormat.niobject_map["BSTriShape"](data)
+    vertex_flags = n_geom.vertex_desc.vertex_attributes
+    vertex_flags.vertex = True
+    vertex_flags.u_vs = True
+    vertex_flags.normals = True
+    n_geom.vertex_desc.vertex_data_size = 6
+    n_geom.num_vertices = NUM_VERTICES
+    n_geom.reset_field('vertex_data')
+    return n_geom
+
+
+def legacy_set_ni_data(n_data, vertex_information):
+    for n_v, b_v in zip(n_data.vertices, vertex_information['POSITION']):
+        n_v.x, n_v.y, n_v.z = b_v
+    for n_v, b_v in zip(n_data.normals, vertex_information['NORMAL']):
+        n_v.x, n_v.y, n_v.z = b_v
+    for n_v, b_v in zip(n_data.vertex_colors, vertex_information['COLOR']):
+        n_v.r, n_v.g, n_v.b, n_v.a = b_v
+    uv_coords = vertex_information['UV']
+    for j, n_uv_set in enumerate(n_data.uv_sets):
+        for i, n_uv in enumerate(n_uv_set):
+            n_uv.u = uv_coords[i][j][0]
+            n_uv.v = 1.0 - uv_coords[i][j][1]
+
+
+def new_set_ni_data(n_data, vertex_information):
+    set_struct_array(n_data.vertices, vertex_information['POSITION'], ('x', 'y', 'z'))
+    set_struct_array(n_data.normals, vertex_information['NORMAL'], ('x', 'y', 'z'))
+    set_struct_array(n_data.vertex_colors, vertex_information['COLOR'], ('r', 'g', 'b', 'a'))
+    uv_coords = vertex_information['UV'] * (1.0, -1.0) + (0.0, 1.0)
+    for j, n_uv_set in enumerate(n_data.uv_sets):
+        set_struct_array(n_uv_set, uv_coords[:, j], ('u', 'v'))
+
+
+def legacy_set_bs_geom(n_geom, vertex_information):
+    for n_v, b_v in zip([data.vertex for data in n_geom.vertex_data], vertex_information['POSITION']):
+        n_v.x, n_v.y, n_v.z = b_v
+    for n_uv, b_uv in zip([data.uv for data in n_geom.vertex_data], vertex_information['UV']):
+        n_uv.u = b_uv[0][0]
+        n_uv.v = 1.0 - b_uv[0][1]
+    for n_n, b_n in zip([data.normal for data in n_geom.vertex_data], vertex_information['NORMAL']):
+        n_n.x, n_n.y, n_n.z = b_n
+
+
+def new_set_bs_geom(n_geom, vertex_information):
+    vertex_data = n_geom.vertex_data
+    set_struct_array([data.vertex for data in vertex_data], vertex_information['POSITION'], ('x', 'y', 'z'))
+    uvs = vertex_information['UV'][:, 0] * (1.0, -1.0) + (0.0, 1.0)
+    set_struct_array([data.uv for data in vertex_data], uvs, ('u', 'v'))
+    set_struct_array([data.normal for data in vertex_data], vertex_information['NORMAL'], ('x', 'y', 'z'))
+
+
+def get_ni_data(n_data):
+    return [get_struct_array(n_data.vertices, ('x', 'y', 'z'), float),
+            get_struct_array(n_data.normals, ('x', 'y', 'z'), float),
+            get_struct_array(n_data.vertex_colors, ('r', 'g', 'b', 'a'), float),
+            get_struct_array(n_data.uv_sets[0], ('u', 'v'), float)]
+
+
+def get_bs_geom(n_geom):
+    vertex_data = n_geom.vertex_data
+    return [get_struct_array([data.vertex for data in vertex_data], ('x', 'y', 'z'), float),
+            get_struct_array([data.uv for data in vertex_data], ('u', 'v'), float),
+            get_struct_array([data.normal for data in vertex_data], ('x', 'y', 'z'), float)]
+
+
+def compare(legacy_arrays, new_arrays):
+    for legacy_array, new_array in zip(legacy_arrays, new_arrays):
+        # BSTriShape stores half floats, so allow for their rounding
+        assert np.allclose(legacy_array, new_array, rtol=1e-3, atol=1e-3)
+
+
+def run():
+    vertex_information = create_vertex_information()
+    print(f"Vertex data of {NUM_VERTICES} vertices")
+
+    data = NifFormat.NifFile.from_version(0x14000005, 11, 11)
+    legacy_data, new_data = create_ni_data(data), create_ni_data(data)
+    legacy_time, _ = timed(legacy_set_ni_data, legacy_data, vertex_information)
+    new_time, _ = timed(new_set_ni_data, new_data, vertex_information)
+    compare(get_ni_data(legacy_data), get_ni_data(new_data))
+    report("NiTriShapeData vertices, normals, colours and uvs", legacy_time, new_time)
+
+    data = NifFormat.NifFile.from_version(0x14020007, 12, 100)
+    legacy_geom, new_geom = create_bs_geom(data), create_bs_geom(data)
+    legacy_time, _ = timed(legacy_set_bs_geom, legacy_geom, vertex_information)
+    new_time, _ = timed(new_set_bs_geom, new_geom, vertex_information)
+    compare(get_bs_geom(legacy_geom), get_bs_geom(new_geom))
+    report("BSTriShape vertex data positions, uvs and normals", legacy_time, new_time)
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,130 @@
+"""Benchmark of the skin partitioner on a synthetic skinned mesh of 100k triangles.
+
+Run with "blender --background --factory-startup --python testframework/benchmark/bench_skin_partition.py -- [revision]"
+to also time the implementation of skin_partition.py at the given git revision, and check that both create the same
+partitions.
+"""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2026, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above
+#      copyright notice, this list of conditions and the following
+#      disclaimer in the documentation and/or other materials provided
+#      with the distribution.
+#
+#    * Neither the name of the NIF File Format Library and Tools
+#      project nor the names of its contributors may be used to endorse
+#      or promote products derived from this software without specific
+#      prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import os
+import subprocess
+import sys
+import types
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT)
+
+from nifgen.formats.nif import NifFormat
+from testframework.benchmark import timed, report
+from io_scene_niftools.modules.nif_export.geometry.mesh import skin_partition
+
+SKIN_PARTITION_PATH = "io_scene_niftools/modules/nif_export/geometry/mesh/skin_partition.py"
+# a 225 x 225 vertex grid has 224 * 224 quads, so just over 100k triangles
+GRID_SIZE = 225
+NUM_BONES = 24
+
+
+def create_skinned_grid():
+    """Returns the triangles and (vertex, bone, weight) arrays of a grid skinned to a chain of bones along its x axis,
+    where each vertex is influenced by the three nearest bones."""
+    x, y = np.meshgrid(np.arange(GRID_SIZE), np.arange(GRID_SIZE), indexing='ij')
+    quads = (x[:-1, :-1] * GRID_SIZE + y[:-1, :-1]).reshape(-1)
+    triangles = np.concatenate((
+        np.stack((quads, quads + GRID_SIZE, quads + 1), axis=1),
+        np.stack((quads + 1, quads + GRID_SIZE, quads + GRID_SIZE + 1), axis=1)))
+    # vary the bone chain along y, so partitions do not simply follow the grid rows
+    bone_position = (x + 2 * np.sin(y / 8.0)).reshape(-1) * (NUM_BONES - 1) / (GRID_SIZE - 1)
+    nearest = np.clip(np.rint(bone_position).astype(int)[:, None] + np.arange(-1, 2), 0, NUM_BONES - 1)
+    weight_values = 1.0 / (1.0 + np.abs(bone_position[:, None] - nearest))
+    weight_verts = np.repeat(np.arange(GRID_SIZE * GRID_SIZE), 3)
+    weight_bones = nearest.reshape(-1)
+    # merge duplicate bones of the clipped ends
+    keys, inverse = np.unique(np.stack((weight_verts, weight_bones), axis=1), axis=0, return_inverse=True)
+    weight_values = np.bincount(inverse.reshape(-1), weights=weight_values.reshape(-1))
+    weight_values /= np.bincount(keys[:, 0], weights=weight_values)[keys[:, 0]]
+    return triangles, (keys[:, 0], keys[:, 1], weight_values)
+
+
+def create_geometry(data, num_vertices):
+    """Returns a stand-in geometry with a fresh skin instance, to which update_skin_partition can be bound."""
+    n_skin_data = NifFormat.niobject_map["NiSkinData"](data)
+    n_skin_inst = NifFormat.niobject_map["NiSkinInstance"](data)
+    n_skin_inst.data = n_skin_data
+    return types.SimpleNamespace(skin_instance=n_skin_inst, data=types.SimpleNamespace(num_vertices=num_vertices),
+                                 _validate_skin=lambda: None)
+
+
+def load_revision(revision):
+    """Returns the skin_partition module as it was at the given git revision."""
+    source = subprocess.check_output(["git", "show", f"{revision}:{SKIN_PARTITION_PATH}"], cwd=ROOT)
+    module = types.ModuleType("legacy_skin_partition")
+    exec(compile(source, SKIN_PARTITION_PATH, "exec"), module.__dict__)
+    return module
+
+
+def partition(module, data, triangles, vertex_weights):
+    n_geom = create_geometry(data, len(np.unique(triangles)))
+    lostweight = module.update_skin_partition.__get__(n_geom)(
+        maxbonesperpartition=4, maxbonespervertex=4, stripify=False, triangles=triangles.tolist(),
+        trianglepartmap=[0] * len(triangles), vertex_weights=vertex_weights)
+    partitions = n_geom.skin_instance.skin_partition.partitions
+    return lostweight, [list(n_part.bones) for n_part in partitions]
+
+
+def run():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    data = NifFormat.NifFile.from_version(0x14020007, 11, 34)
+    triangles, vertex_weights = create_skinned_grid()
+    print(f"Skinned mesh with {len(triangles)} triangles and {NUM_BONES} bones")
+
+    new_time, (new_lostweight, new_bones) = timed(partition, skin_partition, data, triangles, vertex_weights, repeat=1)
+    if argv:
+        legacy_time, (legacy_lostweight, legacy_bones) = timed(
+            partition, load_revision(argv[0]), data, triangles, vertex_weights, repeat=1)
+        assert legacy_bones == new_bones
+        assert np.isclose(legacy_lostweight, new_lostweight)
+        report(f"update_skin_partition ({len(new_bones)} partitions)", legacy_time, new_time)
+    else:
+        print(f"update_skin_partition ({len(new_bones)} partitions): {new_time:.4f}s")
+
+
+if __name__ == "__main__":
+    run()
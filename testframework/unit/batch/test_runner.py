@@ -0,0 +1,138 @@
+"""Tests for the job collection, option parsing and reporting of the batch conversion runner."""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2026, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above
+#      copyright notice, this list of conditions and the following
+#      disclaimer in the documentation and/or other materials provided
+#      with the distribution.
+#
+#    * Neither the name of the NIF File Format Library and Tools
+#      project nor the names of its contributors may be used to endorse
+#      or promote products derived from this software without specific
+#      prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import io
+import json
+import os
+import queue
+import shutil
+import tempfile
+
+import nose
+
+from io_scene_niftools.batch import runner
+
+
+class TestRunner:
+
+    @classmethod
+    def setup_class(cls):
+        cls.working_dir = tempfile.mkdtemp()
+        cls.source = os.path.join(cls.working_dir, "source")
+        for rel_path in ("b.nif", os.path.join("a", "c.NIF"), os.path.join("a", "d.kf"), "readme.txt"):
+            file_path = os.path.join(cls.source, rel_path)
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            with open(file_path, "wb") as stream:
+                stream.write(b"data")
+
+    @classmethod
+    def teardown_class(cls):
+        shutil.rmtree(cls.working_dir)
+
+    def test_collect_directory(self):
+        output = os.path.join(self.working_dir, "output")
+        jobs = runner.collect_jobs(self.source, output)
+        # sorted with the files of a folder before its subfolders, extensions are case insensitive and the output
+        # mirrors the source
+        nose.tools.assert_equal(jobs, [
+            {"input": os.path.join(self.source, "b.nif"), "output": os.path.join(output, "b.nif"),
+             "mode": "roundtrip"},
+            {"input": os.path.join(self.source, "a", "c.NIF"), "output": os.path.join(output, "a", "c.NIF"),
+             "mode": "roundtrip"}])
+        jobs = runner.collect_jobs(self.source, output, extensions=(".kf",))
+        nose.tools.assert_equal([job["input"] for job in jobs], [os.path.join(self.source, "a", "d.kf")])
+
+    def test_collect_import_only(self):
+        jobs = runner.collect_jobs(self.source, mode="import")
+        nose.tools.assert_equal([sorted(job) for job in jobs], [["input", "mode"], ["input", "mode"]])
+        nose.tools.assert_true(all(job["mode"] == "import" for job in jobs))
+
+    @nose.tools.raises(ValueError)
+    def test_collect_roundtrip_without_output(self):
+        runner.collect_jobs(self.source)
+
+    def test_collect_manifest(self):
+        manifest = os.path.join(self.working_dir, "manifest.txt")
+        with open(manifest, "w", encoding="utf-8") as stream:
+            stream.write("# comment\n\nsource/b.nif\tout/b_roundtrip.nif\n  source/a/c.NIF  \n")
+        jobs = runner.collect_jobs(manifest, os.path.join(self.working_dir, "output"))
+        # paths are relative to the manifest, files without output path go to the output directory by name
+        nose.tools.assert_equal(jobs, [
+            {"input": os.path.join(self.source, "b.nif"),
+             "output": os.path.join(self.working_dir, "out", "b_roundtrip.nif"), "mode": "roundtrip"},
+            {"input": os.path.join(self.source, "a", "c.NIF"),
+             "output": os.path.join(self.working_dir, "output", "c.NIF"), "mode": "roundtrip"}])
+
+    def test_parse_options(self):
+        options = runner.parse_options(["scale_correction=0.1", "use_custom_normals=true", "game=\"SKYRIM\"",
+                                        "animation=ANIMATION", "path=a=b", "empty="])
+        nose.tools.assert_equal(options, {"scale_correction": 0.1, "use_custom_normals": True, "game": "SKYRIM",
+                                          "animation": "ANIMATION", "path": "a=b", "empty": ""})
+        nose.tools.assert_equal(runner.parse_options(None), {})
+
+    def test_write_report(self):
+        results = [
+            {"input": "a.nif", "status": "FINISHED", "import_options": {"a": 1}, "export_options": {}},
+            {"input": "b.nif", "status": "CRASHED", "errors": ["Worker 0 crashed on this file"]},
+            {"input": "c.nif", "status": "FINISHED"},
+            None,
+        ]
+        report_path = os.path.join(self.working_dir, "report.json")
+        runner.write_report(results, report_path, 1.5)
+        with open(report_path, encoding="utf-8") as stream:
+            report = json.load(stream)
+        nose.tools.assert_equal(report["summary"], {"files": 4, "statuses": {"FINISHED": 2, "CRASHED": 1, "ERROR": 1},
+                                                    "total_time": 1.5})
+        # the operator options are left out
+        nose.tools.assert_equal(report["results"][0], {"input": "a.nif", "status": "FINISHED"})
+        nose.tools.assert_equal(report["results"][3], {"status": "ERROR"})
+
+    def test_read_output(self):
+        log_path = os.path.join(self.working_dir, "worker.log")
+        output = f"Blender started\n{runner.RESULT_MARKER}{{\"ready\": true}}\nImporting\n"
+        process = type("Process", (), {"stdout": io.StringIO(output)})
+        messages = queue.Queue()
+        log = open(log_path, "w", encoding="utf-8")
+        runner.Worker._read_output(process, messages, log)
+        nose.tools.assert_equal(messages.get_nowait(), {"ready": True})
+        nose.tools.assert_is_none(messages.get_nowait())
+        # the reader closes the log at the end of the output
+        nose.tools.assert_true(log.closed)
+        with open(log_path, encoding="utf-8") as stream:
+            nose.tools.assert_equal(stream.read(), "Blender started\nImporting\n")
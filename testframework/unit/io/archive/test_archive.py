@@ -0,0 +1,291 @@
+"""Unit testing reading textures from bsa and ba2 archives"""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2026, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above
+#      copyright notice, this list of conditions and the following
+#      disclaimer in the documentation and/or other materials provided
+#      with the distribution.
+#
+#    * Neither the name of the NIF File Format Library and Tools
+#      project nor the names of its contributors may be used to endorse
+#      or promote products derived from this software without specific
+#      prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import os
+import shutil
+import struct
+import tempfile
+import zlib
+
+import nose
+
+from io_scene_niftools.file_io.archive import Archive, ArchiveLibrary, _dds_header, normalize_name, read_archive
+from io_scene_niftools.utils.logging import NifError
+
+FILES = {
+    "textures\\armor\\Iron.dds": bytes(range(256)) * 12,
+    "textures\\armor\\Iron_n.dds": bytes(range(128)) * 20,
+    "textures\\sky\\stars.dds": b"x" * 5000,
+    "meshes\\clutter\\bucket.nif": b"nif data" * 10,
+}
+
+
+def write_tes3_bsa(path, files):
+    """Writes a Morrowind bsa."""
+    names = b""
+    name_offsets = []
+    records = b""
+    data = b""
+    for name, contents in files.items():
+        name_offsets.append(len(names))
+        names += name.encode() + b"\x00"
+        records += struct.pack("<2I", len(contents), len(data))
+        data += contents
+    num_files = len(files)
+    hash_offset = 12 * num_files + len(names)
+    with open(path, "wb") as stream:
+        stream.write(struct.pack("<3I", 0x100, hash_offset, num_files) + records +
+                     struct.pack(f"<{num_files}I", *name_offsets) + names + b"\x00" * 8 * num_files + data)
+
+
+def write_bsa(path, files, version, compressed, embedded_names=False, file_names=True):
+    """Writes an Oblivion to Skyrim SE bsa, where the second file of every folder toggles the compression."""
+    folders = {}
+    for name, contents in files.items():
+        folder, file_name = name.rsplit("\\", 1)
+        folders.setdefault(folder, []).append((file_name, contents))
+    archive_flags = 0x1 | (0x2 if file_names else 0) | (0x4 if compressed else 0) | (0x100 if embedded_names else 0)
+    folder_format = "<QIIQ" if version == 105 else "<QII"
+    name_table = b"".join(file_name.encode() + b"\x00"
+                          for folder_files in folders.values() for file_name, _ in folder_files)
+    records_size = sum(2 + len(folder) + 16 * len(folder_files) for folder, folder_files in folders.items())
+    data_offset = 36 + struct.calcsize(folder_format) * len(folders) + records_size + len(name_table)
+
+    folder_records = b"".join(struct.pack(folder_format, 0, len(folder_files), 0, *([0] if version == 105 else []))
+                              for folder_files in folders.values())
+    file_records = b""
+    data = b""
+    for folder, folder_files in folders.items():
+        file_records += struct.pack("<B", len(folder) + 1) + folder.encode() + b"\x00"
+        for index, (file_name, contents) in enumerate(folder_files):
+            payload = b""
+            if embedded_names:
+                full_name = f"{folder}\\{file_name}".encode()
+                payload += struct.pack("<B", len(full_name)) + full_name
+            if compressed != bool(index):
+                payload += struct.pack("<I", len(contents)) + zlib.compress(contents)
+            else:
+                payload += contents
+            size = len(payload) | (0x40000000 if index else 0)
+            file_records += struct.pack("<QII", 0, size, data_offset + len(data))
+            data += payload
+    header = struct.pack("<4s7IH2x", b"BSA\x00", version, 36, archive_flags, len(folders), len(files), 0,
+                         len(name_table), 0)
+    with open(path, "wb") as stream:
+        stream.write(header + folder_records + file_records + name_table + data)
+
+
+def write_ba2_general(path, files, version=1):
+    """Writes a Fallout 4 general ba2, where every second file is compressed."""
+    header_size = 24 + (8 if version in (2, 3) else 0) + (4 if version == 3 else 0)
+    data_offset = header_size + 36 * len(files)
+    records = b""
+    data = b""
+    for index, contents in enumerate(files.values()):
+        packed = zlib.compress(contents) if index % 2 else b""
+        records += struct.pack("<I4sIIQIII", 0, b"dds\x00", 0, 0, data_offset + len(data), len(packed),
+                               len(contents), 0xBAADF00D)
+        data += packed or contents
+    name_table = b"".join(struct.pack("<H", len(name)) + name.encode() for name in files)
+    header = struct.pack("<4sI4sIQ", b"BTDX", version, b"GNRL", len(files), data_offset + len(data))
+    if version in (2, 3):
+        header += struct.pack("<2I", 0, 0)
+    if version == 3:
+        # zlib compression
+        header += struct.pack("<I", 0)
+    with open(path, "wb") as stream:
+        stream.write(header + records + data + name_table)
+
+
+def write_ba2_texture(path, name, dxgi_format, mipmaps):
+    """Writes a Fallout 4 texture ba2 with a single texture, its first mipmap compressed and the others stored."""
+    data_offset = 24 + 24 + 24 * len(mipmaps)
+    chunks = b""
+    data = b""
+    for index, mipmap in enumerate(mipmaps):
+        packed = b"" if index else zlib.compress(mipmap)
+        chunks += struct.pack("<QIIHHI", data_offset + len(data), len(packed), len(mipmap), index, index,
+                              0xBAADF00D)
+        data += packed or mipmap
+    record = struct.pack("<I4sIBBHHHBBBB", 0, b"dds\x00", 0, 0, len(mipmaps), 24, 64, 64, len(mipmaps), dxgi_format,
+                         0, 0)
+    header = struct.pack("<4sI4sIQ", b"BTDX", 1, b"DX10", 1, data_offset + len(data))
+    with open(path, "wb") as stream:
+        stream.write(header + record + chunks + data + struct.pack("<H", len(name)) + name.encode())
+
+
+class TestArchiveIO:
+
+    @classmethod
+    def setup_class(cls):
+        cls.working_dir = tempfile.mkdtemp()
+        cls.mipmaps = [bytes(range(256)) * 8, b"\x01" * 512]
+
+    @classmethod
+    def teardown_class(cls):
+        shutil.rmtree(cls.working_dir)
+
+    def get_path(self, file_name):
+        return os.path.join(self.working_dir, file_name)
+
+    def check_files(self, archive_path):
+        record = read_archive(archive_path)
+        archive = Archive(archive_path, record, None)
+        nose.tools.assert_equal(sorted(archive.entries), sorted(normalize_name(name) for name in FILES))
+        for name, contents in FILES.items():
+            nose.tools.assert_equal(archive.read(normalize_name(name)), contents)
+        return record
+
+    def test_normalize_name(self):
+        nose.tools.assert_equal(normalize_name("/Textures/Armor/IRON.dds"), "textures\\armor\\iron.dds")
+
+    def test_read_tes3_bsa(self):
+        write_tes3_bsa(self.get_path("morrowind.bsa"), FILES)
+        record = self.check_files(self.get_path("morrowind.bsa"))
+        nose.tools.assert_equal(record["format"], "tes3")
+        # offset, size
+        nose.tools.assert_equal(record["entries"]["textures\\sky\\stars.dds"][1], 5000)
+
+    def test_read_bsa_103(self):
+        write_bsa(self.get_path("oblivion.bsa"), FILES, 103, compressed=False)
+        record = self.check_files(self.get_path("oblivion.bsa"))
+        nose.tools.assert_equal((record["format"], record["codec"], record["embedded_names"]), ("bsa", "zlib", False))
+        # the second file of the folder toggles the default compression
+        nose.tools.assert_equal(record["entries"]["textures\\armor\\iron.dds"][2], 0)
+        nose.tools.assert_equal(record["entries"]["textures\\armor\\iron_n.dds"][2], 1)
+
+    def test_read_bsa_104(self):
+        write_bsa(self.get_path("skyrim.bsa"), FILES, 104, compressed=True, embedded_names=True)
+        record = self.check_files(self.get_path("skyrim.bsa"))
+        nose.tools.assert_true(record["embedded_names"])
+        nose.tools.assert_equal(record["entries"]["textures\\armor\\iron.dds"][2], 1)
+        nose.tools.assert_equal(record["entries"]["textures\\armor\\iron_n.dds"][2], 0)
+
+    def test_read_bsa_105(self):
+        write_bsa(self.get_path("skyrim_se.bsa"), FILES, 105, compressed=False)
+        record = read_archive(self.get_path("skyrim_se.bsa"))
+        nose.tools.assert_equal(record["codec"], "lz4_frame")
+        nose.tools.assert_equal(sorted(record["entries"]), sorted(normalize_name(name) for name in FILES))
+        # the compressed file is written with zlib here, so only read those that are stored
+        nose.tools.assert_equal(record["entries"]["textures\\armor\\iron_n.dds"][2], 1)
+        archive = Archive(self.get_path("skyrim_se.bsa"), record, None)
+        for name in ("textures\\armor\\Iron.dds", "textures\\sky\\stars.dds"):
+            nose.tools.assert_equal(archive.read(normalize_name(name)), FILES[name])
+
+    @nose.tools.raises(NifError)
+    def test_read_bsa_without_names(self):
+        write_bsa(self.get_path("nameless.bsa"), FILES, 104, compressed=False, file_names=False)
+        read_archive(self.get_path("nameless.bsa"))
+
+    def test_read_ba2_general(self):
+        for version in (1, 2, 3):
+            write_ba2_general(self.get_path(f"general_{version}.ba2"), FILES, version)
+            record = self.check_files(self.get_path(f"general_{version}.ba2"))
+            nose.tools.assert_equal((record["format"], record["codec"]), ("ba2", "zlib"))
+
+    def test_read_ba2_texture(self):
+        write_ba2_texture(self.get_path("textures.ba2"), "Textures/Armor/Steel.dds", 71, self.mipmaps)
+        record = read_archive(self.get_path("textures.ba2"))
+        chunks, texture = record["entries"]["textures\\armor\\steel.dds"]
+        nose.tools.assert_equal(len(chunks), 2)
+        nose.tools.assert_equal(texture, [64, 64, 2, 71, 0])
+        data = Archive(self.get_path("textures.ba2"), record, None).read("textures\\armor\\steel.dds")
+        nose.tools.assert_equal(data[:128], _dds_header(64, 64, 2, 71, 0))
+        nose.tools.assert_equal(data[128:], b"".join(self.mipmaps))
+
+    @nose.tools.raises(NifError)
+    def test_read_not_archive(self):
+        with open(self.get_path("junk.bsa"), "wb") as stream:
+            stream.write(b"not an archive")
+        read_archive(self.get_path("junk.bsa"))
+
+    def test_dds_header_legacy(self):
+        header = _dds_header(64, 32, 7, 71, 0)
+        nose.tools.assert_equal(len(header), 128)
+        nose.tools.assert_equal(header[:4], b"DDS ")
+        size, flags, height, width, pitch, _depth, mipmaps = struct.unpack("<7I", header[4:32])
+        nose.tools.assert_equal((size, height, width, mipmaps), (124, 32, 64, 7))
+        # linear size of the first mipmap: 16 x 8 blocks of 8 bytes
+        nose.tools.assert_equal(pitch, 1024)
+        nose.tools.assert_equal(header[84:88], b"DXT1")
+        caps, _caps2 = struct.unpack("<2I", header[108:116])
+        nose.tools.assert_true(caps & 0x400000)
+
+    def test_dds_header_uncompressed(self):
+        header = _dds_header(16, 16, 1, 87, 0)
+        nose.tools.assert_equal(len(header), 128)
+        bits, red, green, blue, alpha = struct.unpack("<5I", header[88:108])
+        nose.tools.assert_equal((bits, red, green, blue, alpha), (32, 0x00FF0000, 0x0000FF00, 0x000000FF, 0xFF000000))
+        nose.tools.assert_equal(struct.unpack("<I", header[20:24])[0], 64)
+
+    def test_dds_header_dx10(self):
+        # BC7 has no legacy four cc
+        header = _dds_header(64, 64, 1, 98, 1)
+        nose.tools.assert_equal(len(header), 148)
+        nose.tools.assert_equal(header[84:88], b"DX10")
+        dxgi_format, dimension, misc_flags, array_size, _misc_flags2 = struct.unpack("<5I", header[128:148])
+        nose.tools.assert_equal((dxgi_format, dimension, misc_flags, array_size), (98, 3, 0x4, 1))
+
+    def test_library_cache(self):
+        archive_dir = self.get_path("library")
+        cache_dir = self.get_path("cache")
+        os.makedirs(archive_dir)
+        write_bsa(os.path.join(archive_dir, "a.bsa"), FILES, 104, compressed=True)
+        overrides = {"textures\\sky\\stars.dds": b"y" * 5000}
+        write_bsa(os.path.join(archive_dir, "b.bsa"), overrides, 104, compressed=False)
+
+        library = ArchiveLibrary()
+        library.configure([archive_dir], cache_dir, 2000)
+        nose.tools.assert_equal(len(library.archives), 2)
+        # later archives override earlier ones
+        nose.tools.assert_equal(os.path.basename(library.find("Textures/Sky/Stars.dds").archive_path), "b.bsa")
+        nose.tools.assert_is_none(library.extract("textures\\missing.dds"))
+        first = library.extract("textures\\armor\\iron.dds")
+        second = library.extract("textures\\sky\\stars.dds")
+        with open(second, "rb") as stream:
+            nose.tools.assert_equal(stream.read(), overrides["textures\\sky\\stars.dds"])
+        # over the limit, but files of this session are kept
+        nose.tools.assert_true(os.path.exists(first))
+
+        # a later session reuses the index, and evicts the least recently used files of earlier sessions
+        library = ArchiveLibrary()
+        library.configure([archive_dir], cache_dir, 6000)
+        library.extract("meshes\\clutter\\bucket.nif")
+        nose.tools.assert_false(os.path.exists(first))
+        nose.tools.assert_true(os.path.exists(second))
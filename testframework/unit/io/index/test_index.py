@@ -0,0 +1,195 @@
+"""Unit testing header-only nif inspection and the incremental header index"""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2026, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above
+#      copyright notice, this list of conditions and the following
+#      disclaimer in the documentation and/or other materials provided
+#      with the distribution.
+#
+#    * Neither the name of the NIF File Format Library and Tools
+#      project nor the names of its contributors may be used to endorse
+#      or promote products derived from this software without specific
+#      prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import os
+import shutil
+import struct
+import tempfile
+
+import nose
+
+from io_scene_niftools.file_io.index import NifIndex, inspect_header
+
+
+def version_string(version):
+    return ".".join(str(version >> shift & 0xFF) for shift in (24, 16, 8, 0))
+
+
+def sized_string(text, length_fmt="<I"):
+    return struct.pack(length_fmt, len(text)) + text.encode()
+
+
+def morrowind_header(num_blocks):
+    """Returns a 4.0.0.2 nif header, which has no block types."""
+    return (f"NetImmerse File Format, Version {version_string(0x04000002)}\n".encode() +
+            struct.pack("<2I", 0x04000002, num_blocks))
+
+
+def oblivion_nif(block_types):
+    """Returns a 20.0.0.5 nif header with a Bethesda stream header, its blocks are not needed to inspect it."""
+    type_names = sorted(set(block_types))
+    data = f"Gamebryo File Format, Version {version_string(0x14000005)}\n".encode()
+    # version, little endian, user version, number of blocks
+    data += struct.pack("<IBII", 0x14000005, 1, 11, len(block_types))
+    # bethesda stream header: version, author, process script, export script
+    data += struct.pack("<I", 11) + sized_string("author\x00", "<B") + sized_string("process\x00", "<B")
+    data += sized_string("export\x00", "<B")
+    data += struct.pack("<H", len(type_names)) + b"".join(sized_string(name) for name in type_names)
+    data += struct.pack(f"<{len(block_types)}H", *(type_names.index(block_type) for block_type in block_types))
+    # no groups
+    data += struct.pack("<I", 0)
+    return data
+
+
+def skyrim_nif(blocks, strings, roots, bs_version=83):
+    """Returns a 20.2.0.7 nif with block sizes, strings, blocks and the footer with the roots.
+
+    :param blocks: List of block type name and block data.
+    :param bs_version: 83 for Skyrim, 130 for Fallout 4.
+    """
+    type_names = sorted(set(block_type for block_type, _ in blocks))
+    data = f"Gamebryo File Format, Version {version_string(0x14020007)}\n".encode()
+    data += struct.pack("<IBII", 0x14020007, 1, 12, len(blocks))
+    # bethesda stream header, the max file path only follows from bs version 103
+    data += struct.pack("<I", bs_version) + sized_string("author\x00", "<B") + sized_string("process\x00", "<B")
+    data += sized_string("export\x00", "<B")
+    if bs_version >= 103:
+        data += sized_string("max\x00", "<B")
+    data += struct.pack("<H", len(type_names)) + b"".join(sized_string(name) for name in type_names)
+    data += struct.pack(f"<{len(blocks)}H", *(type_names.index(block_type) for block_type, _ in blocks))
+    data += struct.pack(f"<{len(blocks)}I", *(len(block) for _, block in blocks))
+    data += struct.pack("<2I", len(strings), max(len(string) for string in strings))
+    data += b"".join(sized_string(string) for string in strings)
+    data += struct.pack("<I", 0)
+    data += b"".join(block for _, block in blocks)
+    data += struct.pack(f"<I{len(roots)}i", len(roots), *roots)
+    return data
+
+
+class TestNifIndex:
+
+    @classmethod
+    def setup_class(cls):
+        cls.working_dir = tempfile.mkdtemp()
+
+    @classmethod
+    def teardown_class(cls):
+        shutil.rmtree(cls.working_dir)
+
+    def write(self, file_name, data):
+        file_path = os.path.join(self.working_dir, file_name)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, "wb") as stream:
+            stream.write(data)
+        return file_path
+
+    def test_inspect_before_block_types(self):
+        info = inspect_header(self.write("morrowind.nif", morrowind_header(3)))
+        nose.tools.assert_equal(info["version"], 0x04000002)
+        nose.tools.assert_equal(info["num_blocks"], 3)
+        nose.tools.assert_is_none(info["block_types"])
+        nose.tools.assert_is_none(info["roots"])
+
+    def test_inspect_bethesda_stream_header(self):
+        info = inspect_header(self.write("oblivion.nif", oblivion_nif(["NiNode", "NiTriShape", "NiNode"])))
+        nose.tools.assert_equal((info["version"], info["user_version"]), (0x14000005, 11))
+        nose.tools.assert_equal(info["num_blocks"], 3)
+        nose.tools.assert_equal(info["block_types"], {"NiNode": 2, "NiTriShape": 1})
+        nose.tools.assert_equal(info["strings"], [])
+        # no block sizes, so the roots cannot be found without reading the blocks
+        nose.tools.assert_is_none(info["roots"])
+
+    def test_inspect_roots(self):
+        blocks = [
+            ("BSFadeNode", struct.pack("<i", 0) + b"\x00" * 8),
+            ("BSTriShape", struct.pack("<i", 1) + b"\x00" * 20),
+            ("NiNode", struct.pack("<i", -1)),
+        ]
+        data = skyrim_nif(blocks, ["Scene Root", "Shape"], [0, 2, 7])
+        info = inspect_header(self.write("skyrim.nif", data))
+        nose.tools.assert_equal((info["version"], info["user_version"]), (0x14020007, 12))
+        nose.tools.assert_equal(info["strings"], ["Scene Root", "Shape"])
+        nose.tools.assert_equal(info["block_types"], {"BSFadeNode": 1, "BSTriShape": 1, "NiNode": 1})
+        # out of range roots are skipped, blocks without a name string have None
+        nose.tools.assert_equal(info["roots"], [{"type": "BSFadeNode", "name": "Scene Root"},
+                                                {"type": "NiNode", "name": None}])
+
+    def test_inspect_fallout_4_roots(self):
+        blocks = [("BSFadeNode", struct.pack("<i", 0))]
+        info = inspect_header(self.write("fallout4.nif", skyrim_nif(blocks, ["Root"], [0], bs_version=130)))
+        nose.tools.assert_equal(info["roots"], [{"type": "BSFadeNode", "name": "Root"}])
+
+    @nose.tools.raises(Exception)
+    def test_inspect_not_nif(self):
+        inspect_header(self.write("notnif.nif", b"not a nif file\n"))
+
+    def test_incremental_update(self):
+        library = os.path.join(self.working_dir, "library")
+        index_path = os.path.join(self.working_dir, "index.json")
+        first = self.write(os.path.join("library", "a.nif"), morrowind_header(1))
+        second = self.write(os.path.join("library", "sub", "b.nif"), oblivion_nif(["NiNode"]))
+        self.write(os.path.join("library", "readme.txt"), b"not indexed")
+
+        index = NifIndex(index_path)
+        nose.tools.assert_equal(index.update([library]), (2, 0, 0))
+        nose.tools.assert_equal(index.get(second)["block_types"], {"NiNode": 1})
+        index.save()
+
+        # a new index picks up the saved headers, and only inspects modified files
+        index = NifIndex(index_path)
+        nose.tools.assert_equal(index.update([library]), (0, 2, 0))
+        self.write(os.path.join("library", "a.nif"), morrowind_header(5))
+        nose.tools.assert_equal(index.update([library]), (1, 1, 0))
+        nose.tools.assert_equal(index.get(first)["num_blocks"], 5)
+
+        # same size, but a new modification time
+        stat = os.stat(second)
+        os.utime(second, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        nose.tools.assert_equal(index.update([library]), (1, 1, 0))
+
+        # unreadable files are indexed with their error
+        broken = self.write(os.path.join("library", "broken.nif"), b"broken\n")
+        nose.tools.assert_equal(index.update([library]), (1, 2, 0))
+        nose.tools.assert_is_none(index.get(broken))
+        nose.tools.assert_in("error", index.files[broken])
+
+        os.remove(broken)
+        os.remove(first)
+        nose.tools.assert_equal(index.update([library]), (0, 1, 2))
+        nose.tools.assert_is_none(index.get(first))
@@ -0,0 +1,137 @@
+"""Tests for the cached, case insensitive texture resolver."""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2026, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#
+#    * Redistributions in binary form must reproduce the above
+#      copyright notice, this list of conditions and the following
+#      disclaimer in the documentation and/or other materials provided
+#      with the distribution.
+#
+#    * Neither the name of the NIF File Format Library and Tools
+#      project nor the names of its contributors may be used to endorse
+#      or promote products derived from this software without specific
+#      prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import os
+import shutil
+import tempfile
+
+import nose
+
+from io_scene_niftools.modules.nif_import.property.texture.resolver import TextureResolver
+
+
+class TestTextureResolver:
+
+    def setup(self):
+        self.working_dir = tempfile.mkdtemp()
+        self.resolver = TextureResolver()
+
+    def teardown(self):
+        shutil.rmtree(self.working_dir)
+
+    def write(self, *parts):
+        file_path = os.path.join(self.working_dir, *parts)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, "wb") as stream:
+            stream.write(b"texture")
+        return file_path
+
+    def touch_dir(self, *parts):
+        """Moves the modification time of a directory forward, as file systems may not resolve quick changes."""
+        dir_path = os.path.join(self.working_dir, *parts)
+        stat = os.stat(dir_path)
+        os.utime(dir_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    def test_case_folding(self):
+        tex_path = self.write("Textures", "Armor", "Iron_Helmet.DDS")
+        nose.tools.assert_equal(self.resolver.resolve("textures\\armor\\iron_helmet.dds", self.working_dir), tex_path)
+        nose.tools.assert_equal(self.resolver.resolve("TEXTURES/ARMOR/./IRON_HELMET.dds", self.working_dir), tex_path)
+        nose.tools.assert_equal(self.resolver.resolve("Armor/../Armor/iron_helmet.dds",
+                                                      os.path.join(self.working_dir, "Textures")), tex_path)
+        nose.tools.assert_is_none(self.resolver.resolve("textures\\iron_helmet.dds", self.working_dir))
+        # a directory is not a texture
+        nose.tools.assert_is_none(self.resolver.resolve("textures\\armor", self.working_dir))
+
+    def test_alternate_extensions(self):
+        png_path = self.write("sword.png")
+        tga_path = self.write("sword.TGA")
+        jpg_path = self.write("sword.jpg")
+        # the alternates are tried in the order of TextureResolver.extensions
+        nose.tools.assert_equal(self.resolver.resolve("sword.dds", self.working_dir), png_path)
+        nose.tools.assert_equal(self.resolver.resolve("Sword.bmp", self.working_dir), png_path)
+        # the own extension comes first
+        nose.tools.assert_equal(self.resolver.resolve("sword.tga", self.working_dir), tga_path)
+        nose.tools.assert_equal(self.resolver.resolve("sword.jpg", self.working_dir), jpg_path)
+        dds_path = self.write("sword.dds")
+        self.touch_dir()
+        self.resolver.refresh()
+        nose.tools.assert_equal(self.resolver.resolve("sword.png", self.working_dir), png_path)
+        nose.tools.assert_equal(self.resolver.resolve("sword.bmp", self.working_dir), dds_path)
+
+    def test_morrowind_textures_strip(self):
+        tex_path = self.write("Data Files", "Textures", "tx_wood.tga")
+        search_dir = os.path.join(self.working_dir, "Data Files", "Textures")
+        nose.tools.assert_equal(self.resolver.resolve("textures\\tx_wood.dds", search_dir), tex_path)
+        nose.tools.assert_equal(self.resolver.resolve("tx_wood.dds", search_dir), tex_path)
+        # only stripped when the search directory is a textures folder
+        nose.tools.assert_is_none(
+            self.resolver.resolve("textures\\tx_wood.dds", os.path.join(self.working_dir, "Data Files", "Meshes")))
+
+    def test_absolute_path(self):
+        tex_path = self.write("a", "tex", "Foo.dds")
+        search_dir = os.path.join(self.working_dir, "search")
+        os.makedirs(search_dir)
+        nose.tools.assert_equal(self.resolver.resolve(tex_path, search_dir), tex_path)
+        nose.tools.assert_equal(self.resolver.resolve(os.path.join(os.path.dirname(tex_path), "FOO.png"), search_dir),
+                                tex_path)
+        nose.tools.assert_equal(self.resolver.resolve(tex_path.replace(os.sep, "\\"), search_dir), tex_path)
+        nose.tools.assert_is_none(self.resolver.resolve(os.path.join(self.working_dir, "b", "foo.dds"), search_dir))
+
+    def test_relist_after_change(self):
+        tex_path = os.path.join(self.working_dir, "tex", "new.dds")
+        os.makedirs(os.path.dirname(tex_path))
+        nose.tools.assert_is_none(self.resolver.resolve("tex\\new.dds", self.working_dir))
+
+        self.write("tex", "new.dds")
+        self.touch_dir("tex")
+        # listings are only checked again after a refresh
+        nose.tools.assert_is_none(self.resolver.resolve("tex\\new.dds", self.working_dir))
+        self.resolver.refresh()
+        nose.tools.assert_equal(self.resolver.resolve("tex\\new.dds", self.working_dir), tex_path)
+
+        os.remove(tex_path)
+        self.touch_dir("tex")
+        self.resolver.refresh()
+        nose.tools.assert_is_none(self.resolver.resolve("tex\\new.dds", self.working_dir))
+
+        # a directory that appears is listed too
+        other_path = self.write("other", "late.dds")
+        self.touch_dir()
+        self.resolver.refresh()
+        nose.tools.assert_equal(self.resolver.resolve("other\\late.dds", self.working_dir), other_path)